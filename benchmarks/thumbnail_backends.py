@@ -0,0 +1,268 @@
+"""
+Frame-grab and thumbnail throughput on a synthetic ffmpeg lavfi corpus.
+
+Usage:
+    python benchmarks/thumbnail_backends.py --corpus /tmp/nexa-bench
+    python benchmarks/thumbnail_backends.py --quick --output new.json --baseline old.json
+
+The corpus is generated once (deterministically) with ffmpeg test sources
+across several codecs, resolutions, durations and keyframe intervals, then
+reused by later runs. Every measurement reports frames/s and p50/p95
+latency; ``--baseline`` prints the relative change against an earlier
+``--output`` file and ``--fail-over`` turns slowdowns into a non-zero exit.
+"""
+
+from __future__ import annotations
+
+import argparse
+import atexit
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+_root = Path(__file__).resolve().parent.parent
+if str(_root) not in sys.path:
+    sys.path.insert(0, str(_root))
+
+# Keep the player's caches (thumbnails, backend stats, keyframe indexes) out
+# of the user's profile and cold for every run.
+_cache_home = tempfile.mkdtemp(prefix="nexa-bench-cache-")
+os.environ["XDG_CACHE_HOME"] = os.environ["LOCALAPPDATA"] = _cache_home
+atexit.register(shutil.rmtree, _cache_home, ignore_errors=True)
+
+from PySide6.QtCore import QCoreApplication, Qt  # noqa: E402
+
+from nexa_player.services.thumbnails import (  # noqa: E402
+    _BACKENDS,
+    EXTRACT_EXACT,
+    EXTRACT_KEYFRAME,
+    ThumbnailListWorker,
+    ThumbnailWorker,
+)
+
+# (name, encoder, container, extra encoder args)
+CODECS = [
+    ("h264", "libx264", "mp4", ["-preset", "veryfast", "-pix_fmt", "yuv420p", "-sc_threshold", "0"]),
+    ("mpeg4", "mpeg4", "avi", ["-q:v", "5"]),
+    ("vp9", "libvpx-vp9", "webm", ["-deadline", "realtime", "-cpu-used", "8", "-b:v", "1M"]),
+    ("mjpeg", "mjpeg", "mkv", ["-q:v", "5"]),
+]
+RESOLUTIONS = ["640x360", "1920x1080"]
+DURATIONS_S = [10, 60]
+GOP_FRAMES = [12, 250]
+FPS = 25
+QUICK = {"codecs": ["h264", "mpeg4"], "resolutions": ["640x360"], "durations": [10], "gops": [12, 250]}
+
+GRABS_PER_FILE = 8
+THUMB_SIZE = (160, 90)
+
+
+def _available_encoders() -> set[str]:
+    out = subprocess.run(
+        ["ffmpeg", "-hide_banner", "-encoders"], capture_output=True, text=True, check=False
+    ).stdout
+    return {line.split()[1] for line in out.splitlines() if line.startswith(" V")}
+
+
+def build_corpus(folder: Path, quick: bool) -> list[Path]:
+    """Generate (or reuse) the synthetic corpus; returns the video paths."""
+    folder.mkdir(parents=True, exist_ok=True)
+    encoders = _available_encoders()
+    codecs = [c for c in CODECS if not quick or c[0] in QUICK["codecs"]]
+    resolutions = QUICK["resolutions"] if quick else RESOLUTIONS
+    durations = QUICK["durations"] if quick else DURATIONS_S
+    gops = QUICK["gops"] if quick else GOP_FRAMES
+    paths: list[Path] = []
+    for name, encoder, container, extra in codecs:
+        if encoder not in encoders:
+            print(f"skipping {name}: ffmpeg has no {encoder} encoder", file=sys.stderr)
+            continue
+        for size in resolutions:
+            for duration in durations:
+                for gop in gops:
+                    path = folder / f"{name}_{size}_{duration}s_g{gop}.{container}"
+                    paths.append(path)
+                    if path.exists():
+                        continue
+                    args = [
+                        "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+                        "-f", "lavfi", "-i", f"testsrc2=size={size}:rate={FPS}:duration={duration}",
+                        "-c:v", encoder, "-g", str(gop), "-keyint_min", str(gop),
+                        *extra, "-an", "-bitexact", "-fflags", "+bitexact", str(path),
+                    ]
+                    print(f"generating {path.name}", file=sys.stderr)
+                    subprocess.run(args, check=True)
+    return paths
+
+
+def _duration_s(path: Path) -> int:
+    return int(path.stem.split("_")[2].rstrip("s"))
+
+
+def _summary(latencies_ms: list[float], failed: int, elapsed_s: float, frames: int) -> dict:
+    ordered = sorted(latencies_ms)
+
+    def pct(q: float) -> float:
+        if not ordered:
+            return 0.0
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 2)
+
+    return {
+        "frames": frames,
+        "failed": failed,
+        "seconds": round(elapsed_s, 3),
+        "fps": round(frames / elapsed_s, 2) if elapsed_s > 0 else 0.0,
+        "p50_ms": round(statistics.median(ordered), 2) if ordered else 0.0,
+        "p95_ms": pct(0.95),
+    }
+
+
+def bench_backend(backend: str, mode: str, paths: list[Path]) -> dict:
+    grab = _BACKENDS[backend]
+    latencies: list[float] = []
+    failed = 0
+    start = time.perf_counter()
+    for path in paths:
+        duration_ms = _duration_s(path) * 1000
+        for i in range(GRABS_PER_FILE):
+            ms = duration_ms * (2 * i + 1) // (2 * GRABS_PER_FILE)
+            t0 = time.perf_counter()
+            image = grab(str(path), ms, *THUMB_SIZE, mode, None)
+            latencies.append((time.perf_counter() - t0) * 1000)
+            if image is None or image.isNull():
+                failed += 1
+    elapsed = time.perf_counter() - start
+    return _summary(latencies, failed, elapsed, len(latencies) - failed)
+
+
+def _timed_signal(emitted: list[float]):
+    # Called on the worker thread (direct connection), at emit time.
+    def on_ready(*_args):
+        emitted.append(time.perf_counter())
+
+    return on_ready
+
+
+def bench_thumbnail_worker(mode: str, paths: list[Path]) -> dict:
+    latencies: list[float] = []
+    frames = 0
+    start = time.perf_counter()
+    for path in paths:
+        worker = ThumbnailWorker(str(path), mode=mode)
+        emitted: list[float] = []
+        worker.thumbnail_ready.connect(_timed_signal(emitted), Qt.DirectConnection)
+        t0 = time.perf_counter()
+        # Started on its own thread: the worker lowers its thread's priority,
+        # which must not leak into the measurements that follow.
+        worker.start()
+        worker.wait()
+        stamps = [t0, *emitted]
+        latencies += [(b - a) * 1000 for a, b in zip(stamps, stamps[1:])]
+        frames += len(emitted)
+    return _summary(latencies, 0, time.perf_counter() - start, frames)
+
+
+def bench_list_worker(mode: str, folder: Path, paths: list[Path]) -> dict:
+    worker = ThumbnailListWorker(str(folder), paths=[str(p) for p in paths], mode=mode)
+    emitted: list[float] = []
+    failed: list[str] = []
+
+    def on_ready(path, image):
+        emitted.append(time.perf_counter())
+        if image.isNull():
+            failed.append(path)
+
+    worker.thumb_ready.connect(on_ready, Qt.DirectConnection)
+    start = time.perf_counter()
+    worker.start()
+    worker.wait()
+    elapsed = time.perf_counter() - start
+    stamps = [start, *emitted]
+    latencies = [(b - a) * 1000 for a, b in zip(stamps, stamps[1:])]
+    return _summary(latencies, len(failed), elapsed, len(emitted) - len(failed))
+
+
+def run_suite(folder: Path, paths: list[Path], backends: list[str]) -> dict:
+    results: dict[str, dict] = {}
+    modes = (EXTRACT_KEYFRAME, EXTRACT_EXACT)
+    for mode in modes:
+        for backend in backends:
+            results[f"get_frame_at/{backend}/{mode}"] = bench_backend(backend, mode, paths)
+    for mode in modes:
+        results[f"ThumbnailWorker/{mode}"] = bench_thumbnail_worker(mode, paths)
+        results[f"ThumbnailListWorker/{mode}"] = bench_list_worker(mode, folder, paths)
+    return results
+
+
+def compare(results: dict, baseline: dict) -> tuple[list[str], float]:
+    """Human-readable deltas against ``baseline`` and the worst fps slowdown (%)."""
+    lines = [f"{'benchmark':<40} {'fps':>9} {'Δfps':>8} {'p95 ms':>9} {'Δp95':>8}"]
+    worst = 0.0
+    for name, row in results.items():
+        old = baseline.get("results", {}).get(name)
+        if not old:
+            lines.append(f"{name:<40} {row['fps']:>9.2f} {'new':>8} {row['p95_ms']:>9.2f}")
+            continue
+        d_fps = (row["fps"] - old["fps"]) / old["fps"] * 100 if old["fps"] else 0.0
+        d_p95 = (row["p95_ms"] - old["p95_ms"]) / old["p95_ms"] * 100 if old["p95_ms"] else 0.0
+        worst = max(worst, -d_fps)
+        lines.append(
+            f"{name:<40} {row['fps']:>9.2f} {d_fps:>+7.1f}% {row['p95_ms']:>9.2f} {d_p95:>+7.1f}%"
+        )
+    return lines, worst
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--corpus", type=Path, default=Path("bench-corpus"), help="Corpus folder.")
+    parser.add_argument("--quick", action="store_true", help="Small corpus for a fast check.")
+    parser.add_argument(
+        "--backends", nargs="+", default=sorted(_BACKENDS), choices=sorted(_BACKENDS)
+    )
+    parser.add_argument("--output", type=Path, help="Write the JSON results here.")
+    parser.add_argument("--baseline", type=Path, help="Earlier --output file to compare with.")
+    parser.add_argument(
+        "--fail-over", type=float, metavar="PCT", help="Exit 1 if any fps drops more than PCT%%."
+    )
+    args = parser.parse_args(argv)
+
+    if not shutil.which("ffmpeg"):
+        print("ffmpeg is required to build the corpus", file=sys.stderr)
+        return 2
+    QCoreApplication.instance() or QCoreApplication([])
+    paths = build_corpus(args.corpus, args.quick)
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "files": len(paths),
+            "grabs_per_file": GRABS_PER_FILE,
+            "quick": args.quick,
+        },
+        "results": run_suite(args.corpus, paths, args.backends),
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text, encoding="utf-8")
+    else:
+        print(text)
+
+    if args.baseline:
+        lines, worst = compare(report["results"], json.loads(args.baseline.read_text("utf-8")))
+        print("\n".join(lines), file=sys.stderr)
+        if args.fail_over is not None and worst > args.fail_over:
+            print(f"fps regressed by {worst:.1f}% (limit {args.fail_over}%)", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
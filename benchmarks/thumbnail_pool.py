@@ -0,0 +1,85 @@
+"""
+Throughput of ThumbnailListWorker for different pool sizes.
+
+Usage:
+    python benchmarks/thumbnail_pool.py /path/to/videos --workers 1 2 4 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import atexit
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+_root = Path(__file__).resolve().parent.parent
+if str(_root) not in sys.path:
+    sys.path.insert(0, str(_root))
+
+# Keep the player's caches (thumbnails, backend stats, keyframe indexes) out
+# of the user's profile and cold for every run.
+_cache_home = tempfile.mkdtemp(prefix="nexa-bench-cache-")
+os.environ["XDG_CACHE_HOME"] = os.environ["LOCALAPPDATA"] = _cache_home
+atexit.register(shutil.rmtree, _cache_home, ignore_errors=True)
+
+from PySide6.QtCore import QCoreApplication, Qt  # noqa: E402
+
+from nexa_player.services.thumbnails import ThumbnailListWorker  # noqa: E402
+
+
+def measure(folder: str, workers: int) -> dict:
+    worker = ThumbnailListWorker(folder, max_workers=workers)
+    results = {"ok": 0, "failed": 0}
+
+    def on_ready(_path, image):
+        results["failed" if image.isNull() else "ok"] += 1
+
+    # Direct connections: results are counted on the worker thread, so no
+    # event loop is needed here while waiting.
+    worker.thumb_ready.connect(on_ready, Qt.DirectConnection)
+    start = time.perf_counter()
+    # Started on its own thread: the worker lowers its thread's priority.
+    worker.start()
+    worker.wait()
+    elapsed = time.perf_counter() - start
+    total = results["ok"] + results["failed"]
+    return {
+        "workers": workers,
+        "files": total,
+        "failed": results["failed"],
+        "seconds": round(elapsed, 3),
+        "files_per_s": round(total / elapsed, 2) if elapsed > 0 else 0.0,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("folder", help="Folder of video files to thumbnail.")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+    args = parser.parse_args(argv)
+
+    QCoreApplication.instance() or QCoreApplication([])
+    rows = [measure(args.folder, n) for n in args.workers]
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return 0
+    base = rows[0]["files_per_s"] or 1.0
+    print(f"{'workers':>8} {'files':>6} {'seconds':>9} {'files/s':>9} {'speedup':>8}")
+    for row in rows:
+        speedup = row["files_per_s"] / base
+        print(
+            f"{row['workers']:>8} {row['files']:>6} {row['seconds']:>9.3f} "
+            f"{row['files_per_s']:>9.2f} {speedup:>7.2f}x"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
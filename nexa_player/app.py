@@ -16,7 +16,6 @@ if __package__ is None:  # running as script
     __package__ = "nexa_player"
 
 from PySide6.QtCore import QTimer, Signal
-from PySide6.QtGui import QPixmap
 from PySide6.QtWidgets import QApplication, QSplashScreen, QDialog, QMessageBox
 
 try:  # pragma: no cover - runtime environment detail
@@ -30,10 +29,31 @@ except ImportError:  # pragma: no cover
         sys.path.insert(0, str(_project_root))
     import resources_rc  # type: ignore  # noqa: F401
 
-from .helpers import get_video_duration, ms_to_minsec
+from .helpers import ms_to_minsec
+from .services.backend_stats import backend_stats
+from .services.background import background_policy
+from .services.cancellation import drain_retired, retire_worker
 from .services.dependency_check import DependencyChecker
+from .services.fingerprint import content_fingerprint
+from .services.image_cache import image_cache, media_identity
+from .services.intro import IntroAnalysisWorker, load_intro
+from .services.keyframes import KeyframeIndex, KeyframeIndexWorker
+from .services.metadata_store import metadata_store
+from .services.probe import MediaInfo, MediaProber
+from .services.scenes import SceneAnalysisWorker, SceneIndex, load_scene_index
+from .services.sprites import load_sprite_sheet, write_sprite_sheet
 from .services.state import StateStore
-from .services.thumbnails import ThumbnailWorker, VideoBuffer
+from .services.thumbnails import (
+    END_MARGIN_MS,
+    PREVIEW_HEIGHT,
+    PREVIEW_WIDTH,
+    FrameRequestWorker,
+    ThumbnailWorker,
+    VideoBuffer,
+)
+from .services.timeline import TimelineIndex, make_timeline_index
+from .services.vlc_grabber import release_shared_grabber
+from .services.waveform import Waveform, WaveformWorker, load_waveform
 from .ui.file_loader import FileLoader
 from .ui.player_window import PlayerWindow
 from .ui.playlist_dialog import PlaylistDialog
@@ -42,10 +62,22 @@ log = logging.getLogger(__name__)
 
 _log = log.getChild("playback")
 
+# Drag seeks move at most this far to reach a keyframe.
+SNAP_TOLERANCE_MS = 10000
+# "Previous scene" within this long after a scene start goes one further
+# back, like a previous-track button.
+SCENE_BACK_GRACE_MS = 2000
+# "Skip Intro" is offered from shortly before the intro starts until it ends.
+SKIP_INTRO_LEAD_MS = 2000
+# Resume points are written on pause and close, and while playing only once
+# the position has moved this far (so a seek is saved on the next tick).
+RESUME_SAVE_INTERVAL_MS = 5000
+
 
 class NexaApp(QApplication):
     media_finished = Signal()
     media_end = Signal()
+    length_changed = Signal(int)
 
     def __init__(self, argv):
         super().__init__(argv)
@@ -64,13 +96,47 @@ class NexaApp(QApplication):
         event_manager = self.mediaplayer.event_manager()
         event_manager.event_attach(self.vlc.EventType.MediaPlayerPlaying, self._on_media_playing)
         event_manager.event_attach(self.vlc.EventType.MediaPlayerEndReached, self._on_media_end)
+        event_manager.event_attach(self.vlc.EventType.MediaPlayerLengthChanged, self._on_vlc_length)
 
         self.video_path: Optional[str] = None
         self.has_media = False
         self.video_duration_ms: Optional[int] = None
+        self.media_info: Optional[MediaInfo] = None
+        self.keyframes: Optional[KeyframeIndex] = None
+        self._keyframe_worker: Optional[KeyframeIndexWorker] = None
+        self.scenes: Optional[SceneIndex] = None
+        self._scene_worker: Optional[SceneAnalysisWorker] = None
+        # (start, end) ms of the open file's intro, found by comparing the
+        # playlist's episodes.
+        self.intro: Optional[tuple[int, int]] = None
+        self._intro_worker: Optional[IntroAnalysisWorker] = None
+        # Audio overview behind the seek bars, filled in while it is computed.
+        self.waveform: Optional[Waveform] = None
+        self._waveform_worker: Optional[WaveformWorker] = None
         self.thumbnail_worker: Optional[ThumbnailWorker] = None
-        self.thumbnail_cache: dict[int, QPixmap] = {}
+        self.thumbnail_cache = TimelineIndex()
+        # Decoded frames shared by every view and kept across files.
+        self.image_cache = image_cache()
+        self._media_identity: Optional[str] = None
+        # Content fingerprint of the open file; second key for resume points.
+        self._content_id: Optional[str] = None
         self._playing_expected = False
+        self._media = None
+
+        # Thumbnailing and other heavy jobs wait for playback to settle and
+        # back off while VLC drops pictures.
+        self.background = background_policy()
+        self.background.watch_dropped_frames(self._lost_pictures)
+
+        self.frame_requester = FrameRequestWorker()
+        self.frame_requester.frame_ready.connect(self._on_exact_frame)
+        self.frame_requester.start()
+
+        self.prober = MediaProber()
+        self.prober.probed.connect(self._on_media_probed)
+        self.prober.start()
+        # VLC's length arrives on its event thread; hop to the GUI thread.
+        self.length_changed.connect(self._on_length_changed)
 
         saved_playlist = [p for p in self.state.get_last_playlist() if Path(p).exists()]
         self.playlist: List[str] = saved_playlist
@@ -141,6 +207,7 @@ class NexaApp(QApplication):
         self.ui_timer.start()
 
         self._last_ui_second = -1
+        self._resume_saved_ms = 0
         self._pending_resume_ms: Optional[int] = None
         # Guard to avoid handling the same media-end multiple times
         self._handling_end = False
@@ -241,6 +308,7 @@ class NexaApp(QApplication):
             self.video_buf = VideoBuffer(w, h)
             self.mediaplayer.video_set_format("RGBA", w, h, self.video_buf.stride)
             log.debug("Video started: %sx%s", w, h)
+            self.background.playback_started.emit()
             # leave resume prompt active until user chooses
         except Exception:  # pragma: no cover - defensive
             log.exception("Error in _on_media_playing")
@@ -275,7 +343,7 @@ class NexaApp(QApplication):
                 return
             self._handling_end = True
             _log.debug("_handle_media_end start: video_path=%s current_index=%s playlist_len=%s", self.video_path, self.current_index, len(self.playlist))
-            self.state.clear_resume_position(self.video_path or "")
+            self.state.clear_resume_position(self.video_path or "", self._content_id)
 
             # If there is a next item in the playlist, advance to it.
             try:
@@ -421,6 +489,7 @@ class NexaApp(QApplication):
                 self.mini.show_resume_prompt(message)
             if self.video_path:
                 self.update_titles(self.video_path)
+            self.mini.position.set_waveform(self.waveform)
         elif not enabled and self.mini is not None:
             self.mini.hide_resume_prompt()
             self.mini.close()
@@ -440,8 +509,10 @@ class NexaApp(QApplication):
         _log.debug("open_path: opening path=%s", path)
         if self.mediaplayer.is_playing():
             self.mediaplayer.stop()
+        self.background.media_changed()
         media = self.instance.media_new(path)
         self.mediaplayer.set_media(media)
+        self._media = media
         # Schedule playback start slightly later to give VLC time to attach media
         QTimer.singleShot(50, self._start_playback)
         self.video_path = path
@@ -454,21 +525,60 @@ class NexaApp(QApplication):
         except Exception:
             _log.debug("open_path: failed to set current_index for path=%s", path)
         self.state.set_last_file(path)
-        self.video_duration_ms = get_video_duration(path)
+        # Known files are answered by the metadata store without opening
+        # them; otherwise VLC's LengthChanged and then the background prober
+        # fill the duration in.
+        self.media_info = metadata_store().get(path)
+        if self.media_info is not None and self.media_info.duration_ms > 0:
+            self.video_duration_ms = self.media_info.duration_ms
+        else:
+            self.video_duration_ms = None
+            self.prober.request(path)
         self.has_media = True
         self.state.set_last_playlist(self.playlist)
 
-        self.thumbnail_cache = {}
-        if self.thumbnail_worker:
-            self.thumbnail_worker.stop()
-        self.thumbnail_worker = ThumbnailWorker(path, interval_s=30)
-        self.thumbnail_worker.thumbnail_ready.connect(self._store_thumbnail)
-        self.thumbnail_worker.start()
+        self.keyframes = None
+        retire_worker(self._keyframe_worker)
+        self._keyframe_worker = KeyframeIndexWorker(path)
+        self._keyframe_worker.index_ready.connect(self._on_keyframes_ready)
+        self._keyframe_worker.start()
+
+        # The scene index is a small cached file; analysing a new file is a
+        # full decode pass, so it waits for playback like the thumbnails.
+        retire_worker(self._scene_worker)
+        self._scene_worker = None
+        self.scenes = load_scene_index(path)
+        self._update_scene_markers()
+        if self.scenes is None:
+            self.background.submit(lambda p=path: self._start_scene_analysis(p))
+
+        retire_worker(self._waveform_worker)
+        self._waveform_worker = None
+        waveform = load_waveform(path)
+        self._show_waveform(waveform)
+        if waveform is None:
+            self.background.submit(lambda p=path: self._start_waveform(p))
+
+        self.intro = load_intro(path)
+        if self.intro is None and path in self.playlist and len(self.playlist) > 1:
+            self.background.submit(lambda p=path: self._start_intro_analysis(p))
+
+        self.frame_requester.cancel()
+        retire_worker(self.thumbnail_worker)
+        self.thumbnail_worker = None
+        self._media_identity = media_identity(path)
+        sprites = load_sprite_sheet(path)
+        if sprites is not None:
+            self.thumbnail_cache = sprites
+        else:
+            self.thumbnail_cache = TimelineIndex()
+            self.background.submit(lambda p=path: self._start_thumbnails(p))
 
         self.update_titles(path)
         self._set_play_icon(True)
-        resume_positions = self.state.get_resume_positions()
-        resume_ms = resume_positions.get(path)
+        self._content_id = content_fingerprint(path)
+        self._resume_saved_ms = 0
+        resume_ms = self.state.get_resume_position(path, self._content_id)
         if resume_ms:
             self._pending_resume_ms = resume_ms
             message = f"Resume from {ms_to_minsec(resume_ms)}?"
@@ -487,10 +597,152 @@ class NexaApp(QApplication):
         if self.mini is not None:
             self.mini.setWindowTitle(f"{name_only} - Nexa Player - PIP")
 
+    def _start_thumbnails(self, path: str):
+        if path != self.video_path:
+            return
+        # Started once playback is up, so the duration is usually known and
+        # the storage choice can depend on it.
+        self.thumbnail_cache = make_timeline_index(
+            self.state.get_thumbnail_storage(), self.video_duration_ms or 0
+        )
+        # Frames decoded the last time this file played are reused as is.
+        cached = self.image_cache.frames(self._media_identity, PREVIEW_WIDTH, PREVIEW_HEIGHT)
+        for time_ms, image in cached:
+            self.thumbnail_cache.insert(time_ms, image)
+        worker = ThumbnailWorker(
+            path, mode=self.state.get_thumbnail_mode(), skip=(t for t, _ in cached)
+        )
+        worker.thumbnail_ready.connect(self._on_worker_thumbnail)
+        worker.finished.connect(lambda w=worker: self._on_thumbnails_finished(w))
+        self.thumbnail_worker = worker
+        worker.start()
+
+    def _on_vlc_length(self, event):
+        self.length_changed.emit(int(event.u.new_length))
+
+    def _on_length_changed(self, length_ms: int):
+        # Only a stand-in until the prober reports, or when it could not
+        # tell (fragmented MP4, streams, failed fallbacks).
+        if length_ms > 0 and (self.media_info is None or not self.media_info.duration_ms):
+            self.video_duration_ms = length_ms
+            self._update_scene_markers()
+
+    def _on_media_probed(self, info: MediaInfo):
+        if info.path != self.video_path:
+            return
+        self.media_info = info
+        if info.duration_ms > 0:
+            self.video_duration_ms = info.duration_ms
+            self._update_scene_markers()
+
+    def _on_keyframes_ready(self, path: str, index: KeyframeIndex):
+        if path == self.video_path:
+            self.keyframes = index
+
+    def _start_scene_analysis(self, path: str):
+        if path != self.video_path:
+            return
+        worker = SceneAnalysisWorker(path)
+        worker.index_ready.connect(self._on_scenes_ready)
+        self._scene_worker = worker
+        worker.start()
+
+    def _on_scenes_ready(self, path: str, index: SceneIndex):
+        if path == self.video_path:
+            self.scenes = index
+            self._update_scene_markers()
+
+    def _start_waveform(self, path: str):
+        if path != self.video_path:
+            return
+        worker = WaveformWorker(path)
+        worker.waveform_ready.connect(self._on_waveform_ready)
+        self._waveform_worker = worker
+        worker.start()
+
+    def _on_waveform_ready(self, path: str, waveform: Waveform, _complete: bool):
+        if path == self.video_path:
+            self._show_waveform(waveform)
+
+    def _show_waveform(self, waveform: Optional[Waveform]):
+        self.waveform = waveform
+        for win in (self.broadcast, self.mini):
+            if win:
+                win.position.set_waveform(waveform)
+
+    def _start_intro_analysis(self, path: str):
+        if path != self.video_path:
+            return
+        if self._intro_worker is not None and self._intro_worker.isRunning():
+            if self._intro_worker.paths == list(dict.fromkeys(self.playlist)):
+                return  # already covers this file
+        retire_worker(self._intro_worker)
+        worker = IntroAnalysisWorker(self.playlist)
+        worker.intro_found.connect(self._on_intro_found)
+        self._intro_worker = worker
+        worker.start()
+
+    def _on_intro_found(self, path: str, start_ms: int, end_ms: int):
+        if path == self.video_path:
+            self.intro = (start_ms, end_ms)
+
+    def skip_intro(self):
+        if self.intro is None:
+            return
+        start_ms, end_ms = self.intro
+        if start_ms - SKIP_INTRO_LEAD_MS <= self.mediaplayer.get_time() < end_ms:
+            self.background.notify_seek()
+            self.mediaplayer.set_time(end_ms)
+
+    def _update_scene_markers(self):
+        times = self.scenes.times if self.scenes is not None else ()
+        for win in (self.broadcast, self.mini):
+            if win:
+                win.position.set_markers(times)
+
+    def _on_worker_thumbnail(self, time_ms: int, image):
+        # Retired workers may still have frames queued for the old file.
+        if self.sender() is self.thumbnail_worker:
+            self._store_thumbnail(time_ms, image)
+
     def _store_thumbnail(self, time_ms: int, image):
         if image.isNull():
             return
-        self.thumbnail_cache[time_ms] = QPixmap.fromImage(image)
+        self.thumbnail_cache.insert(time_ms, image)
+        if self._media_identity is not None:
+            key = (self._media_identity, time_ms, image.width(), image.height())
+            self.image_cache.put(key, image)
+
+    def _on_thumbnails_finished(self, worker: ThumbnailWorker):
+        if worker is not self.thumbnail_worker or not worker.completed:
+            return
+        write_sprite_sheet(worker.video_path, self.thumbnail_cache, self.video_duration_ms or 0)
+
+    def _lost_pictures(self) -> Optional[int]:
+        if self._media is None or not self.mediaplayer.is_playing():
+            return None
+        stats = self.vlc.MediaStats()
+        if not self._media.get_stats(stats):
+            return None
+        return stats.lost_pictures
+
+    def request_exact_frame(self, time_ms: int):
+        if self.video_path:
+            if self.video_duration_ms:
+                # Nothing decodes at the very end; show the last real frame.
+                time_ms = max(0, min(time_ms, self.video_duration_ms - END_MARGIN_MS))
+            self.frame_requester.request(self.video_path, time_ms)
+
+    def cancel_exact_frame(self):
+        self.frame_requester.cancel()
+
+    def _on_exact_frame(self, path: str, time_ms: int, image):
+        if path != self.video_path or image.isNull():
+            return
+        self._store_thumbnail(time_ms, image)
+        for win in (self.broadcast, self.mini):
+            if win:
+                win.position.refresh_preview(time_ms)
 
     # ------------------------------------------------------------------
     # Playback controls
@@ -513,6 +765,7 @@ class NexaApp(QApplication):
         if self._playing_expected:
             _log.debug("play_pause: pausing playback")
             self.mediaplayer.pause()
+            self._save_resume_position()
             self._set_play_icon(False)
         else:
             _log.debug("play_pause: requesting playback start")
@@ -521,7 +774,7 @@ class NexaApp(QApplication):
             self._set_play_icon(True)
 
     def stop(self):
-        self.state.clear_resume_position(self.video_path or "")
+        self.state.clear_resume_position(self.video_path or "", self._content_id)
         self.mediaplayer.stop()
         self.broadcast.hide_resume_prompt()
         if self.mini:
@@ -533,17 +786,41 @@ class NexaApp(QApplication):
             win.time_label.setText("--:-- / --:--")
         self._set_play_icon(False)
 
-    def set_position(self, value: int):
+    def set_position(self, value: int, snap: bool = False):
+        """
+        Seek to ``value`` (0-1000 of the length). With ``snap`` (used while
+        dragging) the target moves to a nearby keyframe so VLC can show it
+        without decoding through the GOP; the release seek is exact.
+        """
         if self.has_media:
             length = self.mediaplayer.get_length()
             if length > 0:
                 new_time = int((value / 1000) * length)
+                if snap and self.keyframes is not None:
+                    new_time = self.keyframes.snap(new_time, SNAP_TOLERANCE_MS)
+                self.background.notify_seek()
                 self.mediaplayer.set_time(new_time)
 
     def seek(self, delta_ms):
         t = max(0, self.mediaplayer.get_time() + delta_ms)
+        self.background.notify_seek()
         self.mediaplayer.set_time(t)
 
+    def next_scene(self):
+        if self.scenes is None:
+            return
+        target = self.scenes.next_after(self.mediaplayer.get_time())
+        if target is not None:
+            self.background.notify_seek()
+            self.mediaplayer.set_time(target)
+
+    def previous_scene(self):
+        if self.scenes is None:
+            return
+        target = self.scenes.previous_before(self.mediaplayer.get_time() - SCENE_BACK_GRACE_MS)
+        self.background.notify_seek()
+        self.mediaplayer.set_time(target or 0)
+
     def set_volume(self, val):
         self.mediaplayer.audio_set_volume(val)
         self.state.set_volume(val)
@@ -634,7 +911,7 @@ class NexaApp(QApplication):
         if self.mini:
             self.mini.hide_resume_prompt()
         if self.video_path:
-            self.state.clear_resume_position(self.video_path)
+            self.state.clear_resume_position(self.video_path, self._content_id)
         self._pending_resume_ms = None
         self.mediaplayer.set_time(0)
         self.mediaplayer.play()
@@ -687,11 +964,15 @@ class NexaApp(QApplication):
                     win.time_label.setText("--:-- / --:--")
             self._last_ui_second = current_second
 
-            if self.video_path and length > 0:
-                if time_ < length - 3000:
-                    self.state.set_resume_position(self.video_path, int(time_))
-                else:
-                    self.state.clear_resume_position(self.video_path)
+            in_intro = self.intro is not None and (
+                self.intro[0] - SKIP_INTRO_LEAD_MS <= time_ < self.intro[1]
+            )
+            for win in (self.broadcast, self.mini):
+                if win and win.skip_intro_btn.isHidden() == in_intro:
+                    win.skip_intro_btn.setVisible(in_intro)
+
+            if abs(time_ - self._resume_saved_ms) >= RESUME_SAVE_INTERVAL_MS:
+                self._save_resume_position()
 
         if self.loop_enabled and length > 0:
             state = self.mediaplayer.get_state()
@@ -705,6 +986,18 @@ class NexaApp(QApplication):
         if not self.loop_enabled and self.mediaplayer.get_state() == self.vlc.State.Ended:
             self._set_play_icon(False)
 
+    def _save_resume_position(self):
+        length = self.mediaplayer.get_length()
+        time_ = self.mediaplayer.get_time()
+        # Nothing to save once stopped (time is -1) or before anything loads.
+        if not self.video_path or length <= 0 or time_ <= 0:
+            return
+        if time_ < length - 3000:
+            self.state.set_resume_position(self.video_path, int(time_), self._content_id)
+        else:
+            self.state.clear_resume_position(self.video_path, self._content_id)
+        self._resume_saved_ms = time_
+
     # ------------------------------------------------------------------
     # Playlist advancement
 
@@ -748,10 +1041,26 @@ class NexaApp(QApplication):
     # ------------------------------------------------------------------
     # Shutdown
 
+    def thumbnail_memory_stats(self) -> dict[str, int]:
+        return self.thumbnail_cache.stats()
+
+    def image_cache_stats(self) -> dict[str, int]:
+        return self.image_cache.stats()
+
     def _cleanup(self):
-        if self.thumbnail_worker:
-            self.thumbnail_worker.stop()
-            self.thumbnail_worker = None
+        self._save_resume_position()
+        retire_worker(self.thumbnail_worker)
+        self.thumbnail_worker = None
+        retire_worker(self._keyframe_worker)
+        retire_worker(self._scene_worker)
+        retire_worker(self._intro_worker)
+        retire_worker(self._waveform_worker)
+        self.frame_requester.stop()
+        self.prober.stop()
+        drain_retired()
+        metadata_store().close()
+        backend_stats().save()
+        release_shared_grabber()
 
 
 if __name__ == "__main__":  # pragma: no cover
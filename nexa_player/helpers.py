@@ -1,7 +1,10 @@
 from __future__ import annotations
 
+import hashlib
 import os
 import urllib.parse
+from pathlib import Path
+from typing import Optional
 
 import cv2
 
@@ -25,9 +28,41 @@ def ms_to_minsec(ms: int) -> str:
     return f"{seconds // 60:02d}:{seconds % 60:02d}"
 
 
+def format_duration(ms: int) -> str:
+    """Like ``ms_to_minsec`` but with hours for long media, e.g. "1:02:03"."""
+    seconds = max(0, ms) // 1000
+    hours, rest = divmod(seconds, 3600)
+    if hours:
+        return f"{hours}:{rest // 60:02d}:{rest % 60:02d}"
+    return f"{rest // 60:02d}:{rest % 60:02d}"
+
+
 def clean_filename_from_mrl(mrl: str) -> str:
     if mrl.startswith("file:///"):
         path = urllib.parse.unquote(mrl[8:])
     else:
         path = urllib.parse.unquote(mrl)
     return os.path.basename(path)
+
+
+def user_cache_dir(*parts: str) -> Path:
+    """Per-user cache directory (created on demand), optionally a subfolder of it."""
+    if os.name == "nt":
+        base = Path(os.environ.get("LOCALAPPDATA", Path.home() / "AppData" / "Local"))
+        root = base / "NexaPlayer" / "cache"
+    else:
+        base = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache"))
+        root = base / "NexaPlayer"
+    path = root.joinpath(*parts)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def file_cache_key(path: str) -> Optional[str]:
+    """Stable cache key for a file that changes whenever the file is replaced."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    ident = f"{os.path.abspath(path)}|{st.st_size}|{st.st_mtime_ns}"
+    return hashlib.sha1(ident.encode("utf-8")).hexdigest()[:20]
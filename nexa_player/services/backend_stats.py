@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Iterable, Optional
+
+from ..helpers import user_cache_dir
+from .container_probe import cached_container_info
+
+log = logging.getLogger(__name__)
+
+STATS_FILE = "frame_backends.json"
+# How long a per-file failure is trusted before the backend is retried.
+FAILURE_TTL_S = 7 * 24 * 3600
+# Weight of the newest sample in the per-codec latency average.
+LATENCY_ALPHA = 0.2
+# Starting latency guesses (ms) so the default order is ffmpeg, OpenCV, VLC.
+PRIOR_LATENCY_MS = {"ffmpeg": 120.0, "opencv": 250.0, "vlc": 900.0}
+MAX_FILES = 5000
+SAVE_EVERY = 25
+
+
+class UnreadableFile(Exception):
+    """
+    Raised by a frame backend that cannot open or decode a file at all, as
+    opposed to finding no frame at one timestamp (e.g. past the end).
+    """
+
+
+def _failure_key(backend: str, mode: str) -> str:
+    # Failures are per extraction mode: a decoder that rejects the keyframe
+    # shortcuts may still serve exact frames.
+    return f"{backend}/{mode}"
+
+
+def codec_hint(path: str) -> str:
+    """
+    Codec bucket for latency stats: the video codec from the container
+    headers where they can be read, else the file extension.
+    """
+    info = cached_container_info(path)
+    if info is not None and info.video_codec:
+        return info.video_codec
+    return os.path.splitext(path)[1].lower().lstrip(".") or "unknown"
+
+
+class BackendStats:
+    """
+    Remembers which frame-grab backend works for each file and how fast each
+    backend is per codec. Backends that could not read a file at all (per
+    extraction mode) are skipped for it for FAILURE_TTL_S; a missing frame
+    at one timestamp only counts against the codec stats. A backend that
+    succeeded for a file is tried first, and everything else is ordered by
+    measured latency weighted by success rate.
+    Thread-safe; persisted as JSON in the user cache dir.
+    """
+
+    def __init__(self, path: Optional[Path] = None) -> None:
+        self._path = path or user_cache_dir() / STATS_FILE
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._files: dict[str, dict] = {}
+        self._codecs: dict[str, dict[str, dict]] = {}
+        self._dirty = 0
+        self._load()
+
+    def order(
+        self, file_key: Optional[str], codec: str, backends: Iterable[str], mode: str = "exact"
+    ) -> list[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._files.get(file_key or "", {})
+            failed = {
+                name for name, ts in entry.get("failed", {}).items() if now - ts < FAILURE_TTL_S
+            }
+            codec_stats = self._codecs.get(codec, {})
+            candidates = [b for b in backends if _failure_key(b, mode) not in failed]
+
+            def cost(name: str) -> float:
+                data = codec_stats.get(name)
+                if not data:
+                    return PRIOR_LATENCY_MS.get(name, 1000.0)
+                total = data["ok"] + data["fail"]
+                success = data["ok"] / total if total else 1.0
+                return data["ms"] / max(0.05, success)
+
+            ordered = sorted(candidates, key=cost)
+            preferred = entry.get("ok")
+            if preferred in ordered:
+                ordered.remove(preferred)
+                ordered.insert(0, preferred)
+            return ordered
+
+    def is_known_failure(self, file_key: Optional[str], backend: str, mode: str = "exact") -> bool:
+        with self._lock:
+            failed = self._files.get(file_key or "", {}).get("failed", {})
+            ts = failed.get(_failure_key(backend, mode))
+        return ts is not None and time.time() - ts < FAILURE_TTL_S
+
+    def record(
+        self,
+        file_key: Optional[str],
+        codec: str,
+        backend: str,
+        ok: bool,
+        latency_ms: float,
+        mode: str = "exact",
+        unreadable: bool = False,
+    ) -> None:
+        """
+        Record one attempt. Only ``unreadable`` failures (see UnreadableFile)
+        mark the backend as failing for the file.
+        """
+        now = time.time()
+        with self._lock:
+            data = self._codecs.setdefault(codec, {}).setdefault(
+                backend, {"ms": latency_ms, "ok": 0, "fail": 0}
+            )
+            if ok:
+                data["ms"] += LATENCY_ALPHA * (latency_ms - data["ms"])
+                data["ok"] += 1
+            else:
+                data["fail"] += 1
+            if file_key:
+                entry = self._files.setdefault(file_key, {"failed": {}})
+                entry["ts"] = now
+                if ok:
+                    entry["ok"] = backend
+                    entry["failed"].pop(_failure_key(backend, mode), None)
+                elif unreadable:
+                    entry["failed"][_failure_key(backend, mode)] = now
+                    if entry.get("ok") == backend:
+                        entry.pop("ok")
+            self._dirty += 1
+            should_save = self._dirty >= SAVE_EVERY
+        if should_save:
+            self.save()
+
+    def save(self) -> None:
+        # Saves run on whichever pool thread hit SAVE_EVERY. They are
+        # serialised from snapshot to rename, so they neither share a tmp
+        # file nor land out of order; recording only waits for the snapshot.
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                if len(self._files) > MAX_FILES:
+                    newest = sorted(
+                        self._files.items(), key=lambda kv: kv[1].get("ts", 0), reverse=True
+                    )
+                    self._files = dict(newest[:MAX_FILES])
+                payload = json.dumps({"files": self._files, "codecs": self._codecs})
+                self._dirty = 0
+            try:
+                tmp = self._path.with_suffix(".tmp")
+                tmp.write_text(payload, encoding="utf-8")
+                tmp.replace(self._path)
+            except OSError:
+                log.exception("Failed to save frame backend stats to %s", self._path)
+
+    def _load(self) -> None:
+        try:
+            data = json.loads(self._path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return
+        except Exception:  # pragma: no cover - defensive
+            log.warning("Ignoring unreadable frame backend stats at %s", self._path)
+            return
+        if isinstance(data, dict):
+            self._files = data.get("files", {}) or {}
+            self._codecs = data.get("codecs", {}) or {}
+
+
+_instance: Optional[BackendStats] = None
+_instance_lock = threading.Lock()
+
+
+def backend_stats() -> BackendStats:
+    global _instance
+    with _instance_lock:
+        if _instance is None:
+            _instance = BackendStats()
+        return _instance
@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import ctypes
+import logging
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+from typing import Callable, Optional
+
+from PySide6.QtCore import QObject, QTimer, Signal
+
+log = logging.getLogger(__name__)
+
+# Heavy jobs for a newly opened file start this long after VLC reports
+# MediaPlayerPlaying, or after MAX_DEFER_MS if playback never starts.
+PLAYING_GRACE_MS = 1500
+MAX_DEFER_MS = 8000
+# Background work pauses this long after a seek and after every stats poll
+# that saw VLC drop pictures.
+SEEK_QUIET_MS = 1500
+DROPPED_QUIET_MS = 2000
+STATS_POLL_MS = 1000
+
+BACKGROUND_NICE = 19
+
+# ioprio_set(2): IOPRIO_WHO_PROCESS accepts a thread id; class IDLE only
+# gets disk time when nobody else wants it.
+_IOPRIO_WHO_PROCESS = 1
+_IOPRIO_CLASS_IDLE = 3
+_IOPRIO_CLASS_SHIFT = 13
+_IOPRIO_SET_SYSCALL = {"x86_64": 251, "aarch64": 30, "i686": 289, "i386": 289, "armv7l": 314}
+
+# SetThreadPriority mode lowering CPU, I/O and memory priority together.
+_THREAD_MODE_BACKGROUND_BEGIN = 0x00010000
+
+
+def lower_thread_priority() -> None:
+    """
+    Drop the calling thread to idle CPU and I/O priority. On Linux both are
+    per-thread and inherited by subprocesses the thread starts, so ffmpeg
+    children run at idle priority too.
+    """
+    try:
+        if sys.platform.startswith("linux"):
+            tid = threading.get_native_id()
+            os.setpriority(os.PRIO_PROCESS, tid, BACKGROUND_NICE)
+            _set_idle_io(tid)
+        elif os.name == "nt":
+            kernel32 = ctypes.windll.kernel32  # type: ignore[attr-defined]
+            kernel32.SetThreadPriority(kernel32.GetCurrentThread(), _THREAD_MODE_BACKGROUND_BEGIN)
+        elif sys.platform == "darwin":
+            which = getattr(os, "PRIO_DARWIN_THREAD", None)
+            value = getattr(os, "PRIO_DARWIN_BG", None)
+            if which is not None and value is not None:
+                os.setpriority(which, 0, value)
+    except (OSError, AttributeError):
+        log.debug("Could not lower background thread priority", exc_info=True)
+
+
+def _set_idle_io(tid: int) -> None:
+    number = _IOPRIO_SET_SYSCALL.get(platform.machine())
+    if number is None:
+        return
+    libc = ctypes.CDLL(None, use_errno=True)
+    if libc.syscall(number, _IOPRIO_WHO_PROCESS, tid, _IOPRIO_CLASS_IDLE << _IOPRIO_CLASS_SHIFT) != 0:
+        log.debug("ioprio_set failed: errno %s", ctypes.get_errno())
+
+
+def background_popen_kwargs() -> dict:
+    """Extra ``Popen`` arguments for child processes of background jobs."""
+    if os.name == "nt":
+        return {"creationflags": subprocess.IDLE_PRIORITY_CLASS}
+    # POSIX children inherit the (already lowered) priority of their thread.
+    return {}
+
+
+class BackgroundPolicy(QObject):
+    """
+    Decides when heavy background media work may run. Jobs submitted for a
+    new file are held until playback has started and settled, and running
+    jobs pause at their checkpoints after seeks and while VLC reports
+    dropped pictures. ``checkpoint`` is safe to call from any thread;
+    everything else belongs to the GUI thread.
+    """
+
+    playback_started = Signal()
+
+    def __init__(self, parent: Optional[QObject] = None) -> None:
+        super().__init__(parent)
+        self._lock = threading.Lock()
+        self._quiet_until = 0.0
+        self._ready = True
+        self._pending: list[Callable[[], None]] = []
+        self._lost_frames: Optional[Callable[[], Optional[int]]] = None
+        self._last_lost: Optional[int] = None
+
+        self._grace = QTimer(self)
+        self._grace.setSingleShot(True)
+        self._grace.timeout.connect(self._release)
+        self._deadline = QTimer(self)
+        self._deadline.setSingleShot(True)
+        self._deadline.timeout.connect(self._release)
+        self._stats_timer = QTimer(self)
+        self._stats_timer.setInterval(STATS_POLL_MS)
+        self._stats_timer.timeout.connect(self._poll_stats)
+        # Emitted from VLC's event thread; the connection queues it here.
+        self.playback_started.connect(self._on_playing)
+
+    def watch_dropped_frames(self, lost_frames: Callable[[], Optional[int]]) -> None:
+        """``lost_frames`` returns VLC's cumulative lost-picture count, or None."""
+        self._lost_frames = lost_frames
+        self._stats_timer.start()
+
+    def media_changed(self) -> None:
+        """A new file is opening: hold heavy jobs until it is playing."""
+        self._pending.clear()
+        self._ready = False
+        self._last_lost = None
+        self._grace.stop()
+        self._deadline.start(MAX_DEFER_MS)
+
+    def submit(self, job: Callable[[], None]) -> None:
+        if self._ready:
+            job()
+        else:
+            self._pending.append(job)
+
+    def notify_seek(self) -> None:
+        self._quiet_for(SEEK_QUIET_MS)
+
+    def checkpoint(self, token=None) -> bool:
+        """
+        Block while foreground playback needs the machine. Returns True if
+        ``token`` was cancelled while waiting.
+        """
+        while True:
+            with self._lock:
+                remaining = self._quiet_until - time.monotonic()
+            if remaining <= 0:
+                return bool(token is not None and token.cancelled)
+            step = min(remaining, 0.25)
+            if token is not None:
+                if token.wait(step):
+                    return True
+            else:
+                time.sleep(step)
+
+    def _quiet_for(self, ms: int) -> None:
+        with self._lock:
+            self._quiet_until = max(self._quiet_until, time.monotonic() + ms / 1000.0)
+
+    def _on_playing(self) -> None:
+        if not self._ready and not self._grace.isActive():
+            self._grace.start(PLAYING_GRACE_MS)
+
+    def _release(self) -> None:
+        self._grace.stop()
+        self._deadline.stop()
+        if self._ready:
+            return
+        self._ready = True
+        jobs, self._pending = self._pending, []
+        for job in jobs:
+            job()
+
+    def _poll_stats(self) -> None:
+        if self._lost_frames is None:
+            return
+        try:
+            lost = self._lost_frames()
+        except Exception:  # pylint: disable=broad-exception-caught
+            log.debug("Reading playback stats failed", exc_info=True)
+            lost = None
+        if lost is None:
+            return
+        if self._last_lost is not None and lost > self._last_lost:
+            log.debug("Playback dropped %s picture(s); throttling background work", lost - self._last_lost)
+            self._quiet_for(DROPPED_QUIET_MS)
+        self._last_lost = lost
+
+
+_instance: Optional[BackgroundPolicy] = None
+
+
+def background_policy() -> BackgroundPolicy:
+    """The app-wide policy; first called from the GUI thread at startup."""
+    global _instance
+    if _instance is None:
+        _instance = BackgroundPolicy()
+    return _instance
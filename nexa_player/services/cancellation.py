@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import logging
+import subprocess
+import threading
+from typing import Iterator, Optional, Sequence
+
+from PySide6.QtCore import QThread, QTimer
+
+from .background import background_popen_kwargs
+
+log = logging.getLogger(__name__)
+
+# How long a retired worker may keep running before it is reported, and how
+# long shutdown waits for stragglers.
+RETIRE_DEADLINE_MS = 5000
+SHUTDOWN_WAIT_MS = 1500
+
+
+class CancelToken:
+    """
+    Cooperative cancellation flag shared between the GUI and a worker.
+    Subprocesses started through ``run`` are killed the moment the token
+    is cancelled, so an in-flight ffmpeg decode never has to be waited out.
+    Tokens of ``background`` jobs start their subprocesses at idle priority.
+    """
+
+    def __init__(self, background: bool = False) -> None:
+        self.background = background
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._procs: set[subprocess.Popen] = set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        self._event.set()
+        with self._lock:
+            procs = list(self._procs)
+        for proc in procs:
+            try:
+                proc.kill()
+            except OSError:
+                pass
+
+    def wait(self, timeout: float) -> bool:
+        """Sleep up to ``timeout`` seconds; True if cancelled meanwhile."""
+        return self._event.wait(timeout)
+
+    def run(self, args: Sequence[str], **kwargs) -> Optional[subprocess.CompletedProcess]:
+        """
+        ``subprocess.run`` that returns None instead of a result when the
+        token is (or gets) cancelled. ``stdout``/``stderr`` default to
+        DEVNULL; pass ``subprocess.PIPE`` to capture.
+        """
+        if self.cancelled:
+            return None
+        kwargs.setdefault("stdout", subprocess.DEVNULL)
+        proc = self._popen(args, kwargs)
+        try:
+            if self.cancelled:
+                proc.kill()
+            stdout, stderr = proc.communicate()
+        finally:
+            with self._lock:
+                self._procs.discard(proc)
+        if self.cancelled:
+            return None
+        return subprocess.CompletedProcess(args, proc.returncode, stdout, stderr)
+
+    def stream(self, args: Sequence[str], chunk_size: int, **kwargs) -> Iterator[bytes]:
+        """
+        Run ``args`` and yield its stdout in ``chunk_size`` pieces (the last
+        may be shorter). Ends early once the token is cancelled; the process
+        is killed if the caller stops iterating before it exits.
+        """
+        if self.cancelled:
+            return
+        kwargs["stdout"] = subprocess.PIPE
+        proc = self._popen(args, kwargs)
+        try:
+            if self.cancelled:
+                proc.kill()
+            while not self.cancelled:
+                data = proc.stdout.read(chunk_size)
+                if not data:
+                    break
+                yield data
+        finally:
+            if proc.poll() is None:
+                proc.kill()
+            proc.stdout.close()
+            proc.wait()
+            with self._lock:
+                self._procs.discard(proc)
+
+    def _popen(self, args: Sequence[str], kwargs: dict) -> subprocess.Popen:
+        kwargs.setdefault("stdin", subprocess.DEVNULL)
+        kwargs.setdefault("stderr", subprocess.DEVNULL)
+        if self.background:
+            for key, value in background_popen_kwargs().items():
+                kwargs[key] = kwargs.get(key, 0) | value
+        proc = subprocess.Popen(args, **kwargs)
+        with self._lock:
+            self._procs.add(proc)
+        return proc
+
+
+_retired: set[QThread] = set()
+
+
+def retire_worker(worker: Optional[QThread], deadline_ms: int = RETIRE_DEADLINE_MS) -> None:
+    """
+    Cancel ``worker`` without blocking the caller. A reference is kept until
+    the thread finishes so Qt never destroys a running QThread; workers that
+    outlive ``deadline_ms`` are logged.
+    """
+    if worker is None:
+        return
+    worker.cancel()
+    if not worker.isRunning():
+        return
+    _retired.add(worker)
+    worker.finished.connect(lambda w=worker: _retired.discard(w))
+
+    def _check():
+        if worker in _retired and worker.isRunning():
+            log.warning("%s still running %sms after cancellation", type(worker).__name__, deadline_ms)
+
+    QTimer.singleShot(deadline_ms, _check)
+
+
+def drain_retired(timeout_ms: int = SHUTDOWN_WAIT_MS) -> None:
+    """Give retired workers a bounded chance to exit (used on shutdown)."""
+    for worker in list(_retired):
+        if not worker.wait(timeout_ms):
+            log.warning("%s did not stop before shutdown", type(worker).__name__)
+    _retired.clear()
@@ -0,0 +1,386 @@
+from __future__ import annotations
+
+import functools
+import logging
+import os
+import struct
+from typing import BinaryIO, Iterator, Optional
+
+from .probe import MediaInfo
+
+log = logging.getLogger(__name__)
+
+MP4_EXTENSIONS = {".mp4", ".m4v", ".mov", ".3gp"}
+MKV_EXTENSIONS = {".mkv", ".webm", ".mka"}
+
+# Upper bound for any single payload read into memory.
+MAX_PAYLOAD = 1 << 20
+
+_MP4_CODECS = {
+    "avc1": "h264", "avc3": "h264", "hvc1": "hevc", "hev1": "hevc", "av01": "av1",
+    "vp08": "vp8", "vp09": "vp9", "mp4v": "mpeg4", "jpeg": "mjpeg", "apcn": "prores",
+    "mp4a": "aac", "ac-3": "ac3", "ec-3": "eac3", "Opus": "opus", "fLaC": "flac",
+    ".mp3": "mp3", "tx3g": "mov_text", "wvtt": "webvtt", "c608": "eia_608",
+}
+_MP4_VISUAL = {"vide"}
+_MP4_AUDIO = {"soun"}
+_MP4_SUBTITLE = {"subt", "text", "sbtl", "clcp"}
+
+_MKV_CODECS = {
+    "V_MPEG4/ISO/AVC": "h264", "V_MPEGH/ISO/HEVC": "hevc", "V_AV1": "av1", "V_VP8": "vp8",
+    "V_VP9": "vp9", "V_MPEG4/ISO/ASP": "mpeg4", "V_MPEG2": "mpeg2video", "V_MJPEG": "mjpeg",
+    "V_THEORA": "theora", "A_OPUS": "opus", "A_VORBIS": "vorbis", "A_AC3": "ac3",
+    "A_EAC3": "eac3", "A_DTS": "dts", "A_FLAC": "flac", "A_MPEG/L3": "mp3",
+    "S_TEXT/UTF8": "subrip", "S_TEXT/ASS": "ass", "S_TEXT/SSA": "ssa",
+    "S_TEXT/WEBVTT": "webvtt", "S_HDMV/PGS": "hdmv_pgs_subtitle", "S_VOBSUB": "dvd_subtitle",
+}
+
+# Matroska element IDs (with their length-marker bits, as written).
+EBML_HEADER = 0x1A45DFA3
+SEGMENT = 0x18538067
+SEEK_HEAD = 0x114D9B74
+SEEK = 0x4DBB
+SEEK_ID = 0x53AB
+SEEK_POSITION = 0x53AC
+INFO = 0x1549A966
+TIMECODE_SCALE = 0x2AD7B1
+DURATION = 0x4489
+TRACKS = 0x1654AE6B
+TRACK_ENTRY = 0xAE
+TRACK_TYPE = 0x83
+CODEC_ID = 0x86
+LANGUAGE = 0x22B59C
+LANGUAGE_BCP47 = 0x22B59D
+DEFAULT_DURATION = 0x23E383
+VIDEO = 0xE0
+PIXEL_WIDTH = 0xB0
+PIXEL_HEIGHT = 0xBA
+CLUSTER = 0x1F43B675
+CUES = 0x1C53BB6B
+
+
+def probe_container(path: str) -> Optional[MediaInfo]:
+    """
+    Read duration, geometry and codecs of an MP4/MOV or Matroska/WebM file
+    from its headers alone: only box/element headers and a few small
+    payloads are read, so the cost does not grow with the file. Returns
+    None for other formats or anything unusual (fragmented MP4, live MKV),
+    leaving those to ffprobe/OpenCV.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in MP4_EXTENSIONS and ext not in MKV_EXTENSIONS:
+        return None
+    try:
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if ext in MP4_EXTENSIONS:
+                return _probe_mp4(f, size, path)
+            return _probe_mkv(f, size, path)
+    except (OSError, struct.error, ValueError, UnicodeDecodeError):
+        log.debug("Header probe failed for %s", path, exc_info=True)
+        return None
+
+
+def cached_container_info(path: str) -> Optional[MediaInfo]:
+    """``probe_container`` memoized per file version (size and mtime)."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return _cached_probe(path, st.st_size, st.st_mtime_ns)
+
+
+@functools.lru_cache(maxsize=256)
+def _cached_probe(path: str, size: int, mtime_ns: int) -> Optional[MediaInfo]:
+    return probe_container(path)
+
+
+# --- ISO BMFF ----------------------------------------------------------------
+
+
+def mp4_boxes(f: BinaryIO, start: int, end: int) -> Iterator[tuple[str, int, int]]:
+    """Yield (type, payload_start, payload_end) of the boxes in [start, end)."""
+    pos = start
+    while pos + 8 <= end:
+        f.seek(pos)
+        header = f.read(8)
+        if len(header) < 8:
+            return
+        size, kind = struct.unpack(">I4s", header)
+        payload = pos + 8
+        if size == 1:
+            size = struct.unpack(">Q", f.read(8))[0]
+            payload += 8
+        elif size == 0:
+            size = end - pos
+        if size < payload - pos or pos + size > end:
+            return
+        yield kind.decode("latin-1"), payload, pos + size
+        pos += size
+
+
+def mp4_child(f: BinaryIO, start: int, end: int, *path: str) -> Optional[tuple[int, int]]:
+    """Payload range of the first box found by descending through ``path``."""
+    for name in path:
+        for kind, payload, box_end in mp4_boxes(f, start, end):
+            if kind == name:
+                start, end = payload, box_end
+                break
+        else:
+            return None
+    return start, end
+
+
+def read_payload(f: BinaryIO, span: tuple[int, int], limit: int = MAX_PAYLOAD) -> bytes:
+    start, end = span
+    if end - start > limit:
+        raise ValueError("box too large to read")
+    f.seek(start)
+    return f.read(end - start)
+
+
+def _mp4_language(code: int) -> str:
+    if not code or code == 0x7FFF:
+        return ""
+    lang = "".join(chr(((code >> shift) & 0x1F) + 0x60) for shift in (10, 5, 0))
+    return "" if lang == "und" else lang
+
+
+def _full_box_times(data: bytes) -> tuple[int, int, int]:
+    """(timescale, duration, offset after duration) of an mvhd/mdhd payload."""
+    if data[0] == 1:
+        timescale, duration = struct.unpack_from(">IQ", data, 20)
+        return timescale, duration, 32
+    timescale, duration = struct.unpack_from(">II", data, 12)
+    return timescale, duration, 20
+
+
+def _probe_mp4(f: BinaryIO, size: int, path: str) -> Optional[MediaInfo]:
+    moov = mp4_child(f, 0, size, "moov")
+    if moov is None:
+        return None
+    mvhd = mp4_child(f, *moov, "mvhd")
+    if mvhd is None:
+        return None
+    timescale, duration, _ = _full_box_times(read_payload(f, mvhd))
+    if not timescale or not duration or duration == 0xFFFFFFFF:
+        return None  # fragmented or live: leave it to ffprobe
+    info = MediaInfo(path, duration_ms=duration * 1000 // timescale)
+
+    for kind, payload, end in mp4_boxes(f, *moov):
+        if kind != "trak":
+            continue
+        hdlr = mp4_child(f, payload, end, "mdia", "hdlr")
+        mdhd = mp4_child(f, payload, end, "mdia", "mdhd")
+        stbl = mp4_child(f, payload, end, "mdia", "minf", "stbl")
+        if hdlr is None or mdhd is None or stbl is None:
+            continue
+        handler = read_payload(f, hdlr)[8:12].decode("latin-1")
+        mdhd_data = read_payload(f, mdhd)
+        media_scale, media_duration, offset = _full_box_times(mdhd_data)
+        language = _mp4_language(struct.unpack_from(">H", mdhd_data, offset)[0])
+        stsd = mp4_child(f, *stbl, "stsd")
+        entry = read_payload(f, (stsd[0], min(stsd[1], stsd[0] + 64))) if stsd else b""
+        fourcc = entry[12:16].decode("latin-1") if len(entry) >= 16 else ""
+        codec = _MP4_CODECS.get(fourcc, fourcc.strip().lower())
+        label = f"{codec} ({language})" if language else codec
+
+        if handler in _MP4_VISUAL and not info.video_codec:
+            info.video_codec = codec
+            if len(entry) >= 16 + 28:
+                # VisualSampleEntry: 6 reserved, 2 index, 16 pre-defined, w, h.
+                info.width, info.height = struct.unpack_from(">HH", entry, 16 + 24)
+            if not info.width:
+                tkhd = mp4_child(f, payload, end, "tkhd")
+                if tkhd is not None:
+                    data = read_payload(f, tkhd)
+                    w, h = struct.unpack_from(">II", data, len(data) - 8)
+                    info.width, info.height = w >> 16, h >> 16
+            stsz = mp4_child(f, *stbl, "stsz")
+            if stsz is not None and media_scale and media_duration:
+                # Average rate from the sample count, exact for VFR files too.
+                samples = struct.unpack_from(">I", read_payload(f, (stsz[0], stsz[0] + 12)), 8)[0]
+                info.fps = samples * media_scale / media_duration
+        elif handler in _MP4_AUDIO:
+            info.audio_tracks.append(label)
+        elif handler in _MP4_SUBTITLE:
+            info.subtitle_tracks.append(label)
+    return info
+
+
+# --- Matroska ----------------------------------------------------------------
+
+
+def read_vint(f: BinaryIO, keep_marker: bool) -> tuple[int, int]:
+    """(value, length) of an EBML variable-size integer; -1 for "unknown"."""
+    first = f.read(1)
+    if not first:
+        raise ValueError("unexpected end of file")
+    byte = first[0]
+    length = 1
+    mask = 0x80
+    while length <= 8 and not byte & mask:
+        mask >>= 1
+        length += 1
+    if length > 8:
+        raise ValueError("invalid EBML vint")
+    value = byte if keep_marker else byte & (mask - 1)
+    all_ones = (byte & (mask - 1)) == mask - 1
+    for b in f.read(length - 1):
+        value = (value << 8) | b
+        all_ones = all_ones and b == 0xFF
+    if not keep_marker and all_ones:
+        return -1, length
+    return value, length
+
+
+def ebml_elements(f: BinaryIO, start: int, end: int) -> Iterator[tuple[int, int, int]]:
+    """Yield (id, payload_start, payload_end) of the elements in [start, end)."""
+    pos = start
+    while pos < end:
+        f.seek(pos)
+        element_id, id_len = read_vint(f, keep_marker=True)
+        size, size_len = read_vint(f, keep_marker=False)
+        payload = pos + id_len + size_len
+        if size < 0:
+            # Unknown size (live streams): the element runs to ``end``.
+            yield element_id, payload, end
+            return
+        yield element_id, payload, min(payload + size, end)
+        pos = payload + size
+
+
+def _uint(data: bytes) -> int:
+    return int.from_bytes(data, "big")
+
+
+def _float(data: bytes) -> float:
+    if len(data) == 4:
+        return struct.unpack(">f", data)[0]
+    if len(data) == 8:
+        return struct.unpack(">d", data)[0]
+    return 0.0
+
+
+def mkv_segment(f: BinaryIO, size: int) -> Optional[tuple[int, int]]:
+    header = next(ebml_elements(f, 0, size), None)
+    if header is None or header[0] != EBML_HEADER:
+        return None
+    for element_id, payload, end in ebml_elements(f, header[2], size):
+        if element_id == SEGMENT:
+            return payload, end
+    return None
+
+
+def mkv_top_level(f: BinaryIO, segment: tuple[int, int], wanted: set[int]) -> dict[int, tuple[int, int]]:
+    """
+    Locate top-level elements of ``wanted`` without walking the clusters:
+    scan until the first Cluster, then follow the SeekHead for the rest.
+    """
+    found: dict[int, tuple[int, int]] = {}
+    seeks: dict[int, int] = {}
+    for element_id, payload, end in ebml_elements(f, *segment):
+        if element_id == CLUSTER:
+            break
+        if element_id in wanted and element_id not in found:
+            found[element_id] = (payload, end)
+        if element_id == SEEK_HEAD:
+            seeks.update(_seek_head(f, payload, end))
+        if wanted.issubset(found):
+            return found
+    for element_id in wanted - found.keys():
+        pos = seeks.get(element_id)
+        if pos is None:
+            continue
+        element = next(ebml_elements(f, segment[0] + pos, segment[1]), None)
+        if element is not None and element[0] == element_id:
+            found[element_id] = element[1:]
+    return found
+
+
+def _seek_head(f: BinaryIO, start: int, end: int) -> dict[int, int]:
+    seeks = {}
+    for element_id, payload, seek_end in ebml_elements(f, start, end):
+        if element_id != SEEK:
+            continue
+        target = position = None
+        for child, child_start, child_end in ebml_elements(f, payload, seek_end):
+            data = read_payload(f, (child_start, child_end))
+            if child == SEEK_ID:
+                target = _uint(data)
+            elif child == SEEK_POSITION:
+                position = _uint(data)
+        if target is not None and position is not None:
+            seeks[target] = position
+    return seeks
+
+
+def mkv_timecode_scale(f: BinaryIO, info: tuple[int, int]) -> tuple[int, float]:
+    """(TimecodeScale in ns, Duration in ticks) from an Info element."""
+    scale, duration = 1_000_000, 0.0
+    for element_id, payload, end in ebml_elements(f, *info):
+        if element_id == TIMECODE_SCALE:
+            scale = _uint(read_payload(f, (payload, end))) or scale
+        elif element_id == DURATION:
+            duration = _float(read_payload(f, (payload, end)))
+    return scale, duration
+
+
+def _probe_mkv(f: BinaryIO, size: int, path: str) -> Optional[MediaInfo]:
+    segment = mkv_segment(f, size)
+    if segment is None:
+        return None
+    elements = mkv_top_level(f, segment, {INFO, TRACKS})
+    if INFO not in elements:
+        return None
+    scale, duration = mkv_timecode_scale(f, elements[INFO])
+    if duration <= 0:
+        return None
+    info = MediaInfo(path, duration_ms=int(duration * scale / 1_000_000))
+
+    for element_id, payload, end in ebml_elements(f, *elements.get(TRACKS, (0, 0))):
+        if element_id != TRACK_ENTRY:
+            continue
+        track_type, codec_id, language, frame_ns = 0, "", "eng", 0
+        width = height = 0
+        for child, child_start, child_end in ebml_elements(f, payload, end):
+            if child == VIDEO:
+                for sub, sub_start, sub_end in ebml_elements(f, child_start, child_end):
+                    if sub == PIXEL_WIDTH:
+                        width = _uint(read_payload(f, (sub_start, sub_end)))
+                    elif sub == PIXEL_HEIGHT:
+                        height = _uint(read_payload(f, (sub_start, sub_end)))
+                continue
+            if child not in (TRACK_TYPE, CODEC_ID, LANGUAGE, LANGUAGE_BCP47, DEFAULT_DURATION):
+                continue
+            data = read_payload(f, (child_start, child_end))
+            if child == TRACK_TYPE:
+                track_type = _uint(data)
+            elif child == CODEC_ID:
+                codec_id = data.rstrip(b"\0").decode("ascii")
+            elif child in (LANGUAGE, LANGUAGE_BCP47):
+                language = data.rstrip(b"\0").decode("ascii")
+            elif child == DEFAULT_DURATION:
+                frame_ns = _uint(data)
+        codec = _mkv_codec(codec_id)
+        label = codec if language in ("", "und") else f"{codec} ({language})"
+        if track_type == 1 and not info.video_codec:
+            info.video_codec = codec
+            info.width, info.height = width, height
+            if frame_ns:
+                info.fps = 1e9 / frame_ns
+        elif track_type == 2:
+            info.audio_tracks.append(label)
+        elif track_type == 17:
+            info.subtitle_tracks.append(label)
+    return info
+
+
+def _mkv_codec(codec_id: str) -> str:
+    if codec_id in _MKV_CODECS:
+        return _MKV_CODECS[codec_id]
+    if codec_id.startswith("A_AAC"):
+        return "aac"
+    if codec_id.startswith("A_PCM"):
+        return "pcm"
+    return codec_id.split("/")[0][2:].lower() or "unknown"
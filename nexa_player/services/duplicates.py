@@ -0,0 +1,335 @@
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Optional
+
+from PySide6.QtCore import QThread, Qt, Signal
+from PySide6.QtGui import QImage
+
+from ..helpers import user_cache_dir
+from .backend_stats import FAILURE_TTL_S
+from .background import background_policy, lower_thread_priority
+from .cancellation import CancelToken
+from .fingerprint import content_fingerprint
+from .probe import PROBE_WORKERS, cached_probe
+from .thumbnails import (
+    EXTRACT_EXACT,
+    PREVIEW_HEIGHT,
+    PREVIEW_WIDTH,
+    VIDEO_EXTENSIONS,
+    get_frame_at,
+)
+
+log = logging.getLogger(__name__)
+
+DB_FILE = "media_hashes.sqlite3"
+# Frames hashed per file, evenly spaced and away from intros and credits.
+HASH_FRAMES = 4
+# dHash compares horizontally adjacent pixels of a 9x8 grey image: 64 bits.
+HASH_WIDTH = 8
+HASH_HEIGHT = 8
+FRAME_BITS = HASH_WIDTH * HASH_HEIGHT
+HASH_BITS = FRAME_BITS * HASH_FRAMES
+# The combined hash is indexed in this many equal pieces (see MultiIndex).
+INDEX_CHUNKS = 16
+# Files whose combined hashes differ in at most this many bits (about 8 per
+# frame) and whose durations agree are reported as copies of each other.
+MAX_DISTANCE = 2 * INDEX_CHUNKS - 1
+DURATION_TOLERANCE_MS = 2000
+BATCH_SIZE = 64
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS hashes (
+    fingerprint TEXT PRIMARY KEY,
+    hash BLOB,
+    duration_ms INTEGER NOT NULL,
+    stored REAL NOT NULL
+);
+"""
+
+
+def _popcount(value: int) -> int:
+    return bin(value).count("1")
+
+
+def dhash(image: QImage) -> int:
+    """64-bit difference hash of ``image``."""
+    import numpy as np  # local import to keep module import fast
+
+    grey = image.scaled(
+        HASH_WIDTH + 1, HASH_HEIGHT, Qt.IgnoreAspectRatio, Qt.SmoothTransformation
+    ).convertToFormat(QImage.Format_Grayscale8)
+    pixels = np.frombuffer(grey.constBits(), dtype=np.uint8, count=grey.sizeInBytes())
+    pixels = pixels.reshape(HASH_HEIGHT, grey.bytesPerLine())[:, : HASH_WIDTH + 1]
+    bits = pixels[:, 1:] > pixels[:, :-1]
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+@dataclass
+class HashedMedia:
+    path: str
+    size: int
+    duration_ms: int
+    value: int  # HASH_FRAMES dHashes, first frame in the top bits
+
+
+class MultiIndex:
+    """
+    Multi-index hash table for Hamming radius queries. Hashes are cut into
+    INDEX_CHUNKS pieces; two hashes at most ``2 * INDEX_CHUNKS - 1`` bits
+    apart differ in at most one bit in at least one piece, so a query only
+    looks up each piece and its single-bit neighbours instead of scanning
+    every entry.
+    """
+
+    def __init__(self) -> None:
+        self._bits = HASH_BITS // INDEX_CHUNKS
+        self._mask = (1 << self._bits) - 1
+        self._flips = (0, *(1 << bit for bit in range(self._bits)))
+        self._tables: list[dict[int, list[int]]] = [{} for _ in range(INDEX_CHUNKS)]
+        self._values: list[int] = []
+
+    def _chunks(self, value: int) -> Iterable[tuple[int, int]]:
+        for i in range(INDEX_CHUNKS):
+            yield i, (value >> (i * self._bits)) & self._mask
+
+    def add(self, value: int) -> int:
+        """Index ``value``; returns its position."""
+        position = len(self._values)
+        self._values.append(value)
+        for i, chunk in self._chunks(value):
+            self._tables[i].setdefault(chunk, []).append(position)
+        return position
+
+    def query(self, value: int, radius: int = MAX_DISTANCE) -> set[int]:
+        """Positions of indexed values within ``radius`` bits of ``value``."""
+        if radius > 2 * INDEX_CHUNKS - 1:
+            raise ValueError(f"radius {radius} too large for {INDEX_CHUNKS} index chunks")
+        candidates: set[int] = set()
+        for i, chunk in self._chunks(value):
+            get = self._tables[i].get
+            for flip in self._flips:
+                found = get(chunk ^ flip)
+                if found:
+                    candidates.update(found)
+        return {p for p in candidates if _popcount(self._values[p] ^ value) <= radius}
+
+
+def group_duplicates(media: list[HashedMedia], radius: int = MAX_DISTANCE) -> list[list[HashedMedia]]:
+    """Clusters of likely copies, largest first; singletons are dropped."""
+    parent = list(range(len(media)))
+
+    def root(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    # Each file is matched against the ones indexed before it, so every
+    # pair is looked at once.
+    index_table = MultiIndex()
+    for index, entry in enumerate(media):
+        for other in index_table.query(entry.value, radius):
+            if abs(media[other].duration_ms - entry.duration_ms) <= DURATION_TOLERANCE_MS:
+                parent[root(other)] = root(index)
+        index_table.add(entry.value)
+
+    groups: dict[int, list[HashedMedia]] = {}
+    for index, entry in enumerate(media):
+        groups.setdefault(root(index), []).append(entry)
+    clusters = [sorted(g, key=lambda m: m.path.lower()) for g in groups.values() if len(g) > 1]
+    clusters.sort(key=len, reverse=True)
+    return clusters
+
+
+class HashStore:
+    """
+    Perceptual hashes keyed by content fingerprint, so unchanged files are
+    never decoded again, even after a move. A NULL hash records a file that
+    could not be hashed; like backend failures it expires after
+    FAILURE_TTL_S, so a missing backend or transient error is retried.
+    Thread-safe; writes are batched.
+    """
+
+    def __init__(self, path: Optional[Path] = None) -> None:
+        self._path = path or user_cache_dir() / DB_FILE
+        self._lock = threading.Lock()
+        self._pending: list[tuple] = []
+        self._db: Optional[sqlite3.Connection] = None
+        try:
+            self._db = sqlite3.connect(str(self._path), check_same_thread=False)
+            self._db.executescript(_SCHEMA)
+        except sqlite3.Error:
+            log.exception("Media hash cache unavailable at %s", self._path)
+            self._db = None
+
+    def get(self, fingerprint: str) -> Optional[tuple[Optional[int], int]]:
+        """(hash or None, duration) if ``fingerprint`` was seen before."""
+        with self._lock:
+            if self._db is None:
+                return None
+            try:
+                row = self._db.execute(
+                    "SELECT hash, duration_ms, stored FROM hashes WHERE fingerprint = ?",
+                    (fingerprint,),
+                ).fetchone()
+            except sqlite3.Error:
+                log.exception("Media hash lookup failed")
+                return None
+        if row is None:
+            return None
+        if row[0] is None:
+            return None if time.time() - row[2] >= FAILURE_TTL_S else (None, row[1])
+        return int.from_bytes(row[0], "big"), row[1]
+
+    def put(self, fingerprint: str, value: Optional[int], duration_ms: int) -> None:
+        blob = value.to_bytes(HASH_BITS // 8, "big") if value is not None else None
+        with self._lock:
+            self._pending.append((fingerprint, blob, duration_ms, time.time()))
+            due = len(self._pending) >= BATCH_SIZE
+        if due:
+            self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            rows, self._pending = self._pending, []
+            if not rows or self._db is None:
+                return
+            try:
+                with self._db:
+                    self._db.executemany("INSERT OR REPLACE INTO hashes VALUES (?,?,?,?)", rows)
+            except sqlite3.Error:
+                log.exception("Failed to write %s media hash row(s)", len(rows))
+
+
+_instance: Optional[HashStore] = None
+_instance_lock = threading.Lock()
+
+
+def hash_store() -> HashStore:
+    global _instance
+    with _instance_lock:
+        if _instance is None:
+            _instance = HashStore()
+        return _instance
+
+
+def media_hash(path: str, token: CancelToken) -> Optional[tuple[int, int]]:
+    """
+    (combined hash, duration) of ``path``: from the hash store, otherwise by
+    grabbing HASH_FRAMES frames through the thumbnail backends. None if the
+    file cannot be hashed or ``token`` is cancelled.
+    """
+    fingerprint = content_fingerprint(path)
+    if fingerprint is None:
+        return None
+    store = hash_store()
+    known = store.get(fingerprint)
+    if known is not None:
+        value, duration_ms = known
+        return (value, duration_ms) if value is not None else None
+
+    info = cached_probe(path, token)
+    duration_ms = info.duration_ms if info is not None else 0
+    value = 0 if duration_ms > 0 else None
+    for i in range(1, HASH_FRAMES + 1):
+        if value is None or background_policy().checkpoint(token):
+            break
+        ms = duration_ms * i // (HASH_FRAMES + 1)
+        image = get_frame_at(path, ms, PREVIEW_WIDTH, PREVIEW_HEIGHT, EXTRACT_EXACT, token)
+        if image is None or image.isNull():
+            value = None
+        else:
+            value = (value << FRAME_BITS) | dhash(image)
+    if token.cancelled:
+        return None
+    store.put(fingerprint, value, duration_ms)
+    return (value, duration_ms) if value is not None else None
+
+
+def list_videos(folder: str) -> list[str]:
+    """Video files under ``folder``, recursively."""
+    found = []
+    for root, dirs, files in os.walk(folder):
+        dirs[:] = [d for d in dirs if not d.startswith(".")]
+        found += [
+            os.path.join(root, name)
+            for name in files
+            if os.path.splitext(name)[1].lower() in VIDEO_EXTENSIONS
+        ]
+    return sorted(found, key=str.lower)
+
+
+class DuplicateScanWorker(QThread):
+    """
+    Hashes every video under a folder (or an explicit list) at background
+    priority, ``max_workers`` files at a time, then groups near-identical
+    ones. Only files that are new or changed since the last scan are decoded.
+    """
+
+    progress = Signal(int, int)  # files done, total
+    groups_ready = Signal(object)  # list[list[HashedMedia]]
+
+    def __init__(
+        self,
+        folder: str = "",
+        paths: Optional[Iterable[str]] = None,
+        max_workers: int = PROBE_WORKERS,
+    ):
+        super().__init__()
+        self.folder = folder
+        self.paths = list(paths) if paths is not None else None
+        self.max_workers = max(1, max_workers)
+        self._token = CancelToken(background=True)
+
+    def cancel(self):
+        self._token.cancel()
+
+    def stop(self):
+        self.cancel()
+        self.wait()
+
+    def _hash(self, path: str) -> Optional[HashedMedia]:
+        if self._token.cancelled:
+            return None
+        try:
+            result = media_hash(path, self._token)
+            size = os.path.getsize(path)
+        except Exception:  # pylint: disable=broad-exception-caught
+            log.exception("Hashing %s failed", path)
+            return None
+        if result is None:
+            return None
+        return HashedMedia(path, size, result[1], result[0])
+
+    def run(self):
+        lower_thread_priority()
+        paths = self.paths if self.paths is not None else list_videos(self.folder)
+        media: list[HashedMedia] = []
+        executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="dhash",
+            initializer=lower_thread_priority,
+        )
+        try:
+            futures = [executor.submit(self._hash, path) for path in paths]
+            for done, future in enumerate(as_completed(futures), 1):
+                if self._token.cancelled:
+                    return
+                entry = future.result()
+                if entry is not None:
+                    media.append(entry)
+                self.progress.emit(done, len(paths))
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+            hash_store().flush()
+        groups = group_duplicates(media)
+        log.debug("%s duplicate group(s) among %s hashed files", len(groups), len(media))
+        self.groups_ready.emit(groups)
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import mmap
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+log = logging.getLogger(__name__)
+
+# Size plus a handful of blocks spread over the file tells media files
+# apart in practice (container headers, index and payload all differ) while
+# touching only a few pages, so it is cheap enough for every open.
+SAMPLE_BLOCKS = 5
+BLOCK_SIZE = 64 << 10
+MEMORY_ENTRIES = 4096
+
+
+def _sample_digest(path: str, size: int) -> str:
+    digest = hashlib.sha1(size.to_bytes(8, "little"))
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            if size <= SAMPLE_BLOCKS * BLOCK_SIZE:
+                digest.update(view)
+            else:
+                last = size - BLOCK_SIZE
+                for i in range(SAMPLE_BLOCKS):
+                    offset = last * i // (SAMPLE_BLOCKS - 1)
+                    digest.update(view[offset:offset + BLOCK_SIZE])
+    return digest.hexdigest()[:24]
+
+
+_memory: OrderedDict[tuple[str, int, int], str] = OrderedDict()
+_memory_lock = threading.Lock()
+
+
+def content_fingerprint(path: str) -> Optional[str]:
+    """
+    Location-independent identity of a file's content: its size and a hash
+    of a few sampled blocks. Survives moves and renames; memoized by
+    (path, size, mtime). None for missing, empty or unreadable files.
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    if not st.st_size:
+        return None
+    key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    with _memory_lock:
+        fingerprint = _memory.get(key)
+        if fingerprint is not None:
+            _memory.move_to_end(key)
+            return fingerprint
+    try:
+        fingerprint = f"{st.st_size:x}-{_sample_digest(path, st.st_size)}"
+    except (OSError, ValueError):
+        log.debug("Could not fingerprint %s", path, exc_info=True)
+        return None
+    with _memory_lock:
+        _memory[key] = fingerprint
+        while len(_memory) > MEMORY_ENTRIES:
+            _memory.popitem(last=False)
+    return fingerprint
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from PySide6.QtGui import QImage
+
+from ..helpers import file_cache_key
+
+# Default in-memory budget shared by every view (grid, playlist, timeline).
+DEFAULT_BUDGET_BYTES = 64 * 1024 * 1024
+
+ImageKey = tuple[str, int, int, int]
+
+
+def media_identity(path: str) -> str:
+    """Cache identity of a media file; changes when the file is modified."""
+    return file_cache_key(path) or os.path.normcase(os.path.abspath(path))
+
+
+def image_key(path: str, time_ms: int, width: int, height: int) -> ImageKey:
+    return (media_identity(path), int(time_ms), int(width), int(height))
+
+
+class ImageCache:
+    """
+    App-wide LRU of decoded frames keyed by (media identity, time, width,
+    height), bounded by a byte budget rather than an entry count. Holds
+    QImages so worker threads may read and write it; views convert to
+    pixmaps themselves. Thread-safe.
+    """
+
+    def __init__(self, budget_bytes: int = DEFAULT_BUDGET_BYTES) -> None:
+        self.budget_bytes = budget_bytes
+        self._lock = threading.Lock()
+        self._images: OrderedDict[ImageKey, QImage] = OrderedDict()
+        # (identity, width, height) -> times, so a view can restore every
+        # cached frame of one file without probing time by time.
+        self._times: dict[tuple[str, int, int], set[int]] = {}
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key: ImageKey) -> Optional[QImage]:
+        with self._lock:
+            image = self._images.get(key)
+            if image is None:
+                self._misses += 1
+                return None
+            self._images.move_to_end(key)
+            self._hits += 1
+            return image
+
+    def put(self, key: ImageKey, image: QImage) -> None:
+        if image is None or image.isNull():
+            return
+        size = image.sizeInBytes()
+        if size > self.budget_bytes:
+            return
+        with self._lock:
+            old = self._images.pop(key, None)
+            if old is not None:
+                self._bytes -= old.sizeInBytes()
+            self._images[key] = image
+            self._bytes += size
+            self._times.setdefault((key[0], key[2], key[3]), set()).add(key[1])
+            while self._bytes > self.budget_bytes:
+                self._evict_oldest()
+
+    def frames(self, identity: str, width: int, height: int) -> list[tuple[int, QImage]]:
+        """Every cached frame of one file at one size, by time (no hit/miss counted)."""
+        with self._lock:
+            times = sorted(self._times.get((identity, width, height), ()))
+            frames = []
+            for time_ms in times:
+                key = (identity, time_ms, width, height)
+                self._images.move_to_end(key)
+                frames.append((time_ms, self._images[key]))
+            return frames
+
+    def clear(self) -> None:
+        with self._lock:
+            self._images.clear()
+            self._times.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._images),
+                "bytes": self._bytes,
+                "budget_bytes": self.budget_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+            }
+
+    def _evict_oldest(self) -> None:
+        key, image = self._images.popitem(last=False)
+        self._bytes -= image.sizeInBytes()
+        self._evictions += 1
+        bucket = (key[0], key[2], key[3])
+        times = self._times.get(bucket)
+        if times is not None:
+            times.discard(key[1])
+            if not times:
+                del self._times[bucket]
+
+
+_instance: Optional[ImageCache] = None
+_instance_lock = threading.Lock()
+
+
+def image_cache() -> ImageCache:
+    global _instance
+    with _instance_lock:
+        if _instance is None:
+            _instance = ImageCache()
+        return _instance
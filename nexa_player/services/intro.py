@@ -0,0 +1,325 @@
+from __future__ import annotations
+
+import logging
+import os
+import shutil
+import subprocess
+import threading
+from array import array
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Optional
+
+from PySide6.QtCore import QThread, Signal
+
+from ..helpers import file_cache_key, user_cache_dir
+from .background import lower_thread_priority
+from .cancellation import CancelToken
+from .fingerprint import content_fingerprint
+from .thumbnails import default_worker_count
+
+log = logging.getLogger(__name__)
+
+FINGERPRINT_SUFFIX = ".afp.npy"
+# Versioned: spans found by an older matcher are recomputed.
+INTRO_SUFFIX = ".intro2"
+# Only the start of each episode is fingerprinted, as low-rate mono PCM.
+SCAN_SECONDS = 300
+SAMPLE_RATE = 8000
+FFT_SIZE = 1024
+HOP = 512
+HOP_MS = HOP * 1000 / SAMPLE_RATE
+# Spectral peaks are the loudest bin per band and frame (bins of ~7.8 Hz).
+BAND_EDGES = (10, 20, 40, 80, 160, 320, 512)
+# Each peak is paired with the next PAIR_SPAN peaks at most FAN_FRAMES ahead;
+# a hash packs both frequencies and their distance in frames.
+PAIR_SPAN = 12
+FAN_FRAMES = 32
+# Hashes this frequent in one file (silence, hum) say nothing and are skipped.
+MAX_HASH_REPEAT = 8
+# A shared segment needs this many aligned hashes, no gap longer than
+# MAX_GAP_MS between dense stretches and a plausible length to count as an
+# intro. A stretch is dense when a DENSITY_WINDOW_MS window around it holds
+# at least DENSE_FRACTION of the best window's hits (and MIN_HITS_PER_S):
+# shared audio matches hundreds of hashes a second, chance matches a few.
+MIN_MATCHES = 40
+MAX_GAP_MS = 3000
+DENSITY_WINDOW_MS = 1000
+DENSE_FRACTION = 0.2
+MIN_HITS_PER_S = 20
+MIN_INTRO_MS = 15000
+MAX_INTRO_MS = 180000
+# Every episode is compared with this many playlist neighbours on each side.
+NEIGHBOURS = 3
+
+
+def _cache_file(path: str, suffix: str) -> Optional[Path]:
+    key = content_fingerprint(path) or file_cache_key(path)
+    return user_cache_dir("intro") / (key + suffix) if key else None
+
+
+def load_intro(path: str) -> Optional[tuple[int, int]]:
+    """Cached (start, end) of the intro of ``path`` in ms, if one was found."""
+    cache_file = _cache_file(path, INTRO_SUFFIX)
+    if cache_file is None:
+        return None
+    span = array("q")
+    try:
+        with open(cache_file, "rb") as f:
+            span.frombytes(f.read())
+    except (OSError, ValueError):
+        return None
+    return (span[0], span[1]) if len(span) == 2 else None
+
+
+def _write_cache(cache_file: Path, write: Callable) -> None:
+    # Written aside and renamed, so readers never see a partial file.
+    tmp = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp, "wb") as f:
+            write(f)
+        os.replace(tmp, cache_file)
+    except OSError:
+        log.exception("Failed to write intro cache %s", cache_file)
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+
+
+def _save_intro(path: str, start_ms: int, end_ms: int) -> None:
+    cache_file = _cache_file(path, INTRO_SUFFIX)
+    if cache_file is not None:
+        _write_cache(cache_file, array("q", (start_ms, end_ms)).tofile)
+
+
+def audio_fingerprint(path: str, token: CancelToken):
+    """
+    Spectral peak-pair hashes of the first SCAN_SECONDS of audio, as a
+    (hashes, frame times) pair of arrays, or None without decodable audio
+    or once ``token`` is cancelled (which also kills the decode).
+    """
+    import numpy as np  # local import to keep module import fast
+
+    args = [
+        "ffmpeg", "-v", "error", "-nostdin", "-t", str(SCAN_SECONDS), "-i", path,
+        "-vn", "-sn", "-dn", "-ac", "1", "-ar", str(SAMPLE_RATE), "-f", "s16le", "pipe:1",
+    ]
+    try:
+        result = token.run(args, stdout=subprocess.PIPE)
+    except OSError:
+        log.exception("Failed to spawn ffmpeg for %s", path)
+        return None
+    if result is None:
+        return None
+    return fingerprint_samples(
+        np.frombuffer(result.stdout[: len(result.stdout) // 2 * 2], dtype=np.int16)
+    )
+
+
+def fingerprint_samples(samples):
+    """Peak-pair hashes of mono SAMPLE_RATE int16 ``samples`` (see audio_fingerprint)."""
+    import numpy as np  # local import to keep module import fast
+
+    if len(samples) < FFT_SIZE:
+        return None
+
+    count = 1 + (len(samples) - FFT_SIZE) // HOP
+    frames = np.lib.stride_tricks.sliding_window_view(samples, FFT_SIZE)[::HOP][:count]
+    window = np.hanning(FFT_SIZE).astype(np.float32)
+    spectrum = np.log1p(np.abs(np.fft.rfft(frames.astype(np.float32) * window, axis=1)))
+
+    times, bins = [], []
+    for low, high in zip(BAND_EDGES, BAND_EDGES[1:]):
+        band = spectrum[:, low:high]
+        peak = band.argmax(axis=1)
+        level = band[np.arange(count), peak]
+        keep = np.flatnonzero(level > np.median(level))
+        times.append(keep)
+        bins.append(peak[keep] + low)
+    times = np.concatenate(times)
+    bins = np.concatenate(bins)
+    order = np.lexsort((bins, times))
+    times, bins = times[order], bins[order]
+
+    hashes, anchors = [], []
+    for step in range(1, PAIR_SPAN + 1):
+        dt = times[step:] - times[:-step]
+        ok = (dt > 0) & (dt <= FAN_FRAMES)
+        hashes.append(
+            (bins[:-step][ok].astype(np.uint32) << 16)
+            | (bins[step:][ok].astype(np.uint32) << 7)
+            | dt[ok].astype(np.uint32)
+        )
+        anchors.append(times[:-step][ok])
+    return np.concatenate(hashes), np.concatenate(anchors).astype(np.int64)
+
+
+def _dense_span(times) -> tuple[int, int]:
+    """
+    First and last frame of the longest dense stretch of aligned matches
+    at frame ``times``. Chance matches are sparse, so they neither start a
+    stretch nor bridge the gaps around it.
+    """
+    import numpy as np  # local import to keep module import fast
+
+    hits = np.bincount(times).astype(np.float32)
+    window = max(1, round(DENSITY_WINDOW_MS / HOP_MS))
+    per_second = 1000.0 / (window * HOP_MS)
+    density = np.convolve(hits, np.ones(window, dtype=np.float32), "same") * per_second
+    threshold = max(MIN_HITS_PER_S, DENSE_FRACTION * float(density.max()))
+    dense = np.flatnonzero(density >= threshold)
+    if len(dense) == 0:
+        return 0, 0
+    breaks = np.flatnonzero(np.diff(dense) > MAX_GAP_MS / HOP_MS)
+    starts = np.concatenate([[0], breaks + 1])
+    ends = np.concatenate([breaks, [len(dense) - 1]])
+    best = int(np.argmax(dense[ends] - dense[starts]))
+    # The window blurs the edges by half its width; trim them to the first
+    # and last frame that is dense on its own.
+    low = max(0, int(dense[starts[best]]) - window // 2)
+    high = int(dense[ends[best]]) + window // 2 + 1
+    frames = low + np.flatnonzero(hits[low:high] * window * per_second >= threshold)
+    if len(frames) == 0:
+        return 0, 0
+    return int(frames[0]), int(frames[-1])
+
+
+def match_intro(a, b) -> Optional[tuple[tuple[int, int], tuple[int, int], int]]:
+    """
+    The segment two fingerprints share: ((start, end) in a, (start, end)
+    in b, matching hashes), with times in ms, or None.
+    """
+    import numpy as np  # local import to keep module import fast
+
+    hashes_a, times_a = a
+    order = np.argsort(hashes_a, kind="stable")
+    hashes_a, times_a = hashes_a[order], times_a[order]
+    hashes_b, times_b = b
+    left = np.searchsorted(hashes_a, hashes_b, "left")
+    counts = np.searchsorted(hashes_a, hashes_b, "right") - left
+    counts[counts > MAX_HASH_REPEAT] = 0
+    total = int(counts.sum())
+    if total < MIN_MATCHES:
+        return None
+    index_b = np.repeat(np.arange(len(hashes_b)), counts)
+    index_a = np.repeat(left, counts) + np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    offsets = times_a[index_a] - times_b[index_b]
+
+    shifted = offsets - offsets.min()
+    votes = np.bincount(shifted)
+    # Neighbouring offsets absorb rounding of the frame grid.
+    smoothed = votes + np.concatenate([[0], votes[:-1]]) + np.concatenate([votes[1:], [0]])
+    best = int(np.argmax(smoothed))
+    if smoothed[best] < MIN_MATCHES:
+        return None
+    aligned = np.abs(shifted - best) <= 1
+    start_a, end_a = _dense_span(times_a[index_a[aligned]])
+    start_b, end_b = _dense_span(times_b[index_b[aligned]])
+    span_a = (int(start_a * HOP_MS), int(end_a * HOP_MS))
+    span_b = (int(start_b * HOP_MS), int(end_b * HOP_MS))
+    if not MIN_INTRO_MS <= span_a[1] - span_a[0] <= MAX_INTRO_MS:
+        return None
+    return span_a, span_b, int(aligned.sum())
+
+
+class IntroAnalysisWorker(QThread):
+    """
+    Finds the intro shared by the episodes of a playlist. Missing audio
+    fingerprints are computed by a pool of idle-priority threads (the
+    decoding happens in ffmpeg) and cached; matching is cheap and runs
+    here. Emits ``intro_found`` for every file whose intro was located.
+    """
+
+    intro_found = Signal(str, int, int)  # path, start ms, end ms
+
+    def __init__(self, paths: list[str], max_workers: Optional[int] = None):
+        super().__init__()
+        self.paths = list(dict.fromkeys(paths))
+        self.max_workers = max(1, max_workers or default_worker_count())
+        self._token = CancelToken(background=True)
+
+    def cancel(self):
+        self._token.cancel()
+
+    def stop(self):
+        self.cancel()
+        self.wait()
+
+    def _fingerprint(self, path: str):
+        if self._token.cancelled:
+            return None
+        try:
+            return audio_fingerprint(path, self._token)
+        except Exception:  # pylint: disable=broad-exception-caught
+            log.exception("Audio fingerprint of %s failed", path)
+            return None
+
+    def _fingerprints(self) -> dict:
+        import numpy as np  # local import to keep module import fast
+
+        prints, missing = {}, []
+        for path in self.paths:
+            cache_file = _cache_file(path, FINGERPRINT_SUFFIX)
+            stacked = None
+            if cache_file is not None and cache_file.exists():
+                try:
+                    stacked = np.load(cache_file)
+                except (OSError, ValueError, EOFError):
+                    # Empty or truncated: drop it so it is fingerprinted again.
+                    log.warning("Discarding damaged fingerprint cache %s", cache_file)
+                    try:
+                        cache_file.unlink()
+                    except OSError:
+                        pass
+            if stacked is not None:
+                prints[path] = (stacked[0].astype(np.uint32), stacked[1])
+            else:
+                missing.append(path)
+        if not missing or not shutil.which("ffmpeg"):
+            return prints
+
+        executor = ThreadPoolExecutor(
+            max_workers=min(self.max_workers, len(missing)),
+            thread_name_prefix="intro",
+            initializer=lower_thread_priority,
+        )
+        try:
+            futures = {executor.submit(self._fingerprint, path): path for path in missing}
+            for future in as_completed(futures):
+                if self._token.cancelled:
+                    break
+                path, result = futures[future], future.result()
+                if result is None:
+                    continue
+                prints[path] = result
+                cache_file = _cache_file(path, FINGERPRINT_SUFFIX)
+                if cache_file is not None:
+                    stacked = np.stack(result).astype(np.int64)
+                    _write_cache(cache_file, lambda f: np.save(f, stacked))
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        return prints
+
+    def run(self):
+        lower_thread_priority()
+        prints = self._fingerprints()
+        if self._token.cancelled:
+            return
+        ordered = [p for p in self.paths if p in prints]
+        best: dict[str, tuple[int, tuple[int, int]]] = {}
+        for i, path in enumerate(ordered):
+            for other in ordered[i + 1 : i + 1 + NEIGHBOURS]:
+                if self._token.cancelled:
+                    return
+                match = match_intro(prints[path], prints[other])
+                if match is None:
+                    continue
+                span, other_span, votes = match
+                for key, value in ((path, span), (other, other_span)):
+                    if votes > best.get(key, (0,))[0]:
+                        best[key] = (votes, value)
+        for path, (votes, (start_ms, end_ms)) in best.items():
+            log.debug("Intro of %s at %s-%sms (%s hashes)", path, start_ms, end_ms, votes)
+            _save_intro(path, start_ms, end_ms)
+            self.intro_found.emit(path, start_ms, end_ms)
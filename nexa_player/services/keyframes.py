@@ -0,0 +1,310 @@
+from __future__ import annotations
+
+import bisect
+import logging
+import os
+import struct
+import sys
+import threading
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+from PySide6.QtCore import QThread, Signal
+
+from ..helpers import file_cache_key, user_cache_dir
+from .background import lower_thread_priority
+from .container_probe import (
+    CUES,
+    INFO,
+    MKV_EXTENSIONS,
+    MP4_EXTENSIONS,
+    TRACK_TYPE,
+    TRACKS,
+    ebml_elements,
+    mkv_segment,
+    mkv_timecode_scale,
+    mkv_top_level,
+    mp4_boxes,
+    mp4_child,
+    read_payload,
+)
+from .fingerprint import content_fingerprint
+
+log = logging.getLogger(__name__)
+
+# Sample tables of long variable-frame-rate files can be large; they are
+# only read on a background thread.
+MAX_TABLE_BYTES = 64 << 20
+CACHE_SUFFIX = ".kf"
+MEMORY_ENTRIES = 64
+
+# Matroska elements only needed here.
+CUE_POINT = 0xBB
+CUE_TIME = 0xB3
+CUE_TRACK_POSITIONS = 0xB7
+CUE_TRACK = 0xF7
+TRACK_NUMBER = 0xD7
+
+
+class KeyframeIndex:
+    """Sorted keyframe timestamps (ms) of one file, stored as an ``array``."""
+
+    def __init__(self, times: array) -> None:
+        self.times = times
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def nearest(self, ms: int) -> int:
+        times = self.times
+        pos = bisect.bisect_left(times, ms)
+        if pos == 0:
+            return times[0]
+        if pos == len(times):
+            return times[-1]
+        before, after = times[pos - 1], times[pos]
+        return before if ms - before <= after - ms else after
+
+    def at_or_before(self, ms: int) -> int:
+        pos = bisect.bisect_right(self.times, ms)
+        return self.times[pos - 1] if pos else self.times[0]
+
+    def snap(self, ms: int, tolerance_ms: int) -> int:
+        """Nearest keyframe if it is within ``tolerance_ms``, else ``ms``."""
+        key = self.nearest(ms)
+        return key if abs(key - ms) <= tolerance_ms else ms
+
+
+def read_keyframes(path: str) -> Optional[array]:
+    """
+    Keyframe presentation times (ms) from the container's own index:
+    MP4/MOV ``stss`` mapped through ``stts``/``ctts`` and the edit list, or
+    Matroska ``Cues``. None when the format has no such table or every
+    frame is a keyframe (nothing to snap to).
+    """
+    ext = os.path.splitext(path)[1].lower()
+    try:
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if ext in MP4_EXTENSIONS:
+                return _mp4_keyframes(f, size)
+            if ext in MKV_EXTENSIONS:
+                return _mkv_keyframes(f, size)
+    except (OSError, struct.error, ValueError):
+        log.debug("Could not read keyframe table of %s", path, exc_info=True)
+    return None
+
+
+def _mp4_keyframes(f: BinaryIO, size: int) -> Optional[array]:
+    moov = mp4_child(f, 0, size, "moov")
+    if moov is None:
+        return None
+    for kind, payload, end in mp4_boxes(f, *moov):
+        if kind != "trak":
+            continue
+        hdlr = mp4_child(f, payload, end, "mdia", "hdlr")
+        if hdlr is None or read_payload(f, hdlr)[8:12] != b"vide":
+            continue
+        mdhd = mp4_child(f, payload, end, "mdia", "mdhd")
+        stbl = mp4_child(f, payload, end, "mdia", "minf", "stbl")
+        if mdhd is None or stbl is None:
+            return None
+        mdhd_data = read_payload(f, mdhd)
+        scale = struct.unpack_from(">I", mdhd_data, 20 if mdhd_data[0] == 1 else 12)[0]
+        stss = mp4_child(f, *stbl, "stss")
+        stts = mp4_child(f, *stbl, "stts")
+        if stss is None or stts is None or not scale:
+            return None  # no stss: every sample is a sync sample
+        sync = array("I", read_payload(f, stss, MAX_TABLE_BYTES)[8:])
+        if not sync:
+            return None
+        if sys.byteorder == "little":
+            sync.byteswap()
+        ctts = mp4_child(f, *stbl, "ctts")
+        times = _presentation_times(
+            sync,
+            _runs(read_payload(f, stts, MAX_TABLE_BYTES)),
+            _runs(read_payload(f, ctts, MAX_TABLE_BYTES)) if ctts else [],
+            _edit_shift(f, payload, end),
+        )
+        if not times:
+            return None
+        return array("q", ((t * 1000 + scale - 1) // scale for t in times))
+    return None
+
+
+def _runs(table: bytes) -> list[tuple[int, int]]:
+    """(count, value) runs of an stts/ctts payload."""
+    entries = min(struct.unpack_from(">I", table, 4)[0], (len(table) - 8) // 8)
+    # ctts version 1 offsets are signed.
+    fmt = ">Ii" if table[0] == 1 else ">II"
+    return [struct.unpack_from(fmt, table, 8 + 8 * i) for i in range(entries)]
+
+
+def _edit_shift(f: BinaryIO, start: int, end: int) -> int:
+    """Media time where presentation starts, from the first real edit."""
+    elst = mp4_child(f, start, end, "edts", "elst")
+    if elst is None:
+        return 0
+    data = read_payload(f, elst)
+    fmt, step = (">Qq", 20) if data[0] == 1 else (">Ii", 12)
+    for i in range(struct.unpack_from(">I", data, 4)[0]):
+        _, media_time = struct.unpack_from(fmt, data, 8 + step * i)
+        if media_time != -1:
+            return media_time
+    return 0
+
+
+def _presentation_times(
+    sync: array, stts: list[tuple[int, int]], ctts: list[tuple[int, int]], shift: int
+) -> list[int]:
+    """Presentation times (media timescale) of the 1-based ``sync`` samples."""
+
+    def walk(runs: list[tuple[int, int]], accumulate: bool) -> list[int]:
+        values, index, sample, base = [], 0, 1, 0
+        for count, value in runs:
+            run_end = sample + count
+            while index < len(sync) and sync[index] < run_end:
+                offset = (sync[index] - sample) * value if accumulate else value
+                values.append(base + offset)
+                index += 1
+            if accumulate:
+                base += count * value
+            sample = run_end
+        return values + [values[-1] if values else 0] * (len(sync) - len(values))
+
+    dts = walk(stts, accumulate=True)
+    offsets = walk(ctts, accumulate=False) if ctts else [0] * len(sync)
+    return sorted(max(0, d + o - shift) for d, o in zip(dts, offsets))
+
+
+def _mkv_keyframes(f: BinaryIO, size: int) -> Optional[array]:
+    segment = mkv_segment(f, size)
+    if segment is None:
+        return None
+    elements = mkv_top_level(f, segment, {INFO, TRACKS, CUES})
+    if CUES not in elements or INFO not in elements:
+        return None
+    scale, _ = mkv_timecode_scale(f, elements[INFO])
+    video_track = _mkv_video_track(f, elements.get(TRACKS))
+
+    times = array("q")
+    for element_id, payload, end in ebml_elements(f, *elements[CUES]):
+        if element_id != CUE_POINT:
+            continue
+        cue_time, tracks = None, set()
+        for child, child_start, child_end in ebml_elements(f, payload, end):
+            if child == CUE_TIME:
+                cue_time = int.from_bytes(read_payload(f, (child_start, child_end)), "big")
+            elif child == CUE_TRACK_POSITIONS:
+                for sub, sub_start, sub_end in ebml_elements(f, child_start, child_end):
+                    if sub == CUE_TRACK:
+                        tracks.add(int.from_bytes(read_payload(f, (sub_start, sub_end)), "big"))
+        if cue_time is not None and (video_track is None or video_track in tracks):
+            times.append(cue_time * scale // 1_000_000)
+    if not times:
+        return None
+    return array("q", sorted(set(times)))
+
+
+def _mkv_video_track(f: BinaryIO, tracks: Optional[tuple[int, int]]) -> Optional[int]:
+    if tracks is None:
+        return None
+    for element_id, payload, end in ebml_elements(f, *tracks):
+        number = kind = None
+        for child, child_start, child_end in ebml_elements(f, payload, end):
+            if child == TRACK_NUMBER:
+                number = int.from_bytes(read_payload(f, (child_start, child_end)), "big")
+            elif child == TRACK_TYPE:
+                kind = int.from_bytes(read_payload(f, (child_start, child_end)), "big")
+        if kind == 1:
+            return number
+    return None
+
+
+def _read_cache(cache_file: Path) -> Optional[array]:
+    try:
+        with open(cache_file, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    times = array("q")
+    if data and len(data) % times.itemsize == 0:
+        times.frombytes(data)
+        return times
+    # Empty or truncated: left behind by an interrupted write.
+    log.warning("Discarding damaged keyframe cache %s", cache_file)
+    try:
+        cache_file.unlink()
+    except OSError:
+        pass
+    return None
+
+
+def _write_cache(cache_file: Path, times: array) -> None:
+    # Written aside and renamed, so readers never see a partial file.
+    tmp = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp, "wb") as f:
+            times.tofile(f)
+        os.replace(tmp, cache_file)
+    except OSError:
+        log.exception("Failed to cache keyframe index at %s", cache_file)
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+
+
+_memory: OrderedDict[str, Optional[KeyframeIndex]] = OrderedDict()
+_memory_lock = threading.Lock()
+
+
+def keyframe_index(path: str) -> Optional[KeyframeIndex]:
+    """
+    The keyframe index of ``path``, from memory, the on-disk cache or the
+    container (in that order). The disk cache is keyed by content, so it
+    survives moves and renames. Blocking on a miss; call off the GUI thread.
+    """
+    key = file_cache_key(path)
+    if key is None:
+        return None
+    with _memory_lock:
+        if key in _memory:
+            _memory.move_to_end(key)
+            return _memory[key]
+    cache_file = user_cache_dir("keyframes") / ((content_fingerprint(path) or key) + CACHE_SUFFIX)
+    times = _read_cache(cache_file)
+    if times is None:
+        times = read_keyframes(path)
+        if times is not None:
+            _write_cache(cache_file, times)
+    index = KeyframeIndex(times) if times else None
+    with _memory_lock:
+        _memory[key] = index
+        while len(_memory) > MEMORY_ENTRIES:
+            _memory.popitem(last=False)
+    return index
+
+
+class KeyframeIndexWorker(QThread):
+    """Builds (or loads) one file's keyframe index at background priority."""
+
+    index_ready = Signal(str, object)  # path, KeyframeIndex
+
+    def __init__(self, video_path: str):
+        super().__init__()
+        self.video_path = video_path
+
+    def cancel(self):
+        # Reads are short and bounded; nothing to interrupt.
+        pass
+
+    def run(self):
+        lower_thread_priority()
+        index = keyframe_index(self.video_path)
+        if index is not None:
+            log.debug("%s keyframes indexed for %s", len(index), self.video_path)
+            self.index_ready.emit(self.video_path, index)
@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from ..helpers import user_cache_dir
+from .fingerprint import content_fingerprint
+from .probe import MediaInfo
+
+log = logging.getLogger(__name__)
+
+DB_FILE = "media_metadata.sqlite3"
+# Writes are buffered and committed in one transaction once this many are
+# pending, or by a timer FLUSH_INTERVAL_S after the first one was queued.
+BATCH_SIZE = 32
+FLUSH_INTERVAL_S = 2.0
+# Least recently probed rows beyond this are dropped on flush.
+MAX_ENTRIES = 20000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS media (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    duration_ms INTEGER NOT NULL,
+    width INTEGER NOT NULL,
+    height INTEGER NOT NULL,
+    fps REAL NOT NULL,
+    video_codec TEXT NOT NULL,
+    audio_tracks TEXT NOT NULL,
+    subtitle_tracks TEXT NOT NULL,
+    stored REAL NOT NULL,
+    fingerprint TEXT
+);
+CREATE INDEX IF NOT EXISTS media_stored ON media (stored);
+"""
+_FINGERPRINT_INDEX = "CREATE INDEX IF NOT EXISTS media_fingerprint ON media (fingerprint)"
+_COLUMNS = (
+    "path, size, mtime_ns, duration_ms, width, height, fps, video_codec, "
+    "audio_tracks, subtitle_tracks, stored, fingerprint"
+)
+
+
+def _file_stamp(path: str) -> Optional[tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+class MetadataStore:
+    """
+    Probed media metadata keyed by (path, size, mtime), so repeat opens
+    never read the media file itself. Lookups cost one ``stat``; a row whose
+    size or mtime no longer matches is treated as missing. Rows also carry
+    the content fingerprint, so a moved or renamed file is still found.
+    Thread-safe; writes are batched.
+    """
+
+    def __init__(self, path: Optional[Path] = None) -> None:
+        self._path = path or user_cache_dir() / DB_FILE
+        self._lock = threading.Lock()
+        self._pending: dict[str, tuple] = {}
+        self._timer: Optional[threading.Timer] = None
+        self._db: Optional[sqlite3.Connection] = None
+        try:
+            self._db = sqlite3.connect(str(self._path), check_same_thread=False)
+            self._db.executescript(_SCHEMA)
+            columns = {row[1] for row in self._db.execute("PRAGMA table_info(media)")}
+            if "fingerprint" not in columns:
+                self._db.execute("ALTER TABLE media ADD COLUMN fingerprint TEXT")
+            self._db.execute(_FINGERPRINT_INDEX)
+        except sqlite3.Error:
+            log.exception("Media metadata cache unavailable at %s", self._path)
+            self._db = None
+
+    def get(self, path: str) -> Optional[MediaInfo]:
+        stamp = _file_stamp(path)
+        if stamp is None:
+            return None
+        key = os.path.abspath(path)
+        with self._lock:
+            row = self._pending.get(key)
+            if row is None and self._db is not None:
+                try:
+                    row = self._db.execute(
+                        f"SELECT {_COLUMNS} FROM media WHERE path = ?", (key,)
+                    ).fetchone()
+                except sqlite3.Error:
+                    log.exception("Media metadata lookup failed for %s", path)
+                    return None
+        moved = row is None or (row[1], row[2]) != stamp
+        if moved:
+            row = self._find_moved(path, stamp[0])
+            if row is None:
+                return None
+        info = MediaInfo(
+            path,
+            duration_ms=row[3],
+            width=row[4],
+            height=row[5],
+            fps=row[6],
+            video_codec=row[7],
+            audio_tracks=json.loads(row[8]),
+            subtitle_tracks=json.loads(row[9]),
+        )
+        if moved:
+            self.put(info)
+        return info
+
+    def _find_moved(self, path: str, size: int) -> Optional[tuple]:
+        """Row stored under another path for the same content, if any."""
+        fingerprint = content_fingerprint(path)
+        if fingerprint is None:
+            return None
+        with self._lock:
+            if self._db is None:
+                return None
+            try:
+                row = self._db.execute(
+                    f"SELECT {_COLUMNS} FROM media WHERE fingerprint = ? AND size = ? LIMIT 1",
+                    (fingerprint, size),
+                ).fetchone()
+            except sqlite3.Error:
+                log.exception("Media metadata lookup failed for %s", path)
+                return None
+        if row is not None:
+            log.debug("Metadata of %s found under moved path %s", path, row[0])
+        return row
+
+    def put(self, info: MediaInfo) -> None:
+        stamp = _file_stamp(info.path)
+        if stamp is None:
+            return
+        key = os.path.abspath(info.path)
+        row = (
+            key,
+            *stamp,
+            info.duration_ms,
+            info.width,
+            info.height,
+            info.fps,
+            info.video_codec,
+            json.dumps(info.audio_tracks),
+            json.dumps(info.subtitle_tracks),
+            time.time(),
+            content_fingerprint(info.path),
+        )
+        with self._lock:
+            self._pending[key] = row
+            due = len(self._pending) >= BATCH_SIZE
+            if not due and self._timer is None:
+                self._timer = threading.Timer(FLUSH_INTERVAL_S, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if due:
+            self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._pending or self._db is None:
+                self._pending.clear()
+                return
+            rows = list(self._pending.values())
+            self._pending.clear()
+            try:
+                with self._db:
+                    self._db.executemany(
+                        f"INSERT OR REPLACE INTO media ({_COLUMNS}) VALUES ({','.join('?' * 12)})", rows
+                    )
+                    self._db.execute(
+                        "DELETE FROM media WHERE path IN (SELECT path FROM media "
+                        "ORDER BY stored DESC LIMIT -1 OFFSET ?)",
+                        (MAX_ENTRIES,),
+                    )
+            except sqlite3.Error:
+                log.exception("Failed to write %s media metadata row(s)", len(rows))
+
+    def close(self) -> None:
+        self.flush()
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+_instance: Optional[MetadataStore] = None
+_instance_lock = threading.Lock()
+
+
+def metadata_store() -> MetadataStore:
+    global _instance
+    with _instance_lock:
+        if _instance is None:
+            _instance = MetadataStore()
+        return _instance
@@ -0,0 +1,278 @@
+from __future__ import annotations
+
+import json
+import logging
+import shutil
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Optional
+
+from PySide6.QtCore import QThread, Signal
+
+from ..helpers import ms_to_minsec
+from .background import lower_thread_priority
+from .cancellation import CancelToken
+
+log = logging.getLogger(__name__)
+
+# Probes of a list run this many at a time: ffprobe processes and header
+# reads are mostly I/O bound, but an unbounded burst would swamp the disk.
+PROBE_WORKERS = 4
+
+
+@dataclass
+class MediaInfo:
+    path: str
+    duration_ms: int = 0
+    width: int = 0
+    height: int = 0
+    fps: float = 0.0
+    video_codec: str = ""
+    # One short description per track, e.g. "aac (eng)".
+    audio_tracks: list[str] = field(default_factory=list)
+    subtitle_tracks: list[str] = field(default_factory=list)
+
+    def summary(self) -> str:
+        """One line for tooltips, e.g. "12:34 · 1920x1080 · h264 · 2 audio"."""
+        parts = [ms_to_minsec(self.duration_ms)]
+        if self.width and self.height:
+            parts.append(f"{self.width}x{self.height}")
+        if self.video_codec:
+            parts.append(self.video_codec)
+        if self.audio_tracks:
+            parts.append(f"{len(self.audio_tracks)} audio")
+        if self.subtitle_tracks:
+            parts.append(f"{len(self.subtitle_tracks)} subtitles")
+        return " · ".join(parts)
+
+
+def probe_media(path: str, token: Optional[CancelToken] = None) -> Optional[MediaInfo]:
+    """
+    Read duration, video geometry and track list: from the container
+    headers for MP4/MOV/Matroska, otherwise via ffprobe and then OpenCV.
+    Blocking; returns None if cancelled or if nothing could open the file.
+    """
+    from .container_probe import probe_container  # it imports MediaInfo
+
+    info = probe_container(path)
+    if info is not None:
+        return info
+    token = token or CancelToken()
+    if shutil.which("ffprobe"):
+        info = _probe_ffprobe(path, token)
+        if info is not None or token.cancelled:
+            return info
+    return _probe_opencv(path)
+
+
+def cached_probe(path: str, token: Optional[CancelToken] = None) -> Optional[MediaInfo]:
+    """``probe_media`` through the persistent metadata store."""
+    from .metadata_store import metadata_store  # the store imports MediaInfo
+
+    store = metadata_store()
+    info = store.get(path)
+    if info is None:
+        info = probe_media(path, token)
+        if info is not None:
+            store.put(info)
+    return info
+
+
+def _track_label(stream: dict) -> str:
+    label = stream.get("codec_name", "unknown")
+    language = stream.get("tags", {}).get("language")
+    return f"{label} ({language})" if language else label
+
+
+def _frame_rate(value: str) -> float:
+    num, _, den = (value or "0/1").partition("/")
+    try:
+        return float(num) / float(den or 1)
+    except (ValueError, ZeroDivisionError):
+        return 0.0
+
+
+def _probe_ffprobe(path: str, token: CancelToken) -> Optional[MediaInfo]:
+    args = [
+        "ffprobe", "-v", "error", "-print_format", "json", "-show_format", "-show_streams", path,
+    ]
+    try:
+        result = token.run(args, stdout=subprocess.PIPE)
+    except OSError:
+        log.exception("Failed to spawn ffprobe for %s", path)
+        return None
+    if result is None or result.returncode != 0:
+        return None
+    try:
+        data = json.loads(result.stdout or b"{}")
+    except ValueError:
+        log.warning("Unparseable ffprobe output for %s", path)
+        return None
+
+    info = MediaInfo(path)
+    try:
+        info.duration_ms = int(float(data.get("format", {}).get("duration", 0)) * 1000)
+    except (TypeError, ValueError):
+        pass
+    for stream in data.get("streams", []):
+        kind = stream.get("codec_type")
+        if kind == "video" and not info.video_codec:
+            if stream.get("disposition", {}).get("attached_pic"):
+                continue  # cover art
+            info.video_codec = stream.get("codec_name", "")
+            info.width = int(stream.get("width") or 0)
+            info.height = int(stream.get("height") or 0)
+            info.fps = _frame_rate(stream.get("avg_frame_rate") or stream.get("r_frame_rate"))
+        elif kind == "audio":
+            info.audio_tracks.append(_track_label(stream))
+        elif kind == "subtitle":
+            info.subtitle_tracks.append(_track_label(stream))
+    return info
+
+
+def _probe_opencv(path: str) -> Optional[MediaInfo]:
+    import cv2  # local import to keep module import fast
+
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        return None
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    frame_count = cap.get(cv2.CAP_PROP_FRAME_COUNT)
+    info = MediaInfo(
+        path,
+        duration_ms=int((frame_count / fps) * 1000) if fps > 0 else 0,
+        width=int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+        height=int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        fps=fps if fps > 0 else 0.0,
+    )
+    cap.release()
+    return info
+
+
+class MediaProber(QThread):
+    """
+    Long-lived thread that probes opened files off the GUI thread. Like
+    ``FrameRequestWorker`` only the newest request matters: a new request
+    kills the ffprobe still running for the previous one.
+    """
+
+    probed = Signal(object)  # MediaInfo
+
+    def __init__(self):
+        super().__init__()
+        self._cond = threading.Condition()
+        self._request: Optional[str] = None
+        self._current: Optional[CancelToken] = None
+        self._running = True
+
+    def request(self, path: str) -> None:
+        with self._cond:
+            if self._current is not None:
+                self._current.cancel()
+            self._request = path
+            self._cond.notify()
+
+    def cancel(self) -> None:
+        with self._cond:
+            self._running = False
+            if self._current is not None:
+                self._current.cancel()
+            self._cond.notify()
+
+    def stop(self):
+        self.cancel()
+        self.wait()
+
+    def run(self):
+        while True:
+            with self._cond:
+                while self._running and self._request is None:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                path = self._request
+                self._request = None
+                token = self._current = CancelToken()
+            info = cached_probe(path, token)
+            with self._cond:
+                if token.cancelled or self._request is not None:
+                    continue
+            if info is None:
+                log.warning("Could not probe %s", path)
+                continue
+            log.debug(
+                "Probed %s: %sms %sx%s @%.3f fps", path, info.duration_ms, info.width, info.height, info.fps
+            )
+            self.probed.emit(info)
+
+
+class MetadataScanWorker(QThread):
+    """
+    Fills in metadata for a list of files (file browser, playlist) at
+    background priority. Files already in the metadata store cost a
+    ``stat`` and one lookup and are reported first; the rest are probed
+    ``max_workers`` at a time and reported as each finishes.
+    """
+
+    probed = Signal(object)  # MediaInfo
+
+    def __init__(self, paths: list[str], max_workers: int = PROBE_WORKERS):
+        super().__init__()
+        self.paths = list(paths)
+        self.max_workers = max(1, max_workers)
+        self._token = CancelToken(background=True)
+
+    def cancel(self):
+        self._token.cancel()
+
+    def stop(self):
+        self.cancel()
+        self.wait()
+
+    def run(self):
+        from .metadata_store import metadata_store  # the store imports MediaInfo
+
+        lower_thread_priority()
+        store = metadata_store()
+        missing = []
+        for path in self.paths:
+            if self._token.cancelled:
+                return
+            info = store.get(path)
+            if info is None:
+                missing.append(path)
+            else:
+                self.probed.emit(info)
+        if not missing:
+            return
+
+        executor = ThreadPoolExecutor(
+            max_workers=min(self.max_workers, len(missing)),
+            thread_name_prefix="probe",
+            initializer=lower_thread_priority,
+        )
+        try:
+            futures = [executor.submit(self._probe, store, path) for path in missing]
+            for future in as_completed(futures):
+                if self._token.cancelled:
+                    return
+                info = future.result()
+                if info is not None:
+                    self.probed.emit(info)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        store.flush()
+
+    def _probe(self, store, path: str) -> Optional[MediaInfo]:
+        if self._token.cancelled:
+            return None
+        try:
+            info = probe_media(path, self._token)
+        except Exception:  # pylint: disable=broad-exception-caught
+            log.exception("Probe of %s failed", path)
+            return None
+        if info is not None and not self._token.cancelled:
+            store.put(info)
+        return info
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import bisect
+import logging
+import os
+import shutil
+from array import array
+from pathlib import Path
+from typing import Optional
+
+from PySide6.QtCore import QThread, Signal
+
+from ..helpers import file_cache_key, user_cache_dir
+from .background import background_policy, lower_thread_priority
+from .cancellation import CancelToken
+from .fingerprint import content_fingerprint
+
+log = logging.getLogger(__name__)
+
+CACHE_SUFFIX = ".sc"
+# The analysis pass decodes this many grey frames per second at this size.
+SAMPLE_FPS = 4
+SAMPLE_WIDTH = 64
+SAMPLE_HEIGHT = 36
+FRAMES_PER_READ = 4 * 60 * SAMPLE_FPS
+# A cut is a mean luma change of at least CUT_SCORE (0-255) that also
+# stands CUT_RATIO times above the median of the preceding BASELINE_FRAMES
+# changes, so fast motion or flashes in an already busy shot do not count.
+CUT_SCORE = 24.0
+CUT_RATIO = 3.0
+BASELINE_FRAMES = 8
+# Boundaries closer than this are merged, keeping navigation chapter-like.
+MIN_SCENE_MS = 5000
+
+
+class SceneIndex:
+    """Sorted scene start times (ms) of one file, stored as an ``array``."""
+
+    def __init__(self, times: array) -> None:
+        self.times = times
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def next_after(self, ms: int) -> Optional[int]:
+        pos = bisect.bisect_right(self.times, ms)
+        return self.times[pos] if pos < len(self.times) else None
+
+    def previous_before(self, ms: int) -> Optional[int]:
+        pos = bisect.bisect_left(self.times, ms)
+        return self.times[pos - 1] if pos else None
+
+
+def _cache_file(path: str) -> Optional[Path]:
+    key = content_fingerprint(path) or file_cache_key(path)
+    return user_cache_dir("scenes") / (key + CACHE_SUFFIX) if key else None
+
+
+def load_scene_index(path: str) -> Optional[SceneIndex]:
+    """
+    The cached scene index of ``path``, or None if the file has not been
+    analysed yet. Files without decodable video have an empty index, so
+    they are not analysed again. Cheap enough for the GUI thread.
+    """
+    cache_file = _cache_file(path)
+    if cache_file is None:
+        return None
+    times = array("q")
+    try:
+        with open(cache_file, "rb") as f:
+            times.frombytes(f.read())
+    except (OSError, ValueError):
+        return None
+    return SceneIndex(times)
+
+
+def detect_cuts(scores, sample_ms: float) -> list[int]:
+    """Cut times (ms) from frame-to-frame difference ``scores``."""
+    import numpy as np  # local import to keep module import fast
+
+    if len(scores) == 0:
+        return []
+    lead = np.full(BASELINE_FRAMES, np.median(scores[:BASELINE_FRAMES]), dtype=np.float32)
+    padded = np.concatenate([lead, scores])
+    windows = np.lib.stride_tricks.sliding_window_view(padded[:-1], BASELINE_FRAMES)
+    baseline = np.median(windows, axis=1)
+    hits = np.flatnonzero((scores >= CUT_SCORE) & (scores >= CUT_RATIO * (baseline + 1.0)))
+    cuts: list[int] = []
+    for i in hits:
+        # Score i compares samples i and i + 1; the new scene starts at the latter.
+        ms = int((i + 1) * sample_ms)
+        if ms - (cuts[-1] if cuts else 0) >= MIN_SCENE_MS:
+            cuts.append(ms)
+    return cuts
+
+
+def analyze_scenes(path: str, token: CancelToken) -> Optional[array]:
+    """
+    One low-resolution decode pass over ``path`` (via ffmpeg) scoring the
+    change between consecutive samples. Blocking and slow; returns None
+    when cancelled or without ffmpeg, and no cuts if no video decodes.
+    """
+    import numpy as np  # local import to keep module import fast
+
+    if not shutil.which("ffmpeg"):
+        return None
+    frame_size = SAMPLE_WIDTH * SAMPLE_HEIGHT
+    args = [
+        "ffmpeg", "-v", "error", "-nostdin", "-i", path, "-an", "-sn", "-dn",
+        "-vf", f"fps={SAMPLE_FPS},scale={SAMPLE_WIDTH}:{SAMPLE_HEIGHT}:flags=area,format=gray",
+        "-f", "rawvideo", "pipe:1",
+    ]
+    scores = []
+    previous = None
+    policy = background_policy()
+    try:
+        for chunk in token.stream(args, frame_size * FRAMES_PER_READ):
+            frames = np.frombuffer(chunk[: len(chunk) - len(chunk) % frame_size], dtype=np.uint8)
+            frames = frames.reshape(-1, frame_size).astype(np.int16)
+            if previous is not None:
+                frames = np.concatenate([previous, frames])
+            if len(frames) > 1:
+                scores.append(np.abs(np.diff(frames, axis=0)).mean(axis=1, dtype=np.float32))
+            previous = frames[-1:]
+            if policy.checkpoint(token):
+                return None
+    except OSError:
+        log.exception("Failed to spawn ffmpeg for scene analysis of %s", path)
+        return None
+    if token.cancelled:
+        return None
+    if previous is None:
+        log.debug("No video decoded from %s for scene analysis", path)
+        return array("q")
+    all_scores = np.concatenate(scores) if scores else np.zeros(0, dtype=np.float32)
+    return array("q", detect_cuts(all_scores, 1000.0 / SAMPLE_FPS))
+
+
+class SceneAnalysisWorker(QThread):
+    """Analyses one file at background priority and caches its scene index."""
+
+    index_ready = Signal(str, object)  # path, SceneIndex
+
+    def __init__(self, video_path: str):
+        super().__init__()
+        self.video_path = video_path
+        self._token = CancelToken(background=True)
+
+    def cancel(self):
+        self._token.cancel()
+
+    def stop(self):
+        self.cancel()
+        self.wait()
+
+    def run(self):
+        lower_thread_priority()
+        times = analyze_scenes(self.video_path, self._token)
+        if times is None:
+            return
+        cache_file = _cache_file(self.video_path)
+        if cache_file is not None:
+            # Written aside and renamed: a truncated file would read as empty.
+            tmp = cache_file.with_name(cache_file.name + ".tmp")
+            try:
+                with open(tmp, "wb") as f:
+                    times.tofile(f)
+                os.replace(tmp, cache_file)
+            except OSError:
+                log.exception("Failed to cache scene index for %s", self.video_path)
+        log.debug("%s scene boundaries found in %s", len(times), self.video_path)
+        self.index_ready.emit(self.video_path, SceneIndex(times))
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import logging
+import math
+import re
+import threading
+from pathlib import Path
+from typing import Optional
+
+from PySide6.QtCore import QRect
+from PySide6.QtGui import QImage, QPainter, QPixmap, QColor
+
+from ..helpers import file_cache_key, user_cache_dir
+from .timeline import TimelineIndex
+
+log = logging.getLogger(__name__)
+
+INDEX_NAME = "previews.vtt"
+ATLAS_PATTERN = "sprite_{:03d}.jpg"
+ATLAS_COLUMNS = 32
+MAX_TILES_PER_ATLAS = 32 * 32
+ATLAS_QUALITY = 85
+
+_CUE_RE = re.compile(
+    r"(\d+):(\d\d):(\d\d)\.(\d{3})\s+-->\s+\S+\s*\n(\S+?)#xywh=(\d+),(\d+),(\d+),(\d+)"
+)
+
+
+def sprite_dir(video_path: str) -> Optional[Path]:
+    key = file_cache_key(video_path)
+    if key is None:
+        return None
+    return user_cache_dir("previews", key)
+
+
+def _vtt_time(ms: int) -> str:
+    seconds, millis = divmod(max(0, ms), 1000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}.{millis:03d}"
+
+
+class SpriteTimelineIndex(TimelineIndex):
+    """
+    TimelineIndex backed by sprite-sheet atlases: each timestamp maps to a
+    sub-rect of one decoded atlas pixmap. Frames inserted later (e.g. exact
+    scrub requests) are stored as ordinary pixmaps alongside.
+    """
+
+    def __init__(self, atlases: list[QPixmap], tiles: dict[int, tuple[int, QRect]]) -> None:
+        super().__init__()
+        self._atlases = atlases
+        self._tiles = tiles
+        for time_ms in sorted(tiles):
+            self._times.append(time_ms)
+
+    def tile(self, time_ms: int) -> Optional[tuple[QPixmap, QRect]]:
+        entry = self._tiles.get(time_ms)
+        if entry is not None:
+            return self._atlases[entry[0]], entry[1]
+        return super().tile(time_ms)
+
+    def _put(self, pos: int, time_ms: int, image, replace: bool) -> None:
+        self._tiles.pop(time_ms, None)
+        super()._put(pos, time_ms, image, replace)
+
+    def _drop_all(self) -> None:
+        super()._drop_all()
+        self._atlases = []
+        self._tiles = {}
+
+    def _resident_bytes(self) -> int:
+        atlases = sum(p.width() * p.height() * max(1, p.depth() // 8) for p in self._atlases)
+        return atlases + super()._resident_bytes()
+
+
+def load_sprite_sheet(video_path: str) -> Optional[SpriteTimelineIndex]:
+    folder = sprite_dir(video_path)
+    if folder is None:
+        return None
+    index_path = folder / INDEX_NAME
+    if not index_path.exists():
+        return None
+    try:
+        text = index_path.read_text(encoding="utf-8")
+    except OSError:
+        log.exception("Failed to read sprite index %s", index_path)
+        return None
+
+    atlases: list[QPixmap] = []
+    atlas_ids: dict[str, int] = {}
+    tiles: dict[int, tuple[int, QRect]] = {}
+    for match in _CUE_RE.finditer(text):
+        h, m, s, ms, name, x, y, w, hgt = match.groups()
+        if name not in atlas_ids:
+            pixmap = QPixmap(str(folder / name))
+            if pixmap.isNull():
+                log.warning("Sprite atlas %s missing or unreadable; ignoring cache", name)
+                return None
+            atlas_ids[name] = len(atlases)
+            atlases.append(pixmap)
+        time_ms = ((int(h) * 60 + int(m)) * 60 + int(s)) * 1000 + int(ms)
+        tiles[time_ms] = (atlas_ids[name], QRect(int(x), int(y), int(w), int(hgt)))
+    if not tiles:
+        return None
+    log.debug("Loaded %s sprite previews for %s", len(tiles), video_path)
+    return SpriteTimelineIndex(atlases, tiles)
+
+
+def write_sprite_sheet(video_path: str, index: TimelineIndex, duration_ms: int = 0) -> bool:
+    """
+    Pack every thumbnail in ``index`` into whole atlas images and a WebVTT
+    index next to them. The atlases are composed on the calling (GUI)
+    thread; encoding and disk writes happen on a background thread.
+    """
+    folder = sprite_dir(video_path)
+    times = index.times()
+    if folder is None or not times:
+        return False
+    first = index.tile(times[0])
+    if first is None:
+        return False
+    tile_w, tile_h = first[1].width(), first[1].height()
+
+    atlases: list[QImage] = []
+    cues: list[str] = ["WEBVTT", ""]
+    for start in range(0, len(times), MAX_TILES_PER_ATLAS):
+        chunk = times[start:start + MAX_TILES_PER_ATLAS]
+        columns = min(ATLAS_COLUMNS, len(chunk))
+        rows = math.ceil(len(chunk) / columns)
+        atlas = QImage(columns * tile_w, rows * tile_h, QImage.Format_RGB32)
+        atlas.fill(QColor("black"))
+        name = ATLAS_PATTERN.format(len(atlases))
+        painter = QPainter(atlas)
+        for slot, time_ms in enumerate(chunk):
+            tile = index.tile(time_ms)
+            if tile is None:
+                continue
+            target = QRect((slot % columns) * tile_w, (slot // columns) * tile_h, tile_w, tile_h)
+            painter.drawPixmap(target, tile[0], tile[1])
+            pos = start + slot
+            end_ms = times[pos + 1] if pos + 1 < len(times) else max(duration_ms, time_ms + 1)
+            cues.append(f"{_vtt_time(time_ms)} --> {_vtt_time(end_ms)}")
+            cues.append(f"{name}#xywh={target.x()},{target.y()},{tile_w},{tile_h}")
+            cues.append("")
+        painter.end()
+        atlases.append(atlas)
+
+    def _save():
+        try:
+            for number, atlas in enumerate(atlases):
+                atlas.save(str(folder / ATLAS_PATTERN.format(number)), "JPEG", ATLAS_QUALITY)
+            # The index goes last so a reader never sees it without its atlases.
+            (folder / INDEX_NAME).write_text("\n".join(cues), encoding="utf-8")
+            log.debug("Wrote %s sprite atlas(es) for %s", len(atlases), video_path)
+        except Exception:  # pylint: disable=broad-exception-caught
+            log.exception("Failed to write sprite sheet for %s", video_path)
+
+    threading.Thread(target=_save, name="sprite-writer", daemon=True).start()
+    return True
@@ -5,6 +5,9 @@ from typing import Dict, List, Optional
 
 from PySide6.QtCore import QSettings
 
+# Resume points kept per map; the least recently written are dropped first.
+MAX_RESUME_POSITIONS = 500
+
 
 class StateStore:
     """
@@ -17,7 +20,10 @@ class StateStore:
     KEY_ASPECT = "video/aspect_ratio"
     KEY_LAST_PLAYLIST = "playlist/last_paths"
     KEY_LAST_POSITIONS = "playback/last_positions"
+    KEY_CONTENT_POSITIONS = "playback/content_positions"
     KEY_LAST_FILE = "playback/last_file"
+    KEY_THUMB_STORAGE = "thumbnails/storage"
+    KEY_THUMB_MODE = "thumbnails/extract_mode"
 
     def __init__(self) -> None:
         self.settings = QSettings("Nexa Player", "Player")
@@ -50,6 +56,19 @@ class StateStore:
     def set_aspect_ratio(self, ratio: str) -> None:
         self.settings.setValue(self.KEY_ASPECT, ratio)
 
+    # --- thumbnails -----------------------------------------------------
+    def get_thumbnail_storage(self) -> str:
+        return self.settings.value(self.KEY_THUMB_STORAGE, "auto", type=str)
+
+    def set_thumbnail_storage(self, mode: str) -> None:
+        self.settings.setValue(self.KEY_THUMB_STORAGE, mode)
+
+    def get_thumbnail_mode(self) -> str:
+        return self.settings.value(self.KEY_THUMB_MODE, "keyframe", type=str)
+
+    def set_thumbnail_mode(self, mode: str) -> None:
+        self.settings.setValue(self.KEY_THUMB_MODE, mode)
+
     # --- playlist -------------------------------------------------------
     def get_last_playlist(self) -> List[str]:
         values = self.settings.value(self.KEY_LAST_PLAYLIST, [], type=list)
@@ -65,8 +84,10 @@ class StateStore:
         self.settings.setValue(self.KEY_LAST_FILE, path or "")
 
     # --- resume positions ------------------------------------------------
-    def get_resume_positions(self) -> Dict[str, int]:
-        raw = self.settings.value(self.KEY_LAST_POSITIONS, "", type=str)
+    # Positions are stored by path and, when known, by content fingerprint
+    # too, so they survive the file being moved or renamed.
+    def _load_positions(self, key: str) -> Dict[str, int]:
+        raw = self.settings.value(key, "", type=str)
         if not raw:
             return {}
         try:
@@ -75,13 +96,41 @@ class StateStore:
             return {}
         return {k: int(v) for k, v in data.items()}
 
-    def set_resume_position(self, path: str, position_ms: int) -> None:
+    def _store_positions(self, key: str, data: Dict[str, int]) -> None:
+        # Entries are re-inserted on every write, so dict order is recency.
+        for stale in list(data)[: max(0, len(data) - MAX_RESUME_POSITIONS)]:
+            del data[stale]
+        self.settings.setValue(key, json.dumps(data))
+
+    def get_resume_positions(self) -> Dict[str, int]:
+        return self._load_positions(self.KEY_LAST_POSITIONS)
+
+    def get_resume_position(self, path: str, fingerprint: Optional[str] = None) -> Optional[int]:
+        position = self.get_resume_positions().get(path)
+        if position is None and fingerprint:
+            position = self._load_positions(self.KEY_CONTENT_POSITIONS).get(fingerprint)
+        return position
+
+    def set_resume_position(
+        self, path: str, position_ms: int, fingerprint: Optional[str] = None
+    ) -> None:
         data = self.get_resume_positions()
+        data.pop(path, None)
         data[path] = position_ms
-        self.settings.setValue(self.KEY_LAST_POSITIONS, json.dumps(data))
-
-    def clear_resume_position(self, path: str) -> None:
+        self._store_positions(self.KEY_LAST_POSITIONS, data)
+        if fingerprint:
+            by_content = self._load_positions(self.KEY_CONTENT_POSITIONS)
+            by_content.pop(fingerprint, None)
+            by_content[fingerprint] = position_ms
+            self._store_positions(self.KEY_CONTENT_POSITIONS, by_content)
+
+    def clear_resume_position(self, path: str, fingerprint: Optional[str] = None) -> None:
         data = self.get_resume_positions()
         if path in data:
             del data[path]
             self.settings.setValue(self.KEY_LAST_POSITIONS, json.dumps(data))
+        if fingerprint:
+            by_content = self._load_positions(self.KEY_CONTENT_POSITIONS)
+            if fingerprint in by_content:
+                del by_content[fingerprint]
+                self.settings.setValue(self.KEY_CONTENT_POSITIONS, json.dumps(by_content))
@@ -1,18 +1,86 @@
 from __future__ import annotations
 
 import ctypes
+import heapq
 import logging
 import os
+import shutil
 import subprocess
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from pathlib import Path
 import tempfile
 import time
+from typing import Iterable, Mapping, Optional
 
 from PySide6.QtCore import QMutex, QMutexLocker, QThread, Signal, Qt
 from PySide6.QtGui import QImage
 
+from ..helpers import file_cache_key
+from .backend_stats import UnreadableFile, backend_stats, codec_hint
+from .background import background_policy, lower_thread_priority
+from .cancellation import CancelToken
+from .container_probe import cached_container_info
+from .keyframes import KeyframeIndex, keyframe_index
+from .timeline import progressive_schedule, sample_interval_ms
+from .vlc_grabber import shared_grabber
+
 log = logging.getLogger(__name__)
 
+VIDEO_EXTENSIONS = {".mp4", ".mkv", ".avi", ".mov", ".webm"}
+
+# Cores left free for VLC's decoder threads and the GUI thread when sizing
+# the thumbnail pool.
+PLAYBACK_RESERVED_CORES = 2
+
+
+# Scheduling tiers for ThumbnailListWorker.prioritize(); lower runs first.
+PRIORITY_VISIBLE = 0
+PRIORITY_PREFETCH = 1
+PRIORITY_BACKGROUND = 2
+# Queued after everything else; an in-flight job demoted to this tier is
+# cancelled and parked until it is wanted again or the queue runs dry.
+PRIORITY_FAR = 3
+
+
+# Frame extraction modes. Keyframe mode seeks on the input side, decodes
+# only keyframes at reduced resolution where the codec allows it and skips
+# every non-video stream; the frame may come from up to one GOP before the
+# requested time, which is fine for previews.
+EXTRACT_KEYFRAME = "keyframe"
+EXTRACT_EXACT = "exact"
+# Decoder downscale (1 = half size) requested in keyframe mode; ffmpeg
+# clamps it to what the codec supports (mpeg2/mpeg4/mjpeg do, h264/hevc
+# ignore it).
+KEYFRAME_LOWRES = 1
+
+# Grid thumbnail selection: candidates decoded per file, their spacing in
+# exact mode, and the luma thresholds below/above which a frame counts as
+# black, white or flat.
+CANDIDATE_FRAMES = 4
+CANDIDATE_SPACING_S = 2
+BLACK_LEVEL = 20.0
+WHITE_LEVEL = 235.0
+FLAT_STDDEV = 8.0
+
+# Single-frame grabs stay this far before the known end: at the very end
+# there is no frame left to decode.
+END_MARGIN_MS = 500
+
+# Size of timeline preview frames (background pass and exact scrub grabs).
+PREVIEW_WIDTH = 96
+PREVIEW_HEIGHT = 54
+
+# Position and size of list thumbnails (file grid, playlist); views share
+# them so one decoded frame serves both through the image cache.
+LIST_THUMB_MS = 3000
+LIST_THUMB_WIDTH = 160
+LIST_THUMB_HEIGHT = 90
+
+
+def default_worker_count() -> int:
+    return max(1, (os.cpu_count() or 1) - PLAYBACK_RESERVED_CORES)
+
 
 class VideoBuffer:
     def __init__(self, width: int = 1280, height: int = 720):
@@ -38,19 +106,41 @@ class VideoBuffer:
 
 
 class ThumbnailWorker(QThread):
+    """
+    Samples timeline preview frames for one video. Frames arrive coarse to
+    fine (see ``timeline.progressive_schedule``) so the whole timeline has a
+    rough preview almost immediately. ``interval_s=None`` scales the final
+    density with the duration; timestamps in ``skip`` are already known and
+    are not decoded again.
+    """
+
     thumbnail_ready = Signal(int, QImage)
 
-    def __init__(self, video_path: str, interval_s: int = 5, width: int = 96, height: int = 54):
+    def __init__(
+        self,
+        video_path: str,
+        interval_s: Optional[int] = None,
+        width: int = PREVIEW_WIDTH,
+        height: int = PREVIEW_HEIGHT,
+        mode: str = EXTRACT_KEYFRAME,
+        skip: Iterable[int] = (),
+    ):
         super().__init__()
         self.video_path = video_path
         self.interval_s = interval_s
+        self.skip = set(skip)
         self.width = width
         self.height = height
-        self._running = True
+        self.mode = mode
+        self._token = CancelToken(background=True)
+        # True once every scheduled timestamp has been attempted.
+        self.completed = False
 
     def run(self):
         import cv2  # local import to keep module import fast
 
+        lower_thread_priority()
+        policy = background_policy()
         cap = cv2.VideoCapture(self.video_path)
         if not cap.isOpened():
             log.error("Could not open video for thumbnails: %s", self.video_path)
@@ -61,9 +151,23 @@ class ThumbnailWorker(QThread):
             cap.release()
             return
         frame_count = cap.get(cv2.CAP_PROP_FRAME_COUNT)
-        dur_ms = (frame_count / fps) * 1000
-        t = 0.0
-        while self._running and t < dur_ms:
+        dur_ms = int((frame_count / fps) * 1000)
+        if self.interval_s:
+            interval_ms = int(self.interval_s * 1000)
+        else:
+            interval_ms = sample_interval_ms(dur_ms)
+        schedule = progressive_schedule(dur_ms, interval_ms)
+        keyframes = keyframe_index(self.video_path)
+        if keyframes is not None:
+            schedule = _keyframe_schedule(schedule, keyframes)
+        schedule = (t for t in schedule if t not in self.skip)
+        if self.mode == EXTRACT_KEYFRAME and shutil.which("ffmpeg"):
+            cap.release()
+            self._run_keyframes(schedule)
+            return
+        for t in schedule:
+            if policy.checkpoint(self._token):
+                break
             frame_num = int((t / 1000.0) * fps)
             cap.set(cv2.CAP_PROP_POS_FRAMES, frame_num)
             success, frame = cap.read()
@@ -74,26 +178,190 @@ class ThumbnailWorker(QThread):
                 bytes_per_line = ch * w
                 qimg = QImage(rgb.data, w, h, bytes_per_line, QImage.Format_RGB888)
                 self.thumbnail_ready.emit(int(t), qimg.copy())
-            t += self.interval_s * 1000
+        else:
+            self.completed = True
         cap.release()
 
+    def _run_keyframes(self, schedule: Iterable[int]) -> None:
+        policy = background_policy()
+        for t in schedule:
+            if policy.checkpoint(self._token):
+                return
+            image = get_frame_at(
+                self.video_path, t, self.width, self.height, mode=EXTRACT_KEYFRAME, token=self._token
+            )
+            if self._token.cancelled:
+                return
+            if image is not None and not image.isNull():
+                self.thumbnail_ready.emit(int(t), image)
+        self.completed = True
+
+    def cancel(self):
+        """Ask the pass to stop and kill its in-flight decode; returns at once."""
+        self._token.cancel()
+
     def stop(self):
-        self._running = False
+        self.cancel()
+        self.wait()
+
+
+class FrameRequestWorker(QThread):
+    """
+    Long-lived thread serving one-off exact frame grabs for scrub previews.
+    Only the newest request is kept: anything superseded before or while it
+    decodes is dropped instead of emitted.
+    """
+
+    frame_ready = Signal(str, int, QImage)
+
+    def __init__(self, width: int = PREVIEW_WIDTH, height: int = PREVIEW_HEIGHT):
+        super().__init__()
+        self.width = width
+        self.height = height
+        self._cond = threading.Condition()
+        self._request: Optional[tuple[str, int, int]] = None
+        self._generation = 0
+        self._current: Optional[CancelToken] = None
+        self._running = True
+
+    def request(self, video_path: str, ms: int) -> None:
+        with self._cond:
+            self._supersede()
+            self._request = (video_path, ms, self._generation)
+            self._cond.notify()
+
+    def cancel(self) -> None:
+        with self._cond:
+            self._supersede()
+            self._request = None
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._supersede()
+            self._request = None
+            self._cond.notify()
         self.wait()
 
+    def _supersede(self) -> None:
+        self._generation += 1
+        if self._current is not None:
+            self._current.cancel()
+
+    def run(self):
+        while True:
+            with self._cond:
+                while self._running and self._request is None:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                video_path, ms, generation = self._request
+                self._request = None
+                token = self._current = CancelToken()
+            image = get_frame_at(video_path, ms, self.width, self.height, token=token)
+            with self._cond:
+                if generation != self._generation:
+                    log.debug("Dropping superseded frame request at %sms", ms)
+                    continue
+            if image is not None and not image.isNull():
+                self.frame_ready.emit(video_path, ms, image)
+
+
+def _keyframe_schedule(schedule: Iterable[int], keyframes: KeyframeIndex) -> Iterable[int]:
+    """
+    Move each timestamp onto its nearest keyframe, which decodes without a
+    GOP walk, and drop timestamps that land on an already used keyframe.
+    """
+    seen: set[int] = set()
+    for t in schedule:
+        key = keyframes.nearest(t)
+        if key not in seen:
+            seen.add(key)
+            yield key
+
 
-def get_frame_at(video_path: str, ms: int, width: int = 96, height: int = 54) -> QImage | None:
-    time_sec = ms / 1000.0
+def _startupinfo():
+    if os.name != "nt":
+        return None
+    startupinfo = subprocess.STARTUPINFO()
+    startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+    return startupinfo
+
+
+def _ffmpeg_input_args(video_path: str, ms: int, mode: str) -> list[str]:
+    args = []
+    if mode == EXTRACT_KEYFRAME:
+        # Input-side options: decode keyframes only, at reduced resolution,
+        # and emit the keyframe the seek lands on instead of decoding forward.
+        args += ["-skip_frame", "nokey", "-lowres", str(KEYFRAME_LOWRES), "-noaccurate_seek"]
+    args += ["-ss", str(ms / 1000.0), "-i", video_path]
+    if mode == EXTRACT_KEYFRAME:
+        args += ["-an", "-sn", "-dn"]
+    return args
+
+
+def get_frame_at(
+    video_path: str,
+    ms: int,
+    width: int = 96,
+    height: int = 54,
+    mode: str = EXTRACT_EXACT,
+    token: Optional[CancelToken] = None,
+) -> QImage | None:
+    """
+    Grab one frame, trying backends in the order ``BackendStats`` suggests
+    for this file and codec and recording how each attempt went. ``ms`` is
+    kept inside the duration known from the container headers. Returns
+    None as soon as ``token`` is cancelled.
+    """
+    token = token or CancelToken()
+    info = cached_container_info(video_path)
+    if info is not None and info.duration_ms > 0:
+        ms = max(0, min(ms, info.duration_ms - END_MARGIN_MS))
+    stats = backend_stats()
+    file_key = file_cache_key(video_path)
+    codec = codec_hint(video_path)
+    for backend in stats.order(file_key, codec, _available_backends(), mode):
+        if token.cancelled:
+            return None
+        start = time.perf_counter()
+        unreadable = False
+        try:
+            image = _BACKENDS[backend](video_path, ms, width, height, mode, token)
+        except UnreadableFile:
+            image, unreadable = None, True
+        if token.cancelled:
+            # An aborted attempt says nothing about the backend.
+            return None
+        ok = image is not None and not image.isNull()
+        stats.record(
+            file_key, codec, backend, ok, (time.perf_counter() - start) * 1000, mode, unreadable
+        )
+        if ok:
+            return image
+        log.debug("%s backend failed for %s at %sms", backend, video_path, ms)
+    return None
+
+
+def _available_backends() -> tuple[str, ...]:
+    if shutil.which("ffmpeg"):
+        return ("ffmpeg", "opencv", "vlc")
+    return ("opencv", "vlc")
+
+
+def _frame_via_ffmpeg(
+    video_path: str,
+    ms: int,
+    width: int,
+    height: int,
+    mode: str = EXTRACT_EXACT,
+    token: Optional[CancelToken] = None,
+) -> QImage | None:
     tmp_file = tempfile.NamedTemporaryFile(suffix=".png", delete=False)
     tmp_path = tmp_file.name
     tmp_file.close()
-    args = [
-        "ffmpeg",
-        "-y",
-        "-ss",
-        str(time_sec),
-        "-i",
-        video_path,
+    args = ["ffmpeg", "-y", *_ffmpeg_input_args(video_path, ms, mode)]
+    args += [
         "-vframes",
         "1",
         "-vf",
@@ -103,47 +371,138 @@ def get_frame_at(video_path: str, ms: int, width: int = 96, height: int = 54) ->
         tmp_path,
     ]
 
-    startupinfo = None
-    if os.name == "nt":
-        startupinfo = subprocess.STARTUPINFO()
-        startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-
     try:
-        result = subprocess.run(
-            args,
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-            stdin=subprocess.DEVNULL,
-            startupinfo=startupinfo,
-            check=False,
-        )
+        result = (token or CancelToken()).run(args, startupinfo=_startupinfo())
     except FileNotFoundError:
         log.info("ffmpeg missing; using fallbacks for %s", video_path)
         Path(tmp_path).unlink(missing_ok=True)
-        return _frame_via_fallback(video_path, ms, width, height)
+        return None
     except Exception:  # pylint: disable=broad-exception-caught
         log.exception("Failed to spawn ffmpeg for %s", video_path)
         Path(tmp_path).unlink(missing_ok=True)
-        return _frame_via_fallback(video_path, ms, width, height)
+        return None
 
-    if result.returncode != 0 or not Path(tmp_path).exists():
+    if result is None:
+        Path(tmp_path).unlink(missing_ok=True)
+        return None
+    if result.returncode != 0:
         log.info("ffmpeg returned code %s for %s; falling back", result.returncode, video_path)
         Path(tmp_path).unlink(missing_ok=True)
-        return _frame_via_fallback(video_path, ms, width, height)
+        raise UnreadableFile(video_path)
+    if not Path(tmp_path).exists():
+        log.debug("ffmpeg wrote no frame for %s at %sms", video_path, ms)
+        return None
 
     image = QImage(tmp_path)
     Path(tmp_path).unlink(missing_ok=True)
     if image.isNull():
         log.info("ffmpeg produced null image for %s; falling back", video_path)
-        return _frame_via_fallback(video_path, ms, width, height)
+        return None
     return image.scaled(width, height, Qt.KeepAspectRatio, Qt.SmoothTransformation)
 
 
-def _frame_via_fallback(video_path: str, ms: int, width: int, height: int) -> QImage | None:
-    image = _frame_via_opencv(video_path, ms, width, height)
-    if image is not None and not image.isNull():
-        return image
-    return _frame_via_vlc(video_path, ms, width, height)
+def select_thumbnail_frame(
+    video_path: str,
+    ms: int,
+    width: int = 160,
+    height: int = 90,
+    mode: str = EXTRACT_KEYFRAME,
+    token: Optional[CancelToken] = None,
+) -> QImage | None:
+    """
+    Pick the most informative of a few frames at or after ``ms``, skipping
+    black, white and flat frames (fades, title cards). All candidates come
+    from one ffmpeg run; if that yields nothing the usual fallbacks apply.
+    """
+    token = token or CancelToken()
+    stats = backend_stats()
+    file_key = file_cache_key(video_path)
+    if "ffmpeg" not in _available_backends() or stats.is_known_failure(file_key, "ffmpeg", mode):
+        return get_frame_at(video_path, ms, width, height, mode, token)
+    start = time.perf_counter()
+    unreadable = False
+    try:
+        frames = _decode_candidates(video_path, ms, width, height, mode, token)
+        if frames is not None and not frames and ms > 0 and not token.cancelled:
+            # Shorter than the offset: take the opening frames instead.
+            frames = _decode_candidates(video_path, 0, width, height, mode, token)
+    except UnreadableFile:
+        frames, unreadable = None, True
+    if token.cancelled:
+        return None
+    stats.record(
+        file_key,
+        codec_hint(video_path),
+        "ffmpeg",
+        bool(frames),
+        (time.perf_counter() - start) * 1000,
+        mode,
+        unreadable,
+    )
+    if not frames:
+        # If ffmpeg cannot read the file it is now marked as failing, so
+        # this goes straight to the remaining backends.
+        return get_frame_at(video_path, ms, width, height, mode, token)
+    best = _most_informative(frames, width, height)
+    image = QImage(frames[best], width, height, 3 * width, QImage.Format_RGB888)
+    return image.copy()
+
+
+def _decode_candidates(
+    video_path: str, ms: int, width: int, height: int, mode: str, token: CancelToken
+) -> Optional[list[bytes]]:
+    """
+    Raw RGB24 candidate frames, or None when ffmpeg cannot be run or was
+    cancelled. Raises UnreadableFile if ffmpeg fails on the file.
+    """
+    args = ["ffmpeg", *_ffmpeg_input_args(video_path, ms, mode)]
+    if mode == EXTRACT_KEYFRAME:
+        # Consecutive keyframes are already spread one GOP apart.
+        args += ["-vf", f"scale={width}:{height}", "-vsync", "0"]
+    else:
+        args += ["-vf", f"fps=1/{CANDIDATE_SPACING_S},scale={width}:{height}"]
+    args += [
+        "-frames:v",
+        str(CANDIDATE_FRAMES),
+        "-pix_fmt",
+        "rgb24",
+        "-f",
+        "rawvideo",
+        "-loglevel",
+        "quiet",
+        "-",
+    ]
+    try:
+        result = token.run(args, stdout=subprocess.PIPE, startupinfo=_startupinfo())
+    except FileNotFoundError:
+        log.info("ffmpeg missing; using fallbacks for %s", video_path)
+        return None
+    except Exception:  # pylint: disable=broad-exception-caught
+        log.exception("Failed to spawn ffmpeg for %s", video_path)
+        return None
+    if result is None:
+        return None
+    if result.returncode != 0:
+        raise UnreadableFile(video_path)
+    frame_size = width * height * 3
+    data = result.stdout
+    return [data[i:i + frame_size] for i in range(0, len(data) - frame_size + 1, frame_size)]
+
+
+def _most_informative(frames: list[bytes], width: int, height: int) -> int:
+    try:
+        import numpy as np
+    except ImportError:
+        return 0
+    rgb = np.frombuffer(b"".join(frames), dtype=np.uint8).reshape(len(frames), height * width, 3)
+    luma = rgb @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+    mean = luma.mean(axis=1)
+    spread = luma.std(axis=1)
+    usable = (mean > BLACK_LEVEL) & (mean < WHITE_LEVEL) & (spread > FLAT_STDDEV)
+    # Among usable frames prefer the most detailed; if every candidate is
+    # black or flat, the most detailed one is still the best of a bad lot.
+    score = spread + np.where(usable, 1000.0, 0.0)
+    return int(np.argmax(score))
 
 
 def _frame_via_opencv(video_path: str, ms: int, width: int, height: int) -> QImage | None:
@@ -158,7 +517,7 @@ def _frame_via_opencv(video_path: str, ms: int, width: int, height: int) -> QIma
         cap = cv2.VideoCapture(video_path, cv2.CAP_FFMPEG)
     if not cap.isOpened():
         log.warning("OpenCV could not open %s", video_path)
-        return None
+        raise UnreadableFile(video_path)
     try:
         fps = cap.get(cv2.CAP_PROP_FPS)
         if fps and fps > 0:
@@ -185,101 +544,204 @@ def _frame_via_opencv(video_path: str, ms: int, width: int, height: int) -> QIma
         cap.release()
 
 
-def _frame_via_vlc(video_path: str, ms: int, width: int, height: int) -> QImage | None:
-    try:
-        import vlc  # type: ignore
-    except ImportError:
-        log.debug("python-vlc not installed; cannot use VLC fallback for %s", video_path)
+def _frame_via_vlc(
+    video_path: str, ms: int, width: int, height: int, token: Optional[CancelToken] = None
+) -> QImage | None:
+    grabber = shared_grabber()
+    if grabber is None:
+        log.debug("libvlc not available; cannot use VLC fallback for %s", video_path)
         return None
+    return grabber.grab(video_path, ms, width, height, token)
 
-    instance = None
-    media = None
-    player = None
-    try:
-        instance = vlc.Instance("--no-xlib", "--quiet")
-        media = instance.media_new(video_path)
-        player = instance.media_player_new()
-        player.set_media(media)
-        player.video_set_scale(0)
-        player.play()
-
-        # Wait briefly for player to start decoding
-        for _ in range(40):
-            state = player.get_state()
-            if state in (vlc.State.Playing, vlc.State.Paused):
-                break
-            time.sleep(0.05)
-
-        player.set_time(ms)
-        tmp = tempfile.NamedTemporaryFile(suffix=".png", delete=False)
-        tmp_path = tmp.name
-        tmp.close()
-        result = player.video_take_snapshot(0, tmp_path, width, height)
-        player.stop()
-
-        if result != 0:
-            Path(tmp_path).unlink(missing_ok=True)
-            log.debug("VLC snapshot failed for %s at %sms", video_path, ms)
-            return None
 
-        image = QImage(tmp_path)
-        Path(tmp_path).unlink(missing_ok=True)
-        if image.isNull():
-            log.debug("VLC snapshot produced null image for %s", video_path)
-            return None
-        return image
-    except Exception:  # pragma: no cover
-        log.exception("VLC fallback failed for %s", video_path)
-        return None
-    finally:
-        try:
-            if player:
-                player.release()
-            if media:
-                media.release()
-            if instance:
-                instance.release()
-        except Exception:
-            pass
+_BACKENDS = {
+    "ffmpeg": _frame_via_ffmpeg,
+    "opencv": lambda path, ms, w, h, mode, token: _frame_via_opencv(path, ms, w, h),
+    "vlc": lambda path, ms, w, h, mode, token: _frame_via_vlc(path, ms, w, h, token),
+}
 
 
 class ThumbnailListWorker(QThread):
+    """
+    Generates grid thumbnails for a set of videos using a bounded pool of
+    decode threads. Each job mostly waits on an ffmpeg subprocess, so threads
+    are enough to keep several cores busy.
+
+    Jobs are picked by priority (see ``prioritize``) and then by file order,
+    so the view can pull whatever is on screen to the front of the queue.
+    Jobs cancelled for scrolling far away are parked until the view asks
+    for them again, or until nothing else is left, so every file still gets
+    its thumbnail.
+    """
+
     thumb_ready = Signal(str, QImage)
 
-    def __init__(self, folder_path: str, thumb_ms: int = 3000, width: int = 160, height: int = 90):
+    def __init__(
+        self,
+        folder_path: str,
+        thumb_ms: int = LIST_THUMB_MS,
+        width: int = LIST_THUMB_WIDTH,
+        height: int = LIST_THUMB_HEIGHT,
+        max_workers: Optional[int] = None,
+        paths: Optional[Iterable[str]] = None,
+        mode: str = EXTRACT_KEYFRAME,
+    ):
         super().__init__()
         self.folder_path = Path(folder_path)
         self.thumb_ms = thumb_ms
         self.width = width
         self.height = height
+        self.mode = mode
+        self.max_workers = max(1, max_workers or default_worker_count())
         self._running = True
 
-    def stop(self):
+        self._lock = threading.Lock()
+        self._order: dict[str, int] = {}
+        self._pending: dict[str, int] = {}
+        self._heap: list[tuple[int, int, str]] = []
+        self._in_flight: dict[str, CancelToken] = {}
+        self._finished: set[str] = set()
+        self._parked: set[str] = set()
+        if paths is not None:
+            self._enqueue(paths)
+
+    def cancel(self):
+        """Stop scheduling and kill in-flight decodes; returns at once."""
         self._running = False
+        with self._lock:
+            for token in self._in_flight.values():
+                token.cancel()
+
+    def stop(self):
+        self.cancel()
         self.wait()
 
-    def run(self):
+    def list_files(self) -> list[Path]:
         if not self.folder_path.is_dir():
-            return
-        video_exts = {".mp4", ".mkv", ".avi", ".mov", ".webm"}
-        files = sorted(
-            (f for f in self.folder_path.iterdir() if f.suffix.lower() in video_exts),
+            return []
+        return sorted(
+            (f for f in self.folder_path.iterdir() if f.suffix.lower() in VIDEO_EXTENSIONS),
             key=lambda p: p.name.lower(),
         )
-        for file_path in files:
-            if not self._running:
-                break
-            path_str = str(file_path)
-            image = None
-            for offset in (self.thumb_ms, 1000, 0):
-                if offset is None or offset < 0:
+
+    def prioritize(self, priorities: Mapping[str, int]) -> None:
+        """
+        Re-rank queued jobs. Safe to call from the GUI thread at any time;
+        paths that are already finished are ignored.
+        """
+        with self._lock:
+            for path_str, priority in priorities.items():
+                if path_str in self._finished:
+                    continue
+                token = self._in_flight.get(path_str)
+                if token is not None:
+                    if priority >= PRIORITY_FAR:
+                        token.cancel()
+                    elif token.cancelled:
+                        # Wanted again before the cancelled decode returned.
+                        self._pending[path_str] = priority
+                    continue
+                if path_str in self._parked:
+                    if priority >= PRIORITY_FAR:
+                        continue
+                    self._parked.discard(path_str)
+                if path_str not in self._order:
+                    self._order[path_str] = len(self._order)
+                if self._pending.get(path_str) != priority:
+                    self._pending[path_str] = priority
+                    heapq.heappush(self._heap, (priority, self._order[path_str], path_str))
+
+    def _enqueue(self, paths: Iterable[str]) -> None:
+        with self._lock:
+            for path_str in paths:
+                if path_str in self._order:
+                    continue
+                self._order[path_str] = len(self._order)
+                self._pending[path_str] = PRIORITY_BACKGROUND
+                heapq.heappush(self._heap, (PRIORITY_BACKGROUND, self._order[path_str], path_str))
+
+    def _unpark(self) -> bool:
+        """Queue parked jobs at PRIORITY_FAR; False if there were none."""
+        with self._lock:
+            parked, self._parked = self._parked, set()
+            for path_str in parked:
+                self._pending[path_str] = PRIORITY_FAR
+                heapq.heappush(self._heap, (PRIORITY_FAR, self._order[path_str], path_str))
+        return bool(parked)
+
+    def _next_job(self) -> Optional[tuple[str, CancelToken]]:
+        with self._lock:
+            while self._heap:
+                priority, _, path_str = heapq.heappop(self._heap)
+                # Entries superseded by a later prioritize() call are stale.
+                if self._pending.get(path_str) != priority:
                     continue
-                image = get_frame_at(path_str, offset, self.width, self.height)
-                if image is not None and not image.isNull():
-                    log.debug("Thumbnail generated for %s at %sms", path_str, offset)
+                del self._pending[path_str]
+                token = CancelToken(background=True)
+                self._in_flight[path_str] = token
+                return path_str, token
+        return None
+
+    def _generate(self, path_str: str, token: CancelToken) -> Optional[QImage]:
+        if background_policy().checkpoint(token):
+            return None
+        image = select_thumbnail_frame(
+            path_str, self.thumb_ms, self.width, self.height, self.mode, token
+        )
+        if token.cancelled:
+            return None
+        if image is None or image.isNull():
+            log.debug("Thumbnail generation failed for %s; using placeholder", path_str)
+            return QImage()
+        log.debug("Thumbnail generated for %s", path_str)
+        return image
+
+    def _complete(self, path_str: str, image: Optional[QImage]) -> bool:
+        with self._lock:
+            self._in_flight.pop(path_str, None)
+            if image is None:
+                # Cancelled: rescheduling it now would only restart the same
+                # decode, so it waits until prioritize() brings it closer.
+                priority = self._pending.get(path_str)
+                if priority is None:
+                    self._parked.add(path_str)
+                else:
+                    heapq.heappush(self._heap, (priority, self._order[path_str], path_str))
+                return False
+            self._finished.add(path_str)
+            return True
+
+    def run(self):
+        if not self._order:
+            self._enqueue(str(p) for p in self.list_files())
+        in_flight: dict[Future, str] = {}
+        # Only max_workers jobs are ever handed to the executor; the rest wait
+        # in the priority queue where prioritize() can still reorder them.
+        with ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="thumb", initializer=lower_thread_priority
+        ) as executor:
+            while self._running:
+                while len(in_flight) < self.max_workers:
+                    job = self._next_job()
+                    if job is None:
+                        break
+                    path_str, token = job
+                    in_flight[executor.submit(self._generate, path_str, token)] = path_str
+                if not in_flight:
+                    # Only parked jobs can be left: run them last, like any
+                    # other far-away file.
+                    if self._unpark():
+                        continue
                     break
-            if image is None or image.isNull():
-                log.debug("Thumbnail generation failed for %s; using placeholder", path_str)
-                self.thumb_ready.emit(path_str, QImage())
-            else:
-                self.thumb_ready.emit(path_str, image)
+                done, _ = wait(in_flight, timeout=0.1, return_when=FIRST_COMPLETED)
+                for future in done:
+                    path_str = in_flight.pop(future)
+                    try:
+                        image = future.result()
+                    except Exception:  # pylint: disable=broad-exception-caught
+                        log.exception("Thumbnail job crashed for %s", path_str)
+                        image = QImage()
+                    if self._complete(path_str, image) and self._running:
+                        self.thumb_ready.emit(path_str, image)
+            for future in in_flight:
+                future.cancel()
@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+import bisect
+import logging
+from array import array
+from collections import OrderedDict
+from typing import Iterator, Optional, Union
+
+from PySide6.QtCore import QBuffer, QByteArray, QIODevice, QRect
+from PySide6.QtGui import QImage, QImageWriter, QPixmap
+
+log = logging.getLogger(__name__)
+
+# Timeline sampling density: aim for TARGET_SAMPLES previews per file, but
+# never closer than MIN_INTERVAL_MS or further apart than MAX_INTERVAL_MS.
+TARGET_SAMPLES = 240
+MIN_INTERVAL_MS = 2_000
+MAX_INTERVAL_MS = 60_000
+# Evenly spaced frames produced before the schedule starts bisecting.
+INITIAL_SAMPLES = 8
+
+# Storage modes for timeline thumbnails (see make_timeline_index).
+STORAGE_PIXMAP = "pixmap"
+STORAGE_COMPRESSED = "compressed"
+STORAGE_AUTO = "auto"
+# In auto mode, media at least this long keeps its thumbnails compressed.
+COMPRESS_AFTER_MS = 60 * 60 * 1000
+
+
+def sample_interval_ms(duration_ms: int) -> int:
+    if duration_ms <= 0:
+        return MIN_INTERVAL_MS
+    return max(MIN_INTERVAL_MS, min(MAX_INTERVAL_MS, duration_ms // TARGET_SAMPLES))
+
+
+def progressive_schedule(
+    duration_ms: int, interval_ms: int, initial: int = INITIAL_SAMPLES
+) -> Iterator[int]:
+    """
+    Yield every multiple of ``interval_ms`` below ``duration_ms`` exactly
+    once, coarse to fine: about ``initial`` evenly spaced timestamps first,
+    then the midpoints of every gap, and so on down to ``interval_ms``.
+    """
+    if duration_ms <= 0 or interval_ms <= 0:
+        return
+    count = -(-duration_ms // interval_ms)
+    stride = 1
+    while stride * max(1, initial) < count:
+        stride *= 2
+    for index in range(0, count, stride):
+        yield index * interval_ms
+    while stride > 1:
+        half = stride // 2
+        for index in range(half, count, stride):
+            yield index * interval_ms
+        stride = half
+
+
+class TimelineIndex:
+    """
+    Timeline preview thumbnails keyed by timestamp. Timestamps are kept
+    sorted so the preview nearest to any position is a bisect away.
+    Subclasses change how images are stored by overriding ``_put``,
+    ``_get`` and ``_drop_all``.
+    """
+
+    def __init__(self) -> None:
+        self._times = self._new_times()
+        self._items: dict[int, QPixmap] = {}
+        # Bumped when an existing timestamp gets a new image, so renderers
+        # caching by timestamp know to redraw.
+        self.revision = 0
+
+    def __len__(self) -> int:
+        return len(self._times)
+
+    def __contains__(self, time_ms: int) -> bool:
+        pos = bisect.bisect_left(self._times, time_ms)
+        return pos < len(self._times) and self._times[pos] == time_ms
+
+    def insert(self, time_ms: int, image: Union[QImage, QPixmap]) -> None:
+        pos = bisect.bisect_left(self._times, time_ms)
+        replace = pos < len(self._times) and self._times[pos] == time_ms
+        if replace:
+            self.revision += 1
+        else:
+            self._times.insert(pos, time_ms)
+        self._put(pos, time_ms, image, replace)
+
+    def nearest(self, time_ms: int) -> Optional[int]:
+        times = self._times
+        if not times:
+            return None
+        pos = bisect.bisect_left(times, time_ms)
+        if pos == 0:
+            return times[0]
+        if pos == len(times):
+            return times[-1]
+        before, after = times[pos - 1], times[pos]
+        return before if time_ms - before <= after - time_ms else after
+
+    def tile(self, time_ms: int) -> Optional[tuple[QPixmap, QRect]]:
+        """Return the source pixmap and the rect within it for ``time_ms``."""
+        pixmap = self._get(time_ms)
+        if pixmap is None or pixmap.isNull():
+            return None
+        return pixmap, pixmap.rect()
+
+    def times(self) -> list[int]:
+        return list(self._times)
+
+    def clear(self) -> None:
+        self._times = self._new_times()
+        self._drop_all()
+        self.revision += 1
+
+    def stats(self) -> dict[str, int]:
+        return {"entries": len(self), "resident_bytes": self._resident_bytes()}
+
+    # --- storage hooks --------------------------------------------------
+    def _new_times(self):
+        return []
+
+    def _put(self, pos: int, time_ms: int, image, replace: bool) -> None:
+        if isinstance(image, QImage):
+            image = QPixmap.fromImage(image)
+        self._items[time_ms] = image
+
+    def _get(self, time_ms: int) -> Optional[QPixmap]:
+        return self._items.get(time_ms)
+
+    def _drop_all(self) -> None:
+        self._items.clear()
+
+    def _resident_bytes(self) -> int:
+        return sum(
+            p.width() * p.height() * max(1, p.depth() // 8)
+            for p in self._items.values()
+        )
+
+
+class CompressedTimelineIndex(TimelineIndex):
+    """
+    TimelineIndex that keeps every thumbnail encoded (WebP when the Qt
+    image plugin is available, JPEG otherwise) in one growing byte buffer,
+    with offsets and lengths in arrays aligned to the sorted timestamps.
+    Only the ``decoded_limit`` most recently shown thumbnails exist as
+    pixmaps.
+    """
+
+    def __init__(self, quality: int = 80, decoded_limit: int = 32) -> None:
+        self.quality = quality
+        self.decoded_limit = decoded_limit
+        self.format = b"WEBP" if b"webp" in QImageWriter.supportedImageFormats() else b"JPEG"
+        self._blob = bytearray()
+        self._offsets = array("Q")
+        self._lengths = array("I")
+        self._wasted = 0
+        self._decoded: OrderedDict[int, QPixmap] = OrderedDict()
+        self.decode_hits = 0
+        self.decode_misses = 0
+        super().__init__()
+
+    def stats(self) -> dict[str, int]:
+        stats = super().stats()
+        stats.update(
+            encoded_bytes=len(self._blob) - self._wasted,
+            buffer_bytes=len(self._blob),
+            index_bytes=(
+                self._times.itemsize * len(self._times)
+                + self._offsets.itemsize * len(self._offsets)
+                + self._lengths.itemsize * len(self._lengths)
+            ),
+            decoded_entries=len(self._decoded),
+            decode_hits=self.decode_hits,
+            decode_misses=self.decode_misses,
+        )
+        return stats
+
+    def _new_times(self):
+        return array("q")
+
+    def _encode(self, image) -> bytes:
+        if isinstance(image, QPixmap):
+            image = image.toImage()
+        data = QByteArray()
+        buffer = QBuffer(data)
+        buffer.open(QIODevice.WriteOnly)
+        if not image.save(buffer, self.format.decode("ascii"), self.quality):
+            log.debug("Failed to encode timeline thumbnail as %s", self.format)
+        buffer.close()
+        return bytes(data.data())
+
+    def _put(self, pos: int, time_ms: int, image, replace: bool) -> None:
+        payload = self._encode(image)
+        offset = len(self._blob)
+        self._blob.extend(payload)
+        if replace:
+            self._wasted += self._lengths[pos]
+            self._offsets[pos] = offset
+            self._lengths[pos] = len(payload)
+            self._decoded.pop(time_ms, None)
+        else:
+            self._offsets.insert(pos, offset)
+            self._lengths.insert(pos, len(payload))
+        if self._wasted > len(self._blob) // 2:
+            self._compact()
+
+    def _get(self, time_ms: int) -> Optional[QPixmap]:
+        pixmap = self._decoded.get(time_ms)
+        if pixmap is not None:
+            self._decoded.move_to_end(time_ms)
+            self.decode_hits += 1
+            return pixmap
+        pos = bisect.bisect_left(self._times, time_ms)
+        if pos >= len(self._times) or self._times[pos] != time_ms:
+            return None
+        self.decode_misses += 1
+        start = self._offsets[pos]
+        chunk = bytes(self._blob[start:start + self._lengths[pos]])
+        pixmap = QPixmap()
+        if not pixmap.loadFromData(chunk, self.format.decode("ascii")):
+            return None
+        self._decoded[time_ms] = pixmap
+        if len(self._decoded) > self.decoded_limit:
+            self._decoded.popitem(last=False)
+        return pixmap
+
+    def _drop_all(self) -> None:
+        self._blob = bytearray()
+        self._offsets = array("Q")
+        self._lengths = array("I")
+        self._wasted = 0
+        self._decoded.clear()
+
+    def _resident_bytes(self) -> int:
+        decoded = sum(
+            p.width() * p.height() * max(1, p.depth() // 8) for p in self._decoded.values()
+        )
+        return len(self._blob) + decoded
+
+    def _compact(self) -> None:
+        blob = bytearray()
+        for pos, (start, length) in enumerate(zip(self._offsets, self._lengths)):
+            self._offsets[pos] = len(blob)
+            blob.extend(self._blob[start:start + length])
+        self._blob = blob
+        self._wasted = 0
+
+
+def make_timeline_index(mode: str = STORAGE_AUTO, duration_ms: int = 0) -> TimelineIndex:
+    if mode == STORAGE_COMPRESSED or (mode == STORAGE_AUTO and duration_ms >= COMPRESS_AFTER_MS):
+        return CompressedTimelineIndex()
+    return TimelineIndex()
@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import ctypes
+import logging
+import threading
+import time
+from typing import Optional
+
+from PySide6.QtGui import QImage
+
+from .backend_stats import UnreadableFile
+from .cancellation import CancelToken
+
+log = logging.getLogger(__name__)
+
+# How close (ms) the player clock must be to the requested time before a
+# rendered frame is accepted, and how long a single grab may take.
+SEEK_TOLERANCE_MS = 1500
+GRAB_TIMEOUT_S = 4.0
+# Waits (for the lock, the player, a frame) are sliced this finely so a
+# cancelled grab gives the player up promptly.
+CANCEL_POLL_S = 0.05
+
+_LockCB = ctypes.CFUNCTYPE(ctypes.c_void_p, ctypes.c_void_p, ctypes.POINTER(ctypes.c_void_p))
+_UnlockCB = ctypes.CFUNCTYPE(None, ctypes.c_void_p, ctypes.c_void_p, ctypes.POINTER(ctypes.c_void_p))
+_DisplayCB = ctypes.CFUNCTYPE(None, ctypes.c_void_p, ctypes.c_void_p)
+
+
+class VlcFrameGrabber:
+    """
+    Grabs frames in-process through one long-lived, headless libvlc player.
+    Frames are rendered through ``video_set_callbacks`` straight into memory
+    at the requested size, so there is no window, no snapshot file and no
+    per-frame instance setup. The player is reused across requests and
+    files; grabs are serialised by a lock, and a cancelled grab stops
+    waiting and releases it at once.
+    """
+
+    def __init__(self, vlc_module) -> None:
+        self._vlc = vlc_module
+        self._instance = vlc_module.Instance(
+            "--no-xlib",
+            "--quiet",
+            "--no-audio",
+            "--no-osd",
+            "--no-spu",
+            "--no-video-title-show",
+            "--no-sub-autodetect-file",
+            "--no-stats",
+        )
+        self._player = self._instance.media_player_new()
+        self._lock = threading.Lock()
+        self._frame_lock = threading.Lock()
+        self._frame_event = threading.Event()
+        self._media_path: Optional[str] = None
+        self._size = (0, 0)
+        self._buf = None
+        self._frame: Optional[bytes] = None
+
+        self._lock_cb = _LockCB(self._on_lock)
+        self._unlock_cb = _UnlockCB(self._on_unlock)
+        self._display_cb = _DisplayCB(self._on_display)
+        self._player.video_set_callbacks(self._lock_cb, self._unlock_cb, self._display_cb, None)
+
+    # --- libvlc callbacks (decoder threads) -----------------------------
+    def _on_lock(self, opaque, planes):
+        self._frame_lock.acquire()
+        arr = ctypes.cast(planes, ctypes.POINTER(ctypes.c_void_p))
+        arr[0] = ctypes.addressof(self._buf)
+        return None
+
+    def _on_unlock(self, opaque, picture, planes):
+        self._frame_lock.release()
+
+    def _on_display(self, opaque, picture):
+        with self._frame_lock:
+            self._frame = bytes(self._buf)
+        self._frame_event.set()
+
+    # --- public API ------------------------------------------------------
+    def grab(
+        self,
+        video_path: str,
+        ms: int,
+        width: int,
+        height: int,
+        token: Optional[CancelToken] = None,
+    ) -> Optional[QImage]:
+        token = token or CancelToken()
+        while not self._lock.acquire(timeout=CANCEL_POLL_S):
+            if token.cancelled:
+                return None
+        try:
+            return self._grab(video_path, ms, width, height, token)
+        except UnreadableFile:
+            raise
+        except Exception:  # pragma: no cover - defensive
+            log.exception("In-process VLC grab failed for %s", video_path)
+            self._reset()
+            return None
+        finally:
+            self._lock.release()
+
+    def release(self) -> None:
+        with self._lock:
+            try:
+                self._player.stop()
+                self._player.release()
+                self._instance.release()
+            except Exception:  # pragma: no cover - defensive
+                log.debug("Failed to release VLC grabber", exc_info=True)
+
+    # --- internals ---------------------------------------------------------
+    def _grab(
+        self, video_path: str, ms: int, width: int, height: int, token: CancelToken
+    ) -> Optional[QImage]:
+        vlc = self._vlc
+        if self._size != (width, height):
+            # The render format is fixed once the video output exists.
+            self._player.stop()
+            self._buf = (ctypes.c_ubyte * (width * height * 4))()
+            self._player.video_set_format("RGBA", width, height, width * 4)
+            self._size = (width, height)
+            self._media_path = None
+        if video_path != self._media_path:
+            self._player.stop()
+            media = self._instance.media_new(video_path)
+            self._player.set_media(media)
+            media.release()
+            self._media_path = video_path
+
+        deadline = time.monotonic() + GRAB_TIMEOUT_S
+        state = self._player.get_state()
+        if state not in (vlc.State.Playing, vlc.State.Paused):
+            self._player.play()
+            while self._player.get_state() not in (vlc.State.Playing, vlc.State.Paused):
+                if token.cancelled:
+                    self._reset()
+                    return None
+                if self._player.get_state() == vlc.State.Error:
+                    log.debug("VLC could not open %s for grabbing", video_path)
+                    self._reset()
+                    raise UnreadableFile(video_path)
+                if time.monotonic() > deadline:
+                    log.debug("VLC did not start %s in time for grabbing", video_path)
+                    self._reset()
+                    return None
+                time.sleep(0.01)
+        self._player.set_pause(0)
+
+        self._frame_event.clear()
+        self._player.set_time(ms)
+        image = None
+        while time.monotonic() < deadline and not token.cancelled:
+            wait_s = min(CANCEL_POLL_S, max(0.0, deadline - time.monotonic()))
+            if not self._frame_event.wait(wait_s):
+                continue
+            self._frame_event.clear()
+            if abs(self._player.get_time() - ms) > SEEK_TOLERANCE_MS:
+                continue  # a frame from before the seek took effect
+            with self._frame_lock:
+                frame = self._frame
+            if frame is not None:
+                image = QImage(frame, width, height, width * 4, QImage.Format_RGBA8888).copy()
+            break
+        self._player.set_pause(1)
+        if image is None and not token.cancelled:
+            log.debug("VLC grab timed out for %s at %sms", video_path, ms)
+        return image
+
+    def _reset(self) -> None:
+        try:
+            self._player.stop()
+        except Exception:  # pragma: no cover - defensive
+            pass
+        self._media_path = None
+
+
+_grabber: Optional[VlcFrameGrabber] = None
+_grabber_failed = False
+_grabber_lock = threading.Lock()
+
+
+def shared_grabber() -> Optional[VlcFrameGrabber]:
+    """The process-wide grabber, or None when libvlc is unavailable."""
+    global _grabber, _grabber_failed
+    with _grabber_lock:
+        if _grabber is None and not _grabber_failed:
+            try:
+                import vlc  # type: ignore
+
+                _grabber = VlcFrameGrabber(vlc)
+            except Exception:  # pylint: disable=broad-exception-caught
+                log.info("In-process VLC frame grabber unavailable", exc_info=True)
+                _grabber_failed = True
+        return _grabber
+
+
+def release_shared_grabber() -> None:
+    global _grabber
+    with _grabber_lock:
+        if _grabber is not None:
+            _grabber.release()
+            _grabber = None
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import logging
+import os
+import shutil
+import time
+from array import array
+from pathlib import Path
+from typing import Optional
+
+from PySide6.QtCore import QThread, Signal
+
+from ..helpers import file_cache_key, user_cache_dir
+from .background import background_policy, lower_thread_priority
+from .cancellation import CancelToken
+from .fingerprint import content_fingerprint
+from .probe import cached_probe
+
+log = logging.getLogger(__name__)
+
+CACHE_SUFFIX = ".wf"
+# The overview has a fixed number of (min, max) buckets whatever the
+# length of the file; views resample it to their width.
+BUCKETS = 2048
+SAMPLE_RATE = 4000
+SAMPLES_PER_READ = 1 << 16
+# Partial overviews are published at most this often while computing.
+PROGRESS_INTERVAL_S = 0.5
+
+
+class Waveform:
+    """
+    Per-bucket minimum and maximum amplitude (-128..127) of one file; empty
+    for files without decodable audio.
+    """
+
+    def __init__(self, minima: array, maxima: array) -> None:
+        self.minima = minima
+        self.maxima = maxima
+
+    def __len__(self) -> int:
+        return len(self.maxima)
+
+    def tobytes(self) -> bytes:
+        return self.minima.tobytes() + self.maxima.tobytes()
+
+    @classmethod
+    def frombytes(cls, data: bytes) -> Optional["Waveform"]:
+        half = len(data) // 2
+        if len(data) % 2:
+            return None
+        return cls(array("b", data[:half]), array("b", data[half:]))
+
+
+def _cache_file(path: str) -> Optional[Path]:
+    key = content_fingerprint(path) or file_cache_key(path)
+    return user_cache_dir("waveforms") / (key + CACHE_SUFFIX) if key else None
+
+
+def load_waveform(path: str) -> Optional[Waveform]:
+    """
+    The cached overview of ``path`` (empty if it has no audio); a small
+    read, fine on the GUI thread.
+    """
+    cache_file = _cache_file(path)
+    if cache_file is None:
+        return None
+    try:
+        data = cache_file.read_bytes()
+    except OSError:
+        return None
+    return Waveform.frombytes(data)
+
+
+class WaveformWorker(QThread):
+    """
+    Streams downmixed low-rate PCM from ffmpeg and folds each chunk into
+    BUCKETS min/max pairs with NumPy, so memory stays flat however long the
+    file is. Partial overviews are emitted while it runs; the finished one
+    is cached.
+    """
+
+    waveform_ready = Signal(str, object, bool)  # path, Waveform, complete
+
+    def __init__(self, video_path: str):
+        super().__init__()
+        self.video_path = video_path
+        self._token = CancelToken(background=True)
+
+    def cancel(self):
+        self._token.cancel()
+
+    def stop(self):
+        self.cancel()
+        self.wait()
+
+    def run(self):
+        lower_thread_priority()
+        if not shutil.which("ffmpeg"):
+            return
+        info = cached_probe(self.video_path, self._token)
+        if self._token.cancelled:
+            return
+        if info is None or info.duration_ms <= 0:
+            # Cached as well, so undecodable files are not retried on every open.
+            waveform = Waveform(array("b"), array("b"))
+        else:
+            waveform = self._compute(info.duration_ms * SAMPLE_RATE // 1000)
+        if waveform is None:
+            return
+        cache_file = _cache_file(self.video_path)
+        if cache_file is not None:
+            # Written aside and renamed: a truncated file would read as empty.
+            tmp = cache_file.with_name(cache_file.name + ".tmp")
+            try:
+                tmp.write_bytes(waveform.tobytes())
+                os.replace(tmp, cache_file)
+            except OSError:
+                log.exception("Failed to cache waveform of %s", self.video_path)
+        self.waveform_ready.emit(self.video_path, waveform, True)
+
+    def _compute(self, expected_samples: int) -> Optional[Waveform]:
+        import numpy as np  # local import to keep module import fast
+
+        args = [
+            "ffmpeg", "-v", "error", "-nostdin", "-i", self.video_path,
+            "-vn", "-sn", "-dn", "-ac", "1", "-ar", str(SAMPLE_RATE), "-f", "s16le", "pipe:1",
+        ]
+        minima = np.zeros(BUCKETS, dtype=np.int16)
+        maxima = np.zeros(BUCKETS, dtype=np.int16)
+        position = 0
+        published = time.monotonic()
+        policy = background_policy()
+
+        def snapshot() -> Waveform:
+            return Waveform(
+                array("b", (minima >> 8).astype(np.int8).tobytes()),
+                array("b", (maxima >> 8).astype(np.int8).tobytes()),
+            )
+
+        try:
+            for chunk in self._token.stream(args, SAMPLES_PER_READ * 2):
+                samples = np.frombuffer(chunk[: len(chunk) // 2 * 2], dtype=np.int16)
+                if not len(samples):
+                    continue
+                # Bucket of every sample; the probed duration may be slightly
+                # short, so overflow lands in the last bucket.
+                buckets = np.arange(position, position + len(samples), dtype=np.int64) * BUCKETS
+                buckets //= max(1, expected_samples)
+                np.minimum(buckets, BUCKETS - 1, out=buckets)
+                position += len(samples)
+                starts = np.concatenate([[0], np.flatnonzero(np.diff(buckets)) + 1])
+                ids = buckets[starts]
+                minima[ids] = np.minimum(minima[ids], np.minimum.reduceat(samples, starts))
+                maxima[ids] = np.maximum(maxima[ids], np.maximum.reduceat(samples, starts))
+                if policy.checkpoint(self._token):
+                    return None
+                if time.monotonic() - published >= PROGRESS_INTERVAL_S:
+                    published = time.monotonic()
+                    self.waveform_ready.emit(self.video_path, snapshot(), False)
+        except OSError:
+            log.exception("Failed to spawn ffmpeg for the waveform of %s", self.video_path)
+            return None
+        if self._token.cancelled:
+            return None
+        if not position:
+            log.debug("No audio decoded from %s for the waveform", self.video_path)
+            return Waveform(array("b"), array("b"))
+        return snapshot()
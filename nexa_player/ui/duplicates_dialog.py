@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import os
+from typing import Optional
+
+from PySide6.QtCore import Qt
+from PySide6.QtWidgets import (
+    QApplication,
+    QDialog,
+    QHBoxLayout,
+    QLabel,
+    QPushButton,
+    QTreeWidget,
+    QTreeWidgetItem,
+    QVBoxLayout,
+)
+
+from ..helpers import format_duration
+from ..services.cancellation import retire_worker
+from ..services.duplicates import DuplicateScanWorker, HashedMedia
+
+
+class DuplicatesDialog(QDialog):
+    """
+    Scans a folder tree for re-encoded or copied videos and lists them in
+    groups. The chosen file is left in ``selected_file`` on accept.
+    """
+
+    def __init__(self, folder: str, parent=None):
+        super().__init__(parent)
+        self.selected_file: Optional[str] = None
+        self.setWindowTitle("Duplicate Videos")
+        self.setWindowFlags(self.windowFlags() | Qt.WindowStaysOnTopHint)
+        self.resize(760, 480)
+        self.setStyleSheet(
+            """
+            QDialog { background-color: #1e1e1e; color: #f0f0f0; font-family: Segoe UI; font-size: 11pt; }
+            QLabel { color: #ccc; }
+            QTreeWidget {
+                background-color: #2d2d2d; alternate-background-color: #3a3a3a; color: #f0f0f0;
+                selection-background-color: #0078d7; selection-color: #ffffff; border: none;
+            }
+            QHeaderView::section { background-color: #333; color: #ccc; padding: 4px; border: none; }
+            QPushButton { background-color: #0078d7; color: white; border-radius: 4px; padding: 6px 12px; }
+            QPushButton:hover { background-color: #2899f5; }
+            QPushButton:pressed { background-color: #005a9e; }
+            """
+        )
+
+        layout = QVBoxLayout(self)
+        self.status_label = QLabel(f"Scanning {folder}…")
+        layout.addWidget(self.status_label)
+
+        self.tree = QTreeWidget()
+        self.tree.setHeaderLabels(["Name", "Duration", "Size", "Folder"])
+        self.tree.setAlternatingRowColors(True)
+        self.tree.setColumnWidth(0, 300)
+        self.tree.itemDoubleClicked.connect(self._on_double_clicked)
+        layout.addWidget(self.tree)
+
+        btn_layout = QHBoxLayout()
+        self.open_btn = QPushButton("Open")
+        self.add_btn = QPushButton("Add to Playlist")
+        self.close_btn = QPushButton("Close")
+        btn_layout.addStretch()
+        btn_layout.addWidget(self.open_btn)
+        btn_layout.addWidget(self.add_btn)
+        btn_layout.addWidget(self.close_btn)
+        layout.addLayout(btn_layout)
+
+        self.open_btn.clicked.connect(self.accept)
+        self.add_btn.clicked.connect(self._add_selected_to_playlist)
+        self.close_btn.clicked.connect(self.reject)
+
+        self._worker: Optional[DuplicateScanWorker] = DuplicateScanWorker(folder)
+        self._worker.progress.connect(self._on_progress)
+        self._worker.groups_ready.connect(self._on_groups_ready)
+        self._worker.start()
+
+    def _on_progress(self, done: int, total: int) -> None:
+        self.status_label.setText(f"Comparing videos… {done} / {total}")
+
+    def _on_groups_ready(self, groups: list[list[HashedMedia]]) -> None:
+        self.tree.clear()
+        for number, group in enumerate(groups, 1):
+            parent = QTreeWidgetItem(self.tree, [f"Group {number} ({len(group)} files)"])
+            for media in group:
+                child = QTreeWidgetItem(
+                    parent,
+                    [
+                        os.path.basename(media.path),
+                        format_duration(media.duration_ms),
+                        f"{media.size / (1 << 20):.1f} MB",
+                        os.path.dirname(media.path),
+                    ],
+                )
+                child.setData(0, Qt.UserRole, media.path)
+                child.setToolTip(0, media.path)
+            parent.setExpanded(True)
+        if groups:
+            self.status_label.setText(f"{len(groups)} group(s) of likely duplicates")
+        else:
+            self.status_label.setText("No duplicates found")
+
+    def _selected_path(self) -> Optional[str]:
+        item = self.tree.currentItem()
+        return item.data(0, Qt.UserRole) if item is not None else None
+
+    def _on_double_clicked(self, item: QTreeWidgetItem, _column: int) -> None:
+        if item.data(0, Qt.UserRole):
+            self.accept()
+
+    def _add_selected_to_playlist(self) -> None:
+        app = QApplication.instance()
+        path = self._selected_path()
+        if path and hasattr(app, "add_to_playlist"):
+            app.add_to_playlist(path)
+
+    def done(self, result: int) -> None:
+        self.selected_file = self._selected_path() if result == QDialog.Accepted else None
+        if result == QDialog.Accepted and not self.selected_file:
+            return
+        retire_worker(self._worker)
+        self._worker = None
+        super().done(result)
@@ -5,7 +5,7 @@ import os
 from pathlib import Path
 from typing import Optional
 
-from PySide6.QtCore import QDir, QSize, Qt
+from PySide6.QtCore import QDir, QSize, Qt, QTimer
 from PySide6.QtGui import QIcon, QPixmap, QImage
 from PySide6.QtWidgets import (
     QApplication,
@@ -23,12 +23,31 @@ from PySide6.QtWidgets import (
     QFileSystemModel,
 )
 
-from ..services.thumbnails import ThumbnailListWorker
+from ..services.cancellation import retire_worker
+from ..services.image_cache import image_cache, image_key
+from ..services.probe import MediaInfo, MetadataScanWorker
+from ..services.thumbnails import (
+    EXTRACT_KEYFRAME,
+    LIST_THUMB_HEIGHT,
+    LIST_THUMB_MS,
+    LIST_THUMB_WIDTH,
+    PRIORITY_BACKGROUND,
+    PRIORITY_FAR,
+    PRIORITY_PREFETCH,
+    PRIORITY_VISIBLE,
+    ThumbnailListWorker,
+)
+from .duplicates_dialog import DuplicatesDialog
 
 log = logging.getLogger(__name__)
 
 VIDEO_EXTENSIONS = {".mp4", ".mkv", ".avi", ".mov", ".webm"}
 
+# Distances from the viewport, in viewport heights, used to rank grid
+# thumbnail jobs.
+PREFETCH_VIEWPORTS = 1.0
+FAR_VIEWPORTS = 4.0
+
 
 class FileLoader(QDialog):
     """
@@ -41,8 +60,11 @@ class FileLoader(QDialog):
         self.resize(830, 560)
         self.setWindowFlags(self.windowFlags() | Qt.WindowStaysOnTopHint)
 
-        self._thumb_cache: dict[str, QIcon] = {}
+        # Paths whose grid icon is already a real thumbnail.
+        self._thumbed: set[str] = set()
         self._thumb_thread: Optional[ThumbnailListWorker] = None
+        self._meta_thread: Optional[MetadataScanWorker] = None
+        self._grid_items: dict[str, QListWidgetItem] = {}
 
         layout = QVBoxLayout(self)
 
@@ -66,6 +88,10 @@ class FileLoader(QDialog):
         toggles.addWidget(self.btn_list_view)
         toggles.addWidget(self.btn_grid_view)
         toggles.addStretch()
+        self.btn_duplicates = QPushButton("Find Duplicates")
+        self.btn_duplicates.setToolTip("Look for copies of the same video under this folder")
+        self.btn_duplicates.clicked.connect(self.find_duplicates)
+        toggles.addWidget(self.btn_duplicates)
         layout.addLayout(toggles)
 
         self.model = QFileSystemModel()
@@ -98,6 +124,12 @@ class FileLoader(QDialog):
         self.grid.hide()
         self.grid.itemDoubleClicked.connect(self._on_grid_double_clicked)
 
+        self._priority_timer = QTimer(self)
+        self._priority_timer.setSingleShot(True)
+        self._priority_timer.setInterval(50)
+        self._priority_timer.timeout.connect(self._update_thumb_priorities)
+        self.grid.verticalScrollBar().valueChanged.connect(self._schedule_thumb_priorities)
+
         layout.addWidget(self.view)
         layout.addWidget(self.grid)
 
@@ -152,9 +184,10 @@ class FileLoader(QDialog):
     # Slots
 
     def _stop_thumb_thread(self) -> None:
-        if self._thumb_thread:
-            self._thumb_thread.stop()
-            self._thumb_thread = None
+        retire_worker(self._thumb_thread)
+        self._thumb_thread = None
+        retire_worker(self._meta_thread)
+        self._meta_thread = None
 
     def _switch_mode(self, list_mode: bool) -> None:
         self.btn_list_view.setChecked(list_mode)
@@ -168,9 +201,16 @@ class FileLoader(QDialog):
             current_path = self.path_edit.text() or QDir.homePath()
             self._populate_grid(current_path)
 
+    def resizeEvent(self, event) -> None:
+        super().resizeEvent(event)
+        self._schedule_thumb_priorities()
+
     def _populate_grid(self, folder_path: str) -> None:
         self.grid.clear()
+        self._grid_items = {}
+        self._thumbed = set()
         if not folder_path or not os.path.isdir(folder_path):
+            self._stop_thumb_thread()
             return
 
         try:
@@ -180,6 +220,7 @@ class FileLoader(QDialog):
             entries = []
 
         entries.sort(key=lambda x: x.lower())
+        video_paths: list[str] = []
         for entry in entries:
             full_path = os.path.normpath(os.path.join(folder_path, entry))
             item = QListWidgetItem(entry)
@@ -193,24 +234,85 @@ class FileLoader(QDialog):
                 continue
 
             if any(entry.lower().endswith(ext) for ext in VIDEO_EXTENSIONS):
-                placeholder = QIcon(self.style().standardIcon(QStyle.SP_FileIcon))
-                item.setIcon(placeholder)
+                cached = image_cache().get(
+                    image_key(full_path, LIST_THUMB_MS, LIST_THUMB_WIDTH, LIST_THUMB_HEIGHT)
+                )
+                if cached is not None:
+                    item.setIcon(self._thumb_icon(cached))
+                    self._thumbed.add(full_path)
+                else:
+                    item.setIcon(QIcon(self.style().standardIcon(QStyle.SP_FileIcon)))
+                    video_paths.append(full_path)
                 item.setData(Qt.UserRole, full_path)
                 self.grid.addItem(item)
+                self._grid_items[full_path] = item
 
-        self._start_thumb_thread(folder_path)
+        self._start_thumb_thread(folder_path, video_paths)
+        self._start_meta_thread(list(self._grid_items))
 
-    def _start_thumb_thread(self, folder_path: str) -> None:
-        if self._thumb_thread:
-            self._thumb_thread.stop()
-            self._thumb_thread = None
-        self._thumb_thread = ThumbnailListWorker(folder_path)
+    def _start_thumb_thread(self, folder_path: str, paths: list[str]) -> None:
+        retire_worker(self._thumb_thread)
+        self._thumb_thread = None
+        if not paths:
+            return
+        state = getattr(QApplication.instance(), "state", None)
+        mode = state.get_thumbnail_mode() if state is not None else EXTRACT_KEYFRAME
+        self._thumb_thread = ThumbnailListWorker(folder_path, paths=paths, mode=mode)
         self._thumb_thread.thumb_ready.connect(self._apply_item_thumb)
+        self._update_thumb_priorities()
         self._thumb_thread.start()
+        # Item geometry is only final after the next layout pass.
+        self._schedule_thumb_priorities()
 
-    def _apply_item_thumb(self, file_path: str, image: QImage) -> None:
-        if file_path in self._thumb_cache:
-            return
+    def _start_meta_thread(self, paths: list[str]) -> None:
+        retire_worker(self._meta_thread)
+        self._meta_thread = None
+        if not paths:
+            return
+        self._meta_thread = MetadataScanWorker(paths)
+        self._meta_thread.probed.connect(self._apply_item_meta)
+        self._meta_thread.start()
+
+    def _apply_item_meta(self, info: MediaInfo) -> None:
+        item = self._grid_items.get(os.path.normpath(info.path))
+        if item is not None:
+            item.setToolTip(f"{os.path.basename(info.path)}\n{info.summary()}")
+
+    def _schedule_thumb_priorities(self) -> None:
+        if self._thumb_thread is not None:
+            self._priority_timer.start()
+
+    def _update_thumb_priorities(self) -> None:
+        """
+        Rank pending thumbnails by distance from the grid viewport: visible
+        tiles first, then a prefetch margin, then the rest. Tiles far off
+        screen get their in-flight jobs cancelled.
+        """
+        if self._thumb_thread is None or not self.grid.isVisible():
+            return
+        viewport = self.grid.viewport().rect()
+        height = max(1, viewport.height())
+        priorities: dict[str, int] = {}
+        for path, item in self._grid_items.items():
+            if path in self._thumbed:
+                continue
+            rect = self.grid.visualItemRect(item)
+            if rect.intersects(viewport):
+                priorities[path] = PRIORITY_VISIBLE
+                continue
+            if rect.bottom() < viewport.top():
+                distance = (viewport.top() - rect.bottom()) / height
+            else:
+                distance = (rect.top() - viewport.bottom()) / height
+            if distance <= PREFETCH_VIEWPORTS:
+                priorities[path] = PRIORITY_PREFETCH
+            elif distance <= FAR_VIEWPORTS:
+                priorities[path] = PRIORITY_BACKGROUND
+            else:
+                priorities[path] = PRIORITY_FAR
+        self._thumb_thread.prioritize(priorities)
+
+    def _thumb_icon(self, image: QImage) -> QIcon:
         icon_size = self.grid.iconSize()
         if image.isNull():
             pix = QPixmap(icon_size.width(), icon_size.height())
@@ -219,20 +321,22 @@ class FileLoader(QDialog):
             pix = QPixmap.fromImage(
                 image.scaled(icon_size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
             )
+        return QIcon(pix)
 
-        icon = QIcon(pix)
-        normalized = os.path.normpath(file_path)
-        self._thumb_cache[normalized] = icon
-        log.debug("Applied thumbnail for %s (norm=%s, grid count=%s)", file_path, normalized, self.grid.count())
-        for row in range(self.grid.count()):
-            item = self.grid.item(row)
-            item_path = item.data(Qt.UserRole)
-            log.debug("Comparing grid item path %s to %s", item_path, normalized)
-            if os.path.normpath(item_path) == normalized:
-                item.setIcon(icon)
-                log.debug("Updated QListWidgetItem icon for %s (isNull=%s)", file_path, item.icon().isNull())
-                break
-        self.grid.viewport().update()
+    def _apply_item_thumb(self, file_path: str, image: QImage) -> None:
+        normalized = os.path.normpath(file_path)
+        if normalized in self._thumbed:
+            return
+        if not image.isNull():
+            image_cache().put(
+                image_key(normalized, LIST_THUMB_MS, LIST_THUMB_WIDTH, LIST_THUMB_HEIGHT), image
+            )
+        icon = self._thumb_icon(image)
+        self._thumbed.add(normalized)
+        item = self._grid_items.get(normalized)
+        if item is not None:
+            item.setIcon(icon)
+            log.debug("Updated QListWidgetItem icon for %s", file_path)
 
     def _save_last_dir(self, path: str) -> None:
         if self._settings is not None:
@@ -345,6 +449,17 @@ class FileLoader(QDialog):
         super().accept()
         self._stop_thumb_thread()
 
+    def find_duplicates(self) -> None:
+        folder = self.path_edit.text()
+        if not os.path.isdir(folder):
+            return
+        dlg = DuplicatesDialog(folder, self)
+        if dlg.exec() and dlg.selected_file:
+            self.selected_file = dlg.selected_file
+            self._save_last_dir(os.path.dirname(dlg.selected_file))
+            self._stop_thumb_thread()
+            super().accept()
+
     def reject(self) -> None:
         self._stop_thumb_thread()
         super().reject()
@@ -178,6 +178,11 @@ class PlayerWindow(QWidget):
             self.volume_slider.setStyleSheet("QSlider::groove:horizontal { border: 1px solid #004f9e; height: 6px; background: #ffffff; } QSlider::handle:horizontal { background: #0078d7; width: 12px; margin: -4px 0; border-radius: 6px; }")
             )
 
+        # Shown by the app while playback is inside a detected intro.
+        self.skip_intro_btn = QPushButton("Skip Intro")
+        self.skip_intro_btn.setStyleSheet(btn_style + "QPushButton { color: white; }")
+        self.skip_intro_btn.hide()
+
         self.time_label = QLabel("--:-- / --:--")
         self.time_label.setStyleSheet("color: white; font-weight: bold;")
 
@@ -194,6 +199,7 @@ class PlayerWindow(QWidget):
         controls_row.addWidget(self.playlist_btn)
         if self.volume_slider:
             controls_row.addWidget(self.volume_slider)
+        controls_row.addWidget(self.skip_intro_btn)
         controls_row.addWidget(self.time_label)
 
         self.hud_container = QWidget(self)
@@ -218,7 +224,8 @@ class PlayerWindow(QWidget):
         self.open_btn.clicked.connect(lambda: QApplication.instance().open_file())
         self.prev_btn.clicked.connect(lambda: QApplication.instance().previous_track())
         self.next_btn.clicked.connect(lambda: QApplication.instance().next_track())
-        self.position.sliderMoved.connect(lambda v: QApplication.instance().set_position(v))
+        self.skip_intro_btn.clicked.connect(lambda: QApplication.instance().skip_intro())
+        self.position.sliderMoved.connect(lambda v: QApplication.instance().set_position(v, snap=True))
         self.position.sliderReleased.connect(lambda: QApplication.instance().set_position(self.position.value()))
         if self.volume_slider:
             self.volume_slider.valueChanged.connect(lambda v: QApplication.instance().set_volume(v))
@@ -361,6 +368,21 @@ class PlayerWindow(QWidget):
         act_right.triggered.connect(lambda: QApplication.instance().seek(5000))
         self.addAction(act_right)
 
+        act_next_scene = QAction(self)
+        act_next_scene.setShortcut(Qt.Key_PageDown)
+        act_next_scene.triggered.connect(lambda: QApplication.instance().next_scene())
+        self.addAction(act_next_scene)
+
+        act_prev_scene = QAction(self)
+        act_prev_scene.setShortcut(Qt.Key_PageUp)
+        act_prev_scene.triggered.connect(lambda: QApplication.instance().previous_scene())
+        self.addAction(act_prev_scene)
+
+        act_skip_intro = QAction(self)
+        act_skip_intro.setShortcut(Qt.Key_S)
+        act_skip_intro.triggered.connect(lambda: QApplication.instance().skip_intro())
+        self.addAction(act_skip_intro)
+
         if self.is_broadcast:
             act_plus = QAction(self)
             act_plus.setShortcut(Qt.Key_Plus)
@@ -4,12 +4,15 @@ import os
 from pathlib import Path
 from typing import Callable, Iterable, List, Optional
 
-from PySide6.QtCore import Qt
+from PySide6.QtCore import QSize, Qt, QTimer
+from PySide6.QtGui import QIcon, QImage, QPixmap
 from PySide6.QtWidgets import (
     QAbstractItemView,
+    QApplication,
     QDialog,
     QFileDialog,
     QHBoxLayout,
+    QLabel,
     QListWidget,
     QListWidgetItem,
     QPushButton,
@@ -17,9 +20,23 @@ from PySide6.QtWidgets import (
     QVBoxLayout,
 )
 
+from ..helpers import format_duration
+from ..services.cancellation import retire_worker
+from ..services.image_cache import image_cache, image_key
 from ..services.playlist_io import load_playlist, save_playlist
+from ..services.probe import MediaInfo, MetadataScanWorker
+from ..services.thumbnails import (
+    EXTRACT_KEYFRAME,
+    LIST_THUMB_HEIGHT,
+    LIST_THUMB_MS,
+    LIST_THUMB_WIDTH,
+    ThumbnailListWorker,
+)
 from .file_loader import FileLoader
 
+ICON_SIZE = QSize(LIST_THUMB_WIDTH // 2, LIST_THUMB_HEIGHT // 2)
+SUMMARY_REFRESH_MS = 1000
+
 
 class PlaylistDialog(QDialog):
     """
@@ -35,6 +52,9 @@ class PlaylistDialog(QDialog):
         super().__init__(parent)
         self.play_callback = play_callback
         self._started_playback = False
+        self._thumb_thread: Optional[ThumbnailListWorker] = None
+        self._meta_thread: Optional[MetadataScanWorker] = None
+        self._durations: dict[str, int] = {}
         self.setWindowFlags(self.windowFlags() | Qt.WindowStaysOnTopHint)
         self.setWindowTitle("Playlist")
         self.setMinimumSize(480, 360)
@@ -43,6 +63,7 @@ class PlaylistDialog(QDialog):
             QDialog { background-color: #1e1e1e; }
             QListWidget { background-color: #2b2b2b; color: white; border: 1px solid #444; padding: 4px; }
             QListWidget::item:selected { background-color: #00bfff; color: black; }
+            QLabel { color: #ccc; }
             QPushButton { background-color: #333; border: 1px solid #555; border-radius: 4px; padding: 6px 12px; color: white; }
             QPushButton:hover { background-color: #444; }
             """
@@ -53,13 +74,25 @@ class PlaylistDialog(QDialog):
         self.list_widget = QListWidget()
         self.list_widget.setSelectionMode(QAbstractItemView.SingleSelection)
         self.list_widget.setDragDropMode(QAbstractItemView.InternalMove)
+        self.list_widget.setIconSize(ICON_SIZE)
         layout.addWidget(self.list_widget)
 
+        self.summary_label = QLabel()
+        layout.addWidget(self.summary_label)
+        # Remaining time follows playback; probes arriving in bursts are
+        # coalesced into one summary update.
+        self._summary_timer = QTimer(self)
+        self._summary_timer.setInterval(SUMMARY_REFRESH_MS)
+        self._summary_timer.timeout.connect(self._update_summary)
+        self._summary_timer.start()
+
         for path in playlist:
             if isinstance(path, str) and os.path.exists(path):
-                self.list_widget.addItem(path)
+                self._add_path(path)
         if self.list_widget.count() > 0:
             self.list_widget.setCurrentRow(0)
+        self._refresh_thumbnails()
+        self._update_summary()
 
         controls = QHBoxLayout()
 
@@ -92,7 +125,98 @@ class PlaylistDialog(QDialog):
         return button
 
     def get_playlist(self) -> List[str]:
-        return [self.list_widget.item(i).text() for i in range(self.list_widget.count())]
+        return [self._item_path(self.list_widget.item(i)) for i in range(self.list_widget.count())]
+
+    @staticmethod
+    def _item_path(item: QListWidgetItem) -> str:
+        return item.data(Qt.UserRole)
+
+    def _add_path(self, path: str) -> None:
+        item = QListWidgetItem()
+        item.setData(Qt.UserRole, path)
+        item.setToolTip(path)
+        self._set_item_text(item, path)
+        self.list_widget.addItem(item)
+
+    def _set_item_text(self, item: QListWidgetItem, path: str) -> None:
+        name = os.path.basename(path)
+        duration = self._durations.get(path)
+        item.setText(f"{name}    {format_duration(duration)}" if duration else name)
+
+    def _update_summary(self) -> None:
+        paths = self.get_playlist()
+        total = sum(self._durations.get(p, 0) for p in paths)
+        known = sum(1 for p in paths if p in self._durations)
+        remaining = total
+        app = QApplication.instance()
+        current = getattr(app, "video_path", None)
+        if current in paths:
+            index = paths.index(current)
+            try:
+                position = max(0, app.mediaplayer.get_time())
+            except Exception:  # pylint: disable=broad-exception-caught
+                position = 0
+            remaining = sum(self._durations.get(p, 0) for p in paths[index:]) - position
+        text = f"{len(paths)} items · total {format_duration(total)} · remaining {format_duration(remaining)}"
+        if known < len(paths):
+            text += f" · probing {len(paths) - known}…"
+        self.summary_label.setText(text)
+
+    def _refresh_thumbnails(self) -> None:
+        """Show cached thumbnails and decode the missing ones in the background."""
+        cache = image_cache()
+        missing: list[str] = []
+        for row in range(self.list_widget.count()):
+            item = self.list_widget.item(row)
+            path = self._item_path(item)
+            image = cache.get(image_key(path, LIST_THUMB_MS, LIST_THUMB_WIDTH, LIST_THUMB_HEIGHT))
+            if image is not None:
+                self._apply_thumb(path, image)
+            elif path not in missing:
+                item.setIcon(self.style().standardIcon(QStyle.SP_FileIcon))
+                missing.append(path)
+        retire_worker(self._thumb_thread)
+        self._thumb_thread = None
+        retire_worker(self._meta_thread)
+        self._meta_thread = MetadataScanWorker(self.get_playlist())
+        self._meta_thread.probed.connect(self._on_meta_ready)
+        self._meta_thread.start()
+        if not missing:
+            return
+        state = getattr(QApplication.instance(), "state", None)
+        mode = state.get_thumbnail_mode() if state is not None else EXTRACT_KEYFRAME
+        self._thumb_thread = ThumbnailListWorker("", paths=missing, mode=mode)
+        self._thumb_thread.thumb_ready.connect(self._on_thumb_ready)
+        self._thumb_thread.start()
+
+    def _on_thumb_ready(self, path: str, image: QImage) -> None:
+        if self.sender() is not self._thumb_thread:
+            return
+        if not image.isNull():
+            image_cache().put(
+                image_key(path, LIST_THUMB_MS, LIST_THUMB_WIDTH, LIST_THUMB_HEIGHT), image
+            )
+        self._apply_thumb(path, image)
+
+    def _on_meta_ready(self, info: MediaInfo) -> None:
+        if info.duration_ms > 0:
+            self._durations[info.path] = info.duration_ms
+        for row in range(self.list_widget.count()):
+            item = self.list_widget.item(row)
+            if self._item_path(item) == info.path:
+                item.setToolTip(f"{info.path}\n{info.summary()}")
+                self._set_item_text(item, info.path)
+
+    def _apply_thumb(self, path: str, image: QImage) -> None:
+        if image.isNull():
+            return
+        icon = QIcon(
+            QPixmap.fromImage(image.scaled(ICON_SIZE, Qt.KeepAspectRatio, Qt.SmoothTransformation))
+        )
+        for row in range(self.list_widget.count()):
+            item = self.list_widget.item(row)
+            if self._item_path(item) == path:
+                item.setIcon(icon)
 
     # ------------------------------------------------------------------
     # Actions
@@ -102,12 +226,12 @@ class PlaylistDialog(QDialog):
         if dlg.exec() == QDialog.Accepted:
             file = dlg.get_selected_file()
             if file and os.path.exists(file):
-                existing = [self.list_widget.item(i).text() for i in range(self.list_widget.count())]
-                if file not in existing:
+                if file not in self.get_playlist():
                     was_empty = self.list_widget.count() == 0
-                    self.list_widget.addItem(file)
+                    self._add_path(file)
                     if was_empty:
                         self.list_widget.setCurrentRow(0)
+                    self._refresh_thumbnails()
 
     def remove_selected(self) -> None:
         row = self.list_widget.currentRow()
@@ -121,11 +245,9 @@ class PlaylistDialog(QDialog):
             item = self.list_widget.currentItem()
         if not item:
             return
-        path = item.text()
+        path = self._item_path(item)
         if not (path and os.path.exists(path)):
             return
-        from PySide6.QtWidgets import QApplication
-
         app = QApplication.instance()
         if hasattr(app, "playlist"):
             app.playlist = self.get_playlist()
@@ -133,9 +255,14 @@ class PlaylistDialog(QDialog):
         self.play_callback(path)
         self.accept()
 
-    def accept(self) -> None:
-        from PySide6.QtWidgets import QApplication
+    def done(self, result: int) -> None:
+        retire_worker(self._thumb_thread)
+        self._thumb_thread = None
+        retire_worker(self._meta_thread)
+        self._meta_thread = None
+        super().done(result)
 
+    def accept(self) -> None:
         app = QApplication.instance()
         is_playing = False
         try:
@@ -143,7 +270,7 @@ class PlaylistDialog(QDialog):
         except Exception:
             is_playing = False
         if (not self._started_playback) and (self.list_widget.count() > 0) and (not is_playing):
-            first = self.list_widget.item(0).text()
+            first = self._item_path(self.list_widget.item(0))
             if first and os.path.exists(first):
                 app.playlist = self.get_playlist()
                 self.play_callback(first)
@@ -173,6 +300,7 @@ class PlaylistDialog(QDialog):
         self.list_widget.clear()
         for item in items:
             if os.path.exists(item):
-                self.list_widget.addItem(item)
+                self._add_path(item)
         if self.list_widget.count() > 0:
             self.list_widget.setCurrentRow(0)
+        self._refresh_thumbnails()
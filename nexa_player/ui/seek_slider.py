@@ -1,10 +1,24 @@
 from __future__ import annotations
 
-from PySide6.QtCore import QPoint, Qt
-from PySide6.QtGui import QColor, QFont, QImage, QMouseEvent, QPainter, QPixmap
+from collections import OrderedDict
+from typing import Iterable, Optional
+
+from PySide6.QtCore import QPoint, QRect, Qt, QTimer
+from PySide6.QtGui import QColor, QFont, QMouseEvent, QPainter, QPainterPath, QPen, QPixmap
 from PySide6.QtWidgets import QApplication, QLabel, QSlider, QStyle
 
 from ..helpers import ms_to_minsec
+from ..services.timeline import TimelineIndex
+from ..services.waveform import Waveform
+
+# Hover time before an exact frame is requested, and how far the nearest
+# precomputed thumbnail may be from the cursor before one is needed.
+EXACT_FRAME_DELAY_MS = 100
+EXACT_FRAME_TOLERANCE_MS = 1000
+# Rendered previews (thumbnail + time label) kept for repeated hovers.
+PREVIEW_CACHE_SIZE = 64
+MARKER_COLOR = QColor(255, 255, 255, 150)
+WAVEFORM_COLOR = QColor(0, 191, 255, 90)
 
 
 class SeekSlider(QSlider):
@@ -20,6 +34,74 @@ class SeekSlider(QSlider):
         self.preview_label.setAttribute(Qt.WA_TransparentForMouseEvents)
         self.preview_label.hide()
 
+        self._hover_time: Optional[int] = None
+        self._hover_pos = QPoint()
+        self._exact_timer = QTimer(self)
+        self._exact_timer.setSingleShot(True)
+        self._exact_timer.setInterval(EXACT_FRAME_DELAY_MS)
+        self._exact_timer.timeout.connect(self._request_exact_frame)
+
+        self._preview_cache: OrderedDict[tuple, QPixmap] = OrderedDict()
+        self._preview_index: Optional[TimelineIndex] = None
+        self._label_font = QFont("Arial", 10, QFont.Bold)
+        self._markers: list[int] = []
+        self._waveform: Optional[Waveform] = None
+        self._waveform_pix: Optional[QPixmap] = None
+
+    def set_markers(self, times_ms: Iterable[int]) -> None:
+        """Tick marks (e.g. scene starts) drawn across the groove."""
+        self._markers = list(times_ms)
+        self.update()
+
+    def set_waveform(self, waveform: Optional[Waveform]) -> None:
+        """Audio overview drawn behind the groove; may be replaced as it fills in."""
+        self._waveform = waveform
+        self._waveform_pix = None
+        self.update()
+
+    def _render_waveform(self) -> Optional[QPixmap]:
+        waveform = self._waveform
+        if waveform is None or not len(waveform) or self.width() <= 0:
+            return None
+        if self._waveform_pix is not None and self._waveform_pix.size() == self.size():
+            return self._waveform_pix
+        pix = QPixmap(self.size())
+        pix.fill(Qt.transparent)
+        painter = QPainter(pix)
+        painter.setPen(QPen(WAVEFORM_COLOR, 1))
+        count, width, middle = len(waveform), self.width(), self.height() / 2
+        # Quiet files still fill the bar.
+        scale = middle / max(1, max(waveform.maxima), -min(waveform.minima))
+        for x in range(width):
+            lo = x * count // width
+            hi = max(lo + 1, (x + 1) * count // width)
+            top = max(waveform.maxima[lo:hi])
+            bottom = min(waveform.minima[lo:hi])
+            painter.drawLine(x, int(middle - top * scale), x, int(middle - bottom * scale))
+        painter.end()
+        self._waveform_pix = pix
+        return pix
+
+    def paintEvent(self, event):
+        waveform = self._render_waveform()
+        if waveform is not None:
+            painter = QPainter(self)
+            painter.drawPixmap(0, 0, waveform)
+            painter.end()
+        super().paintEvent(event)
+        duration_ms = getattr(QApplication.instance(), "video_duration_ms", None)
+        if not self._markers or not duration_ms:
+            return
+        painter = QPainter(self)
+        painter.setPen(QPen(MARKER_COLOR, 1))
+        top, bottom = self.height() // 2 - 3, self.height() // 2 + 3
+        span = self.maximum() - self.minimum()
+        for time_ms in self._markers:
+            value = self.minimum() + int(time_ms * span / duration_ms)
+            x = QStyle.sliderPositionFromValue(self.minimum(), self.maximum(), value, self.width())
+            painter.drawLine(x, top, x, bottom)
+        painter.end()
+
     def mousePressEvent(self, event: QMouseEvent):
         if event.button() == Qt.LeftButton:
             x = event.pos().x()
@@ -34,7 +116,6 @@ class SeekSlider(QSlider):
         app = QApplication.instance()
         video_path = getattr(app, "video_path", None)
         duration_ms = getattr(app, "video_duration_ms", None)
-        cache = getattr(app, "thumbnail_cache", {})
         if not video_path or not duration_ms:
             return
         x = event.pos().x()
@@ -42,50 +123,90 @@ class SeekSlider(QSlider):
             self.minimum(), self.maximum(), x, self.width()
         )
         preview_time = int((value / 1000.0) * duration_ms)
-        pix = self._pick_preview_image(cache, preview_time)
-        if pix is None:
+        self._hover_pos = self.mapToGlobal(event.pos())
+        if preview_time != self._hover_time:
+            self._hover_time = preview_time
+            self._schedule_exact_frame(app, preview_time)
+        if not self._show_preview(preview_time):
             return
-        pix = self._draw_time(pix, preview_time)
-        self.preview_label.setPixmap(pix)
-        self.preview_label.adjustSize()
-        global_pos = self.mapToGlobal(event.pos())
-        self.preview_label.move(
-            global_pos + QPoint(-pix.width() // 2, -pix.height() - 10)
-        )
-        self.preview_label.show()
         super().mouseMoveEvent(event)
 
     def leaveEvent(self, event):
+        self._hover_time = None
+        self._exact_timer.stop()
+        app = QApplication.instance()
+        if hasattr(app, "cancel_exact_frame"):
+            app.cancel_exact_frame()
         self.preview_label.hide()
         super().leaveEvent(event)
 
-    @staticmethod
-    def _pick_preview_image(cache: dict[int, QImage | QPixmap], preview_time: int):
-        if not cache:
-            placeholder = QPixmap(96, 54)
-            placeholder.fill(Qt.black)
-            return placeholder
-        nearest = min(cache.keys(), key=lambda k: abs(k - preview_time))
-        image = cache[nearest]
-        if isinstance(image, QPixmap):
-            return image
-        return QPixmap.fromImage(image)
-
-    @staticmethod
-    def _draw_time(pix: QPixmap, preview_time: int) -> QPixmap:
-        image = pix.toImage()
-        painter = QPainter(image)
+    def refresh_preview(self, time_ms: int) -> None:
+        """Redraw the visible preview if ``time_ms`` is what it is pointing at."""
+        if self._hover_time is None or not self.preview_label.isVisible():
+            return
+        if abs(time_ms - self._hover_time) <= EXACT_FRAME_TOLERANCE_MS:
+            self._show_preview(self._hover_time)
+
+    def _show_preview(self, preview_time: int) -> bool:
+        pix = self._render_preview(preview_time)
+        if pix is None:
+            return False
+        if self.preview_label.pixmap().cacheKey() != pix.cacheKey():
+            self.preview_label.setPixmap(pix)
+            self.preview_label.adjustSize()
+        self.preview_label.move(
+            self._hover_pos + QPoint(-pix.width() // 2, -pix.height() - 10)
+        )
+        self.preview_label.show()
+        return True
+
+    def _schedule_exact_frame(self, app, preview_time: int) -> None:
+        # Any earlier request is for a position the pointer has left.
+        if hasattr(app, "cancel_exact_frame"):
+            app.cancel_exact_frame()
+        index = getattr(app, "thumbnail_cache", None)
+        nearest = index.nearest(preview_time) if index is not None else None
+        if nearest is not None and abs(nearest - preview_time) <= EXACT_FRAME_TOLERANCE_MS:
+            self._exact_timer.stop()
+            return
+        self._exact_timer.start()
+
+    def _request_exact_frame(self) -> None:
+        app = QApplication.instance()
+        if self._hover_time is not None and hasattr(app, "request_exact_frame"):
+            app.request_exact_frame(self._hover_time)
+
+    def _render_preview(self, preview_time: int) -> Optional[QPixmap]:
+        index = getattr(QApplication.instance(), "thumbnail_cache", None)
+        if index is not self._preview_index:
+            self._preview_cache.clear()
+            self._preview_index = index
+        nearest = index.nearest(preview_time) if index is not None else None
         text = ms_to_minsec(preview_time)
-        painter.setFont(QFont("Arial", 10, QFont.Bold))
-        painter.setPen(QColor("black"))
-        for dx in (-1, 0, 1):
-            for dy in (-1, 0, 1):
-                if dx == 0 and dy == 0:
-                    continue
-                painter.drawText(
-                    5 + dx, image.height() - 5 + dy, text
-                )
-        painter.setPen(QColor("white"))
-        painter.drawText(5, image.height() - 5, text)
+        key = (nearest, text, index.revision if index is not None else 0)
+        pix = self._preview_cache.get(key)
+        if pix is not None:
+            self._preview_cache.move_to_end(key)
+            return pix
+        tile = index.tile(nearest) if nearest is not None else None
+        if tile is None:
+            source = QPixmap(96, 54)
+            source.fill(Qt.black)
+            tile = (source, source.rect())
+        pix = self._compose(tile[0], tile[1], text)
+        self._preview_cache[key] = pix
+        if len(self._preview_cache) > PREVIEW_CACHE_SIZE:
+            self._preview_cache.popitem(last=False)
+        return pix
+
+    def _compose(self, source: QPixmap, rect: QRect, text: str) -> QPixmap:
+        pix = QPixmap(rect.size())
+        painter = QPainter(pix)
+        painter.drawPixmap(pix.rect(), source, rect)
+        path = QPainterPath()
+        path.addText(5, pix.height() - 5, self._label_font, text)
+        painter.setRenderHint(QPainter.Antialiasing, True)
+        painter.strokePath(path, QPen(QColor("black"), 2))
+        painter.fillPath(path, QColor("white"))
         painter.end()
-        return QPixmap.fromImage(image)
+        return pix
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from nexa_player.services.intro import SAMPLE_RATE, fingerprint_samples, match_intro
+
+TOLERANCE_MS = 500
+
+
+def _music(seed, seconds):
+    # Three random tones per 125 ms note: dense, distinct spectral peaks.
+    rng = np.random.default_rng(seed)
+    note = np.arange(SAMPLE_RATE // 8) / SAMPLE_RATE
+    notes = [
+        sum(np.sin(2 * np.pi * f * note) for f in rng.uniform(100, 3500, 3)) * rng.uniform(0.3, 1.0)
+        for _ in range(int(seconds * 8))
+    ]
+    signal = np.concatenate(notes) + rng.normal(0, 0.05, len(notes) * len(note))
+    return (signal / np.abs(signal).max() * 12000).astype(np.int16)
+
+
+def _noise(seed, seconds):
+    rng = np.random.default_rng(seed)
+    return rng.normal(0, 3000, int(seconds * SAMPLE_RATE)).clip(-32000, 32000).astype(np.int16)
+
+
+def _assert_span(span, start_ms, end_ms):
+    assert abs(span[0] - start_ms) <= TOLERANCE_MS, span
+    assert abs(span[1] - end_ms) <= TOLERANCE_MS, span
+
+
+@pytest.mark.parametrize("content", [_music, _noise])
+def test_shared_intro_boundaries(content):
+    intro = _music(1, 30)
+    ep1 = np.concatenate([content(2, 5), intro, content(3, 20)])
+    ep2 = np.concatenate([content(4, 10), intro, content(5, 20)])
+
+    match = match_intro(fingerprint_samples(ep1), fingerprint_samples(ep2))
+
+    assert match is not None
+    span1, span2, _votes = match
+    _assert_span(span1, 5000, 35000)
+    _assert_span(span2, 10000, 40000)
+
+
+def test_unrelated_episodes_have_no_intro():
+    ep1, ep2 = _music(7, 60), _music(8, 60)
+    assert match_intro(fingerprint_samples(ep1), fingerprint_samples(ep2)) is None
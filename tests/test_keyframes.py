@@ -0,0 +1,54 @@
+import struct
+from array import array
+
+from nexa_player.helpers import user_cache_dir
+from nexa_player.services import keyframes
+from nexa_player.services.fingerprint import content_fingerprint
+
+
+def _video(tmp_path, monkeypatch, name):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    monkeypatch.setenv("LOCALAPPDATA", str(tmp_path / "cache"))
+    video = tmp_path / name
+    video.write_bytes(name.encode() * 4096)
+    key = content_fingerprint(str(video))
+    return str(video), user_cache_dir("keyframes") / (key + keyframes.CACHE_SUFFIX)
+
+
+def test_truncated_cache_is_rebuilt(tmp_path, monkeypatch):
+    video, cache_file = _video(tmp_path, monkeypatch, "truncated.mp4")
+    cache_file.write_bytes(array("q", [0, 2000]).tobytes()[:12])
+    monkeypatch.setattr(keyframes, "read_keyframes", lambda path: array("q", [0, 2000, 4000]))
+
+    index = keyframes.keyframe_index(video)
+
+    assert index is not None and list(index.times) == [0, 2000, 4000]
+    assert cache_file.read_bytes() == array("q", [0, 2000, 4000]).tobytes()
+    assert not list(cache_file.parent.glob("*.tmp"))
+
+
+def test_valid_cache_is_used(tmp_path, monkeypatch):
+    video, cache_file = _video(tmp_path, monkeypatch, "cached.mkv")
+    cache_file.write_bytes(array("q", [0, 5000]).tobytes())
+
+    def unexpected(path):
+        raise AssertionError("container read despite a valid cache")
+
+    monkeypatch.setattr(keyframes, "read_keyframes", unexpected)
+
+    assert list(keyframes.keyframe_index(video).times) == [0, 5000]
+
+
+def _box(kind, payload=b""):
+    return struct.pack(">I4s", 8 + len(payload), kind.encode()) + payload
+
+
+def test_mp4_with_empty_stss_has_no_index(tmp_path):
+    stbl = _box("stbl", _box("stss", bytes(8)) + _box("stts", bytes(8)))
+    mdhd = _box("mdhd", bytes(12) + struct.pack(">I", 1000) + bytes(8))
+    hdlr = _box("hdlr", bytes(8) + b"vide" + bytes(12))
+    trak = _box("trak", _box("mdia", mdhd + hdlr + _box("minf", stbl)))
+    video = tmp_path / "empty_stss.mp4"
+    video.write_bytes(_box("ftyp", b"isom" + bytes(4)) + _box("moov", trak))
+
+    assert keyframes.read_keyframes(str(video)) is None